@@ -0,0 +1,305 @@
+"""
+本地HTTP查询服务：进程启动时通过 utils.data_loader 加载一次清洗后的数据，所有请求共享
+
+用法:
+    python api_server.py [--host 127.0.0.1] [--port 8765] [--max-concurrency 4]
+
+接口（GET 查询参数或 POST JSON，列表参数可用逗号分隔或重复传入）:
+    /health                 数据行数、数据版本、领域列表和缓存统计
+    /filter                 筛选后的明细行          参数: 筛选条件, limit, offset, columns
+    /aggregate              筛选后的UP主聚合表      参数: 筛选条件, limit, offset
+    /leaderboard            按指标降序的UP主排名    参数: 筛选条件, metric, domain, limit, offset
+    /recommend              领域内的推荐UP主        参数: 筛选条件, domain(必填), limit, 以及推荐权重
+                                                    total_plays / avg_plays / video_count / stability
+筛选条件与页面一致: domains, genders, min_plays, max_plays, start_date, end_date（YYYY-MM-DD，含两端）
+
+响应按 (接口, 数据版本, 规范化的参数) 缓存；同时计算的请求数受 max_concurrency 限制
+"""
+import argparse
+import asyncio
+import json
+
+from aiohttp import web
+
+from config import API_CONFIG
+from utils.data_loader import (get_aggregation_cache_stats, get_dataset_version, get_filter_cache_stats,
+                               get_filtered_data, get_leaderboard, get_recommendation_features,
+                               get_up_aggregated_view, load_data)
+from utils.filter_index import filter_day, normalize_filters
+from utils.leaderboard import LEADERBOARD_METRICS, leaderboard_top
+from utils.memo import LRUMemo
+from utils.recommend import DEFAULT_RECOMMEND_WEIGHTS, RECOMMEND_FEATURES, top_recommendations
+from utils.report import RECOMMENDATION_COLUMNS, json_default, overview_metrics
+
+
+def _as_list(value):
+    """None / 逗号分隔的字符串 / 列表 -> 字符串列表，其他类型（如POST请求体中的数字）报错"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    if not isinstance(value, list):
+        raise ValueError("list parameters must be a string or a list")
+    return [str(item) for item in value]
+
+
+def _as_float(params, name, default=None):
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+
+
+def _as_int(params, name, default, low=0, high=None):
+    value = _as_float(params, name, default)
+    if not float(value).is_integer() or value < low or (high is not None and value > high):
+        raise ValueError(f"{name} must be an integer in [{low}, {high if high is not None else 'inf'}]")
+    return int(value)
+
+
+def _as_single(params, name):
+    """只能出现一次的字符串参数（如 domain），重复传入或不是字符串时报错"""
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a single string value")
+    return value
+
+
+def _as_date(params, name):
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return filter_day(value).strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def parse_filters(params):
+    """请求参数中的筛选条件，格式与页面的 filters 相同"""
+    return {
+        'domains': _as_list(params.get('domains')),
+        'genders': _as_list(params.get('genders')),
+        'min_plays': _as_float(params, 'min_plays'),
+        'max_plays': _as_float(params, 'max_plays'),
+        'start_date': _as_date(params, 'start_date'),
+        'end_date': _as_date(params, 'end_date')
+    }
+
+
+def _paging(params, default_limit=20):
+    return {
+        'limit': _as_int(params, 'limit', default_limit, high=API_CONFIG['max_limit']),
+        'offset': _as_int(params, 'offset', 0)
+    }
+
+
+def parse_filter_request(params):
+    return dict(_paging(params), filters=parse_filters(params), columns=tuple(_as_list(params.get('columns'))))
+
+
+def filter_view(df, request):
+    filtered_df = get_filtered_data(df, request['filters'])
+    page = filtered_df.iloc[request['offset']:request['offset'] + request['limit']]
+    if request['columns']:
+        missing = [col for col in request['columns'] if col not in page.columns]
+        if missing:
+            raise ValueError(f"unknown columns: {missing}")
+        page = page[list(request['columns'])]
+    return {'rows': len(filtered_df), 'data': page}
+
+
+def parse_aggregate_request(params):
+    return dict(_paging(params), filters=parse_filters(params))
+
+
+def aggregate_view(df, request):
+    up_aggregated = get_up_aggregated_view(df, request['filters'])
+    return {
+        'overview': overview_metrics(get_filtered_data(df, request['filters']), up_aggregated),
+        'rows': len(up_aggregated),
+        'data': up_aggregated.iloc[request['offset']:request['offset'] + request['limit']]
+    }
+
+
+def parse_leaderboard_request(params):
+    metric = params.get('metric') or 'comprehensive_score'
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f"metric must be one of {LEADERBOARD_METRICS}")
+    return dict(_paging(params, 10), filters=parse_filters(params), metric=metric, domain=_as_single(params, 'domain'))
+
+
+def leaderboard_view(df, request):
+    board = get_leaderboard(df, request['filters'])
+    top_up = leaderboard_top(board, request['metric'], request['limit'], request['offset'], request['domain'])
+    return {'metric': request['metric'], 'domain': request['domain'], 'offset': request['offset'], 'data': top_up}
+
+
+def parse_recommend_request(params):
+    domain = _as_single(params, 'domain')
+    if domain is None:
+        raise ValueError("domain is required")
+    weights = {key: _as_float(params, key, DEFAULT_RECOMMEND_WEIGHTS[key]) for key in RECOMMEND_FEATURES}
+    if sum(weights.values()) <= 0:
+        raise ValueError("the sum of the weights must be positive")
+    return {
+        'filters': parse_filters(params),
+        'domain': domain,
+        'limit': _as_int(params, 'limit', 10, high=API_CONFIG['max_limit']),
+        'weights': weights
+    }
+
+
+def recommend_view(df, request):
+    features = get_recommendation_features(df, request['filters'])
+    top_up = top_recommendations(features, request['domain'], request['weights'], request['limit'])
+    if top_up is None:
+        raise ValueError("recommendation features are not available for this data")
+    return {
+        'domain': request['domain'],
+        'weights': request['weights'],
+        'data': top_up[[col for col in RECOMMENDATION_COLUMNS if col in top_up.columns]]
+    }
+
+
+# 接口名 -> (参数解析, 计算)；解析失败抛出 ValueError 返回400
+ENDPOINTS = {
+    'filter': (parse_filter_request, filter_view),
+    'aggregate': (parse_aggregate_request, aggregate_view),
+    'leaderboard': (parse_leaderboard_request, leaderboard_view),
+    'recommend': (parse_recommend_request, recommend_view)
+}
+
+
+def cache_key(endpoint, dataset_version, request):
+    """规范化的缓存键：筛选条件用 normalize_filters，等价的请求得到相同的键"""
+    items = []
+    for name, value in sorted(request.items()):
+        if name == 'filters':
+            value = normalize_filters(value)
+        elif isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        items.append((name, value))
+    return endpoint, dataset_version, tuple(items)
+
+
+async def _request_params(request):
+    """查询参数（重复的键合并为列表）与POST的JSON请求体合并"""
+    params = {}
+    for name in request.query:
+        values = request.query.getall(name)
+        params[name] = values[0] if len(values) == 1 else values
+    if request.method == 'POST' and request.can_read_body:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise ValueError("request body must be JSON")
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        params.update(body)
+    return params
+
+
+def _json_response(payload, status=200, cache_status=None):
+    body = json.dumps(payload, ensure_ascii=False, default=json_default).encode('utf-8')
+    return _body_response(body, status, cache_status)
+
+
+def _body_response(body, status=200, cache_status=None):
+    headers = {'X-Cache': cache_status} if cache_status else None
+    return web.Response(body=body, status=status, content_type='application/json', headers=headers)
+
+
+def _compute_body(compute, df, request):
+    """在线程池中执行：计算并序列化响应"""
+    return json.dumps(compute(df, request), ensure_ascii=False, default=json_default).encode('utf-8')
+
+
+def make_handler(endpoint):
+    parse, compute = ENDPOINTS[endpoint]
+
+    async def handler(request):
+        app = request.app
+        try:
+            parsed = parse(await _request_params(request))
+        except ValueError as e:
+            return _json_response({'error': str(e)}, status=400)
+
+        key = cache_key(endpoint, app['dataset_version'], parsed)
+        body = app['response_cache'].get(key)
+        if body is not None:
+            return _body_response(body, cache_status='hit')
+
+        # 计算是CPU密集的pandas操作，放到线程池中执行，信号量限制同时计算的请求数
+        try:
+            await asyncio.wait_for(app['semaphore'].acquire(), API_CONFIG['queue_timeout'])
+        except asyncio.TimeoutError:
+            return _json_response({'error': 'server busy, try again later'}, status=503)
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(None, _compute_body, compute, app['df'], parsed)
+        except ValueError as e:
+            return _json_response({'error': str(e)}, status=400)
+        finally:
+            app['semaphore'].release()
+
+        app['response_cache'].put(key, body, size=len(body))
+        return _body_response(body, cache_status='miss')
+
+    return handler
+
+
+async def health(request):
+    app = request.app
+    return _json_response({
+        'status': 'ok',
+        'rows': len(app['df']),
+        'dataset_version': app['dataset_version'],
+        'domains': app['domains'],
+        'response_cache': app['response_cache'].stats(),
+        'filter_cache': get_filter_cache_stats(),
+        'aggregation_cache': get_aggregation_cache_stats()
+    })
+
+
+async def _load_dataset(app):
+    """启动时加载一次数据，所有请求共享（只读）"""
+    df = await asyncio.get_running_loop().run_in_executor(None, load_data)
+    app['df'] = df
+    app['dataset_version'] = get_dataset_version(df)
+    app['domains'] = [str(value) for value in df['domain'].unique()] if 'domain' in df.columns else []
+    print(f"数据已加载: {len(df)} 行，版本 {app['dataset_version']}")
+
+
+def create_app(max_concurrency=None):
+    app = web.Application()
+    app['semaphore'] = asyncio.Semaphore(max_concurrency or API_CONFIG['max_concurrency'])
+    app['response_cache'] = LRUMemo(
+        max_entries=API_CONFIG['response_cache_entries'],
+        max_bytes=API_CONFIG['response_cache_mb'] * 1024 * 1024
+    )
+    app.on_startup.append(_load_dataset)
+    app.router.add_get('/health', health)
+    for endpoint in ENDPOINTS:
+        handler = make_handler(endpoint)
+        app.router.add_get(f'/{endpoint}', handler)
+        app.router.add_post(f'/{endpoint}', handler)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=API_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=API_CONFIG['port'])
+    parser.add_argument('--max-concurrency', type=int, default=API_CONFIG['max_concurrency'],
+                        help='同时计算的请求数上限')
+    args = parser.parse_args()
+    web.run_app(create_app(args.max_concurrency), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+本地HTTP查询服务的压测：按固定并发发送混合请求，统计各接口的 p50 / p99 延迟和吞吐量
+
+用法:
+    python benchmarks/bench_api.py                                # 启动一个临时服务进程并压测
+    python benchmarks/bench_api.py --url http://127.0.0.1:8765   # 压测已在运行的服务
+    python benchmarks/bench_api.py --requests 2000 --concurrency 32 --distinct 50
+
+--distinct 控制每个接口不同参数组合的数量：越小响应缓存命中越多，越大越接近冷请求
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import aiohttp
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.append(ROOT_DIR)
+
+from config import API_CONFIG
+from utils.leaderboard import LEADERBOARD_METRICS
+
+WEIGHT_STEPS = [0.0, 0.1, 0.2, 0.3, 0.5]
+
+
+def build_requests(domains, n_requests, distinct, seed=0):
+    """生成 (接口, 参数) 列表：每个接口先随机生成 distinct 组参数，再从中抽样"""
+    rng = random.Random(seed)
+
+    def filter_params():
+        return {'domains': ','.join(rng.sample(domains, rng.randint(1, min(3, len(domains))))),
+                'min_plays': rng.choice([0, 1000, 10000, 100000])}
+
+    def leaderboard_params():
+        return dict(filter_params(), metric=rng.choice(LEADERBOARD_METRICS), limit=20,
+                    offset=rng.choice([0, 20, 100]))
+
+    def recommend_params():
+        weights = {key: rng.choice(WEIGHT_STEPS) for key in ['total_plays', 'avg_plays', 'video_count']}
+        return dict(weights, stability=0.3, domain=rng.choice(domains), limit=10)
+
+    generators = {
+        'filter': lambda: dict(filter_params(), limit=20),
+        'aggregate': lambda: dict(filter_params(), limit=20),
+        'leaderboard': leaderboard_params,
+        'recommend': recommend_params
+    }
+    pools = {endpoint: [make() for _ in range(distinct)] for endpoint, make in generators.items()}
+    endpoints = list(pools)
+    return [(endpoint, rng.choice(pools[endpoint])) for endpoint in (rng.choice(endpoints) for _ in range(n_requests))]
+
+
+async def _run(url, requests, concurrency):
+    latencies = {}
+    errors = {}
+    queue = asyncio.Queue()
+    for item in requests:
+        queue.put_nowait(item)
+
+    async def worker(session):
+        while not queue.empty():
+            endpoint, params = queue.get_nowait()
+            start = time.perf_counter()
+            async with session.get(f'{url}/{endpoint}', params=params) as response:
+                await response.read()
+                status = response.status
+            elapsed = time.perf_counter() - start
+            latencies.setdefault(endpoint, []).append(elapsed)
+            if status != 200:
+                errors[endpoint] = errors.get(endpoint, 0) + 1
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=600)) as session:
+        async with session.get(f'{url}/health') as response:
+            health = await response.json()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+        async with session.get(f'{url}/health') as response:
+            health_after = await response.json()
+
+    return latencies, errors, wall, health, health_after
+
+
+async def _domains(url):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f'{url}/health') as response:
+            return (await response.json())['domains']
+
+
+def summarize(latencies):
+    """各接口及全部请求的延迟分位数（毫秒）"""
+    rows = {}
+    groups = dict(latencies, all=[value for values in latencies.values() for value in values])
+    for name, values in groups.items():
+        values = np.array(values) * 1000
+        rows[name] = {
+            'count': len(values),
+            'p50_ms': round(float(np.percentile(values, 50)), 3),
+            'p90_ms': round(float(np.percentile(values, 90)), 3),
+            'p99_ms': round(float(np.percentile(values, 99)), 3),
+            'max_ms': round(float(values.max()), 3)
+        }
+    return rows
+
+
+def _wait_for_server(url, process, timeout=300):
+    async def ping():
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f'{url}/health') as response:
+                return response.status == 200
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('api_server exited before becoming ready')
+        try:
+            if asyncio.run(ping()):
+                return
+        except aiohttp.ClientError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError('api_server did not become ready in time')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='已运行的服务地址，默认启动临时服务')
+    parser.add_argument('--port', type=int, default=API_CONFIG['port'] + 1, help='临时服务的端口')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--distinct', type=int, default=100, help='每个接口的不同参数组合数')
+    parser.add_argument('--results', default=os.path.join(BENCH_DIR, 'api_results.json'))
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if url is None:
+        url = f'http://127.0.0.1:{args.port}'
+        process = subprocess.Popen([sys.executable, 'api_server.py', '--port', str(args.port)], cwd=ROOT_DIR,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if process is not None:
+            _wait_for_server(url, process)
+        domains = asyncio.run(_domains(url))
+        requests = build_requests(domains, args.requests, args.distinct)
+        latencies, errors, wall, health, health_after = asyncio.run(_run(url, requests, args.concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    summary = summarize(latencies)
+    print(f"{len(requests)} requests, concurrency {args.concurrency}, {wall:.2f}s ({len(requests) / wall:.0f} req/s)")
+    print(f"  {'endpoint':<12} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    for name, row in summary.items():
+        error_count = sum(errors.values()) if name == 'all' else errors.get(name, 0)
+        print(f"  {name:<12} {row['count']:>6} {row['p50_ms']:>9.2f} {row['p90_ms']:>9.2f} "
+              f"{row['p99_ms']:>9.2f} {row['max_ms']:>9.2f} {error_count:>7}")
+    cache_before, cache_after = health['response_cache'], health_after['response_cache']
+    hits = cache_after['hits'] - cache_before['hits']
+    misses = cache_after['misses'] - cache_before['misses']
+    print(f"  response cache: {hits} hits / {misses} misses")
+
+    with open(args.results, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'requests': len(requests),
+            'concurrency': args.concurrency,
+            'distinct': args.distinct,
+            'seconds': round(wall, 3),
+            'errors': errors,
+            'latency': summary,
+            'response_cache': {'hits': hits, 'misses': misses}
+        }, f, ensure_ascii=False, indent=2)
+    print(f"results written to {args.results}")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
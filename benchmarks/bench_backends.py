@@ -0,0 +1,113 @@
+"""
+查询后端对比：pandas（整表载入内存）与 DuckDB（直接查询Parquet列式缓存）
+
+用法:
+    python benchmarks/bench_backends.py                       # 默认 1m
+    python benchmarks/bench_backends.py --sizes 1m,5m --repeat 3
+
+每个规模生成合成数据并写入临时的列式缓存，然后分别测量两个后端：
+- open: pandas 读取Parquet、应用schema并构建筛选索引；DuckDB 只读取文件的列信息
+- filter / aggregate / domain_means: 未筛选和典型筛选（两个领域 + 播放数下限取中位数）各一次
+耗时取 repeat 次中的最小值；peak_mb 为 tracemalloc 统计的Python侧峰值内存，
+DuckDB 自身的内存不经过Python分配器，不计入
+每个阶段同时检查两个后端的结果是否一致
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_suite import BENCH_DIR, _representative_filters, make_raw_frame, measure, parse_size
+from data_cleaner import clean_dataframe
+from utils.columnar_cache import read_meta, write_frame
+from utils.query_backend import DuckDBBackend, PandasBackend, duckdb_available
+from utils.schema import compact_frame
+
+QUERIES = ['filter', 'aggregate', 'domain_means']
+
+
+def _same_result(left, right):
+    if left is None or right is None:
+        return left is None and right is None
+    try:
+        pd.testing.assert_frame_equal(left, right, check_exact=False, rtol=1e-9, check_index_type=False)
+        return True
+    except AssertionError:
+        return False
+
+
+def run_size(n_rows, repeat):
+    raw = make_raw_frame(n_rows)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_path = os.path.join(workdir, 'bench.parquet')
+        source_path = os.path.join(workdir, 'bench_source.xlsx')
+        with open(source_path, 'wb') as f:
+            f.write(b'benchmark source placeholder')
+        df, schema = compact_frame(clean_dataframe(raw))
+        write_frame(df, cache_path, source_path, extra_meta={'schema': schema})
+        del raw
+        filter_cases = {'all': {}, 'filtered': _representative_filters(df)}
+        del df
+
+        backends = {}
+
+        def open_pandas():
+            frame = pd.read_parquet(cache_path)
+            frame, _ = compact_frame(frame, read_meta(cache_path)['schema'])
+            backends['pandas'] = PandasBackend(frame)
+
+        def open_duckdb():
+            backends['duckdb'] = DuckDBBackend(cache_path, read_meta(cache_path)['schema'])
+
+        for name, open_backend in (('pandas', open_pandas), ('duckdb', open_duckdb)):
+            results[f'{name}.open'] = measure(open_backend, repeat)
+
+        for query in QUERIES:
+            for case, filters in filter_cases.items():
+                outputs = {}
+                for name, backend in backends.items():
+                    def run(backend=backend, name=name):
+                        outputs[name] = getattr(backend, query)(filters)
+                    results[f'{name}.{query}.{case}'] = measure(run, repeat)
+                results[f'{query}.{case}.match'] = _same_result(outputs['pandas'], outputs['duckdb'])
+
+    for stage, value in results.items():
+        if isinstance(value, bool):
+            print(f"  {stage:<34} {'match' if value else 'MISMATCH'}")
+        else:
+            print(f"  {stage:<34} {value['seconds']:>10.4f}s {value['peak_mb']:>10.1f} MB")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1m', help='逗号分隔的数据规模，如 1m,5m')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段的重复次数（耗时取最小值）')
+    parser.add_argument('--results', default=os.path.join(BENCH_DIR, 'backend_results.json'))
+    args = parser.parse_args()
+
+    if not duckdb_available():
+        print("duckdb is not installed: pip install duckdb")
+        return 1
+
+    results = {}
+    for n_rows in [parse_size(text) for text in args.sizes.split(',') if text.strip()]:
+        print(f"rows: {n_rows:,}")
+        results[str(n_rows)] = run_size(n_rows, args.repeat)
+
+    with open(args.results, 'w', encoding='utf-8') as f:
+        json.dump({'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"results written to {args.results}")
+    mismatches = [stage for stages in results.values() for stage, value in stages.items() if value is False]
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+清洗流程基准测试：逐元素 apply 的旧实现 vs 按列向量化的 clean_dataframe
+
+用法: python benchmarks/bench_cleaning.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from data_cleaner import (COLUMN_MAPPING, INTEGER_COLUMNS, NUMERIC_COLUMNS, TEXT_COLUMNS,
+                          clean_dataframe, clean_numeric_value)
+
+
+def make_raw_frame(n_rows, seed=42):
+    """生成与 bilibili_data.xlsx 列结构一致的原始数据（含万单位、千分位和空值）"""
+    rng = np.random.default_rng(seed)
+
+    def counter_column(scale):
+        values = rng.integers(0, scale, n_rows)
+        as_wan = np.char.add(np.round(values / 10000, 2).astype(str), 'w')
+        with_comma = np.array([f'{v:,}' for v in values[:1000]] * (n_rows // 1000 + 1))[:n_rows]
+        choice = rng.integers(0, 4, n_rows)
+        column = np.where(choice == 0, as_wan, np.where(choice == 1, with_comma, values.astype(str))).astype(object)
+        column[rng.random(n_rows) < 0.01] = np.nan
+        return column
+
+    up_ids = rng.integers(0, max(n_rows // 20, 1), n_rows)
+    return pd.DataFrame({
+        '榜单类型': rng.choice(['日榜', '周榜', '月榜'], n_rows),
+        '创作领域': rng.choice(['生活', '游戏', '知识', '科技'], n_rows),
+        '时间': pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D'),
+        '投币数': counter_column(100000),
+        '涨粉数': counter_column(50000),
+        '等级': rng.integers(1, 7, n_rows),
+        '获赞数': counter_column(200000),
+        'mid': up_ids + 10000,
+        'up主': np.char.add('UP主_', up_ids.astype(str)),
+        '投稿视频数': rng.integers(1, 5, n_rows),
+        '播放数': counter_column(5000000),
+        '排名': rng.integers(1, 101, n_rows),
+        '性别': rng.choice(['男', '女', '保密'], n_rows),
+        '弹幕数': counter_column(20000),
+    })
+
+
+def legacy_clean_dataframe(df):
+    """旧实现：逐元素 apply + 按行 lambda，仅用于对比"""
+    df = df.rename(columns=COLUMN_MAPPING)
+    if 'video_title' not in df.columns:
+        df['video_title'] = df.apply(lambda row: f"{row['up_name']}_视频", axis=1)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].apply(clean_numeric_value)
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            if col in INTEGER_COLUMNS:
+                df[col] = df[col].astype(int)
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna(f'未知{col}').astype(str)
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--skip-legacy', action='store_true', help='只测试向量化实现')
+    args = parser.parse_args()
+
+    raw = make_raw_frame(args.rows)
+    print(f"rows: {len(raw):,}")
+
+    start = time.perf_counter()
+    vectorized = clean_dataframe(raw.copy())
+    vectorized_time = time.perf_counter() - start
+    print(f"vectorized clean_dataframe: {vectorized_time:.2f}s")
+
+    if not args.skip_legacy:
+        start = time.perf_counter()
+        legacy = legacy_clean_dataframe(raw.copy())
+        legacy_time = time.perf_counter() - start
+        print(f"legacy per-element apply:   {legacy_time:.2f}s")
+
+        pd.testing.assert_frame_equal(legacy, vectorized)
+        print(f"outputs identical, speedup: {legacy_time / vectorized_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+冷启动基准：模块导入耗时和各页面首次渲染耗时
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --update-baseline      # 把本次结果保存为基线
+
+每项测量都在新的Python进程中进行（与自动扩缩容时新容器的冷启动一致），重复多次取最小值：
+- import.<模块>: 进程内 import 该模块的耗时
+- first_paint.<页面>: 用 streamlit.testing 的 AppTest 完整运行一次页面脚本的耗时（含导入），
+  同时记录运行后是否已加载 pandas / plotly / openpyxl
+存在 --baseline 文件时逐项比较，任一项超过基线 (1 + tolerance) 倍即以状态1退出
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.append(ROOT_DIR)
+
+from benchmarks.bench_suite import find_regressions
+
+IMPORT_MODULES = ['streamlit', 'utils.perf', 'utils.summary', 'utils.data_loader', 'utils.charts', 'data_cleaner']
+PAGES = ['main.py', 'pages/Data_Overview.py', 'pages/In-depth_analysis.py', 'pages/uploaders_recommand.py']
+HEAVY_MODULES = ['pandas', 'plotly.express', 'openpyxl', 'data_cleaner']
+
+IMPORT_SCRIPT = """
+import time, json
+start = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start}}))
+"""
+
+FIRST_PAINT_SCRIPT = """
+import io, json, sys, time, contextlib
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+with contextlib.redirect_stdout(io.StringIO()):
+    at = AppTest.from_file({page!r}, default_timeout=300).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'exceptions': [str(e.value) for e in at.exception],
+    'loaded': [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+
+def run_fresh(script):
+    """在项目根目录的新进程中运行脚本，返回其最后一行输出的JSON"""
+    completed = subprocess.run([sys.executable, '-c', script], cwd=ROOT_DIR, capture_output=True,
+                               text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(script, repeat):
+    best = None
+    for _ in range(repeat):
+        result = run_fresh(script)
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return dict(best, seconds=round(best['seconds'], 6))
+
+
+def _write_json(path, payload):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='每项的重复次数（耗时取最小值）')
+    parser.add_argument('--results', default=os.path.join(BENCH_DIR, 'startup_results.json'))
+    parser.add_argument('--baseline', default=os.path.join(BENCH_DIR, 'startup_baseline.json'))
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许的退化比例')
+    parser.add_argument('--update-baseline', action='store_true', help='把本次结果写为基线')
+    args = parser.parse_args()
+
+    results = {}
+    for module in IMPORT_MODULES:
+        results[f'import.{module}'] = measure(IMPORT_SCRIPT.format(module=module), args.repeat)
+        print(f"  {'import ' + module:<40} {results[f'import.{module}']['seconds']:>8.3f}s")
+
+    for page in PAGES:
+        result = measure(FIRST_PAINT_SCRIPT.format(page=page, heavy=HEAVY_MODULES), args.repeat)
+        results[f'first_paint.{page}'] = result
+        status = 'EXC ' + result['exceptions'][0] if result['exceptions'] else 'loaded: ' + ', '.join(result['loaded'])
+        print(f"  {'first paint ' + page:<40} {result['seconds']:>8.3f}s  {status}")
+
+    # 与 bench_suite 的结果格式一致：{分组: {阶段: {'seconds': ...}}}
+    payload = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': {'startup': results}
+    }
+    _write_json(args.results, payload)
+    print(f"results written to {args.results}")
+
+    if args.update_baseline:
+        _write_json(args.baseline, payload)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline found, run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = find_regressions(payload['results'], baseline, args.tolerance)
+    for group, stage, metric, before, after in regressions:
+        print(f"REGRESSION {stage} {metric}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    if regressions:
+        return 1
+    print("no regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+基准测试套件：清洗、加载、筛选、聚合、推荐打分和图表构建
+
+用法:
+    python benchmarks/bench_suite.py                          # 默认 10k,100k,1m
+    python benchmarks/bench_suite.py --sizes 10k,100k,1m,10m
+    python benchmarks/bench_suite.py --update-baseline        # 把本次结果保存为基线
+
+每个阶段记录耗时（重复多次取最小值）和 tracemalloc 峰值内存，结果写入 --results；
+与 --baseline 文件逐阶段比较，任一阶段超过基线 (1 + tolerance) 倍即以状态1退出；
+基线文件不存在或缺少本次运行的规模时（未指定 --update-baseline）同样以状态1退出
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from data_cleaner import clean_dataframe, generate_synthetic_data, to_raw_frame
+from utils.aggregation import get_up_aggregated_data
+from utils.charts import create_bar_chart, create_pie_chart_from_series, create_scatter_plot, create_time_series
+from utils.columnar_cache import read_frame, read_meta, write_frame
+from utils.figure_cache import clear_figure_cache
+from utils.filter_index import apply_filter_index, build_filter_index
+from utils.recommend import DEFAULT_RECOMMEND_WEIGHTS, build_recommendation_features, top_recommendations
+from utils.schema import compact_frame
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = '10k,100k,1m'
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+# 低于这些绝对值的变化视为噪声，不判定为退化
+MIN_SECONDS_DELTA = 0.01
+MIN_PEAK_MB_DELTA = 1.0
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def _representative_filters(df):
+    """与页面典型操作相当的筛选：两个领域 + 播放数下限取中位数"""
+    domains = df['domain'].value_counts()
+    return {
+        'domains': [str(value) for value in domains.index[:2]],
+        'genders': [],
+        'min_plays': float(df['plays'].median()),
+        'max_plays': float(df['plays'].max())
+    }
+
+
+def _last_days_filters(df, days=30):
+    """最常见的时间筛选：数据中最新日期之前的 days 天（含当天）"""
+    last_day = df['date'].max().normalize()
+    return {'start_date': (last_day - pd.Timedelta(days=days - 1)).strftime('%Y-%m-%d')}
+
+
+def build_stages(raw, workdir):
+    """
+    按执行顺序返回 (阶段名, 函数)，前面阶段的输出存在 state 中供后续阶段使用
+    函数可以被重复调用，每次都从相同的输入开始
+    """
+    state = {}
+    cache_path = os.path.join(workdir, 'bench.parquet')
+    source_path = os.path.join(workdir, 'bench_source.xlsx')
+    with open(source_path, 'wb') as f:
+        f.write(b'benchmark source placeholder')
+
+    def clean():
+        # 与 clean_bilibili_data 读入Excel之后的步骤一致（Excel最多约100万行，无法作为10M的输入）
+        df, schema = compact_frame(clean_dataframe(raw.copy()))
+        state['df'], state['schema'] = df, schema
+
+    def save():
+        write_frame(state['df'], cache_path, source_path, extra_meta={'schema': state['schema']})
+
+    def load():
+        # load_cleaned_data 在缓存有效时的路径：读Parquet + 应用缓存中的schema
+        df, _ = compact_frame(read_frame(cache_path), read_meta(cache_path)['schema'])
+        state['loaded'] = df
+
+    def filter_index():
+        state['index'] = build_filter_index(state['df'])
+        state['filters'] = _representative_filters(state['df'])
+
+    def filter_rows():
+        state['filtered'] = apply_filter_index(state['df'], state['index'], state['filters'])
+
+    def filter_last_30_days():
+        apply_filter_index(state['df'], state['index'], _last_days_filters(state['df']))
+
+    def aggregate():
+        state['agg'] = get_up_aggregated_data(state['df'])
+
+    def aggregate_filtered():
+        get_up_aggregated_data(state['filtered'])
+
+    # 推荐页面的路径：特征矩阵随数据构建一次，调整权重时只对所选领域打分
+    def recommend_features():
+        state['features'] = build_recommendation_features(state['agg'])
+
+    def recommend_top():
+        domain = state['agg']['domain'].value_counts().index[0]
+        top_recommendations(state['features'], domain, DEFAULT_RECOMMEND_WEIGHTS)
+
+    # 图表阶段测量的是构建耗时，每次运行前清空图表缓存
+    def chart_scatter():
+        clear_figure_cache()
+        create_scatter_plot(state['agg'], 'total_plays', 'comprehensive_score', 'domain', 'video_count')
+
+    def chart_bar():
+        clear_figure_cache()
+        counts = state['agg']['domain'].value_counts()
+        create_bar_chart(counts[counts > 0].reset_index(), 'domain', 'count')
+        create_bar_chart(state['df'].nlargest(5, 'plays'), 'video_title', 'plays')
+
+    def chart_pie():
+        clear_figure_cache()
+        create_pie_chart_from_series(state['df'].groupby('domain', observed=True)['video_count'].sum())
+
+    def chart_time_series():
+        clear_figure_cache()
+        daily = state['df'].groupby('date')[['plays', 'likes']].sum().reset_index()
+        create_time_series(daily, 'date', ['plays', 'likes'])
+
+    return [
+        ('clean', clean),
+        ('save', save),
+        ('load', load),
+        ('filter_index', filter_index),
+        ('filter', filter_rows),
+        ('filter.last_30_days', filter_last_30_days),
+        ('aggregate', aggregate),
+        ('aggregate_filtered', aggregate_filtered),
+        ('recommend.features', recommend_features),
+        ('recommend.top', recommend_top),
+        ('chart.scatter', chart_scatter),
+        ('chart.bar', chart_bar),
+        ('chart.pie', chart_pie),
+        ('chart.time_series', chart_time_series),
+    ]
+
+
+def measure(fn, repeat):
+    """耗时取 repeat 次中的最小值；峰值内存在额外一次 tracemalloc 运行中测量（不计入耗时）"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': round(best, 6), 'peak_mb': round(peak / 1024 / 1024, 3)}
+
+
+def make_raw_frame(n_rows):
+    """合成数据还原为原始工作簿格式，平均每个UP主20条记录"""
+    return to_raw_frame(generate_synthetic_data(n_rows, n_ups=max(n_rows // 20, 1)))
+
+
+def run_size(n_rows, repeat):
+    raw = make_raw_frame(n_rows)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, fn in build_stages(raw, workdir):
+            results[name] = measure(fn, repeat)
+            print(f"  {name:<20} {results[name]['seconds']:>10.4f}s {results[name]['peak_mb']:>10.1f} MB")
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """返回超过基线 (1 + tolerance) 倍的 (规模, 阶段, 指标, 基线值, 当前值)"""
+    regressions = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if not reference:
+                continue
+            for metric, min_delta in (('seconds', MIN_SECONDS_DELTA), ('peak_mb', MIN_PEAK_MB_DELTA)):
+                before, after = reference.get(metric), current.get(metric)
+                if before is None or after is None:
+                    continue
+                if after > before * (1 + tolerance) and after - before > min_delta:
+                    regressions.append((size, stage, metric, before, after))
+    return regressions
+
+
+def _write_json(path, payload):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='逗号分隔的数据规模，如 10k,100k,1m,10m')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段的重复次数（耗时取最小值）')
+    parser.add_argument('--results', default=os.path.join(BENCH_DIR, 'results.json'))
+    parser.add_argument('--baseline', default=os.path.join(BENCH_DIR, 'baseline.json'))
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许的退化比例')
+    parser.add_argument('--update-baseline', action='store_true', help='把本次结果写为基线')
+    args = parser.parse_args()
+
+    sizes = [parse_size(text) for text in args.sizes.split(',') if text.strip()]
+    results = {}
+    for n_rows in sizes:
+        print(f"rows: {n_rows:,}")
+        results[str(n_rows)] = run_size(n_rows, args.repeat)
+
+    payload = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results
+    }
+    _write_json(args.results, payload)
+    print(f"results written to {args.results}")
+
+    if args.update_baseline:
+        # 只覆盖本次运行过的规模，保留其他规模的基线
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update({key: value for key, value in payload.items() if key != 'results'})
+        baseline['results'] = dict(baseline.get('results', {}), **results)
+        _write_json(args.baseline, baseline)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline found at {args.baseline}, run with --update-baseline to create one")
+        return 1
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    missing = [size for size in results if size not in baseline]
+    if missing:
+        print(f"no baseline for rows={','.join(missing)}, run with --update-baseline to add them")
+        return 1
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for size, stage, metric, before, after in regressions:
+        print(f"REGRESSION rows={size} {stage} {metric}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    if regressions:
+        return 1
+    print("no regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,6 +10,35 @@ APP_CONFIG = {
 DATA_CONFIG = {
     'original_file': 'bilibili_data.xlsx',
     'cleaned_file': 'cleaned_bilibili_data.xlsx',
+    # 列式缓存（Parquet），由 save_cleaned_data 写入，源文件变化后自动失效
+    'cache_file': 'cleaned_bilibili_data.parquet',
+    # 清洗时物化的UP主聚合表（未筛选视图直接读取）
+    'aggregate_file': 'cleaned_bilibili_data.agg.parquet',
+    # 清洗时物化的按日/周/月、按UP主和领域的时间汇总表（趋势页只读取它）
+    'rollup_file': 'cleaned_bilibili_data.rollup.parquet',
+    # 流式清洗：按块读取原始工作簿，每块的行数
+    'streaming_ingest': False,
+    'stream_chunk_size': 50000,
+    # 增量清洗：原始数据变化时只清洗新增/变化的行
+    'incremental_ingest': False,
+    # 增量清洗追加的分段数达到该值时全量重建一次（合并分段、清除墓碑）
+    'incremental_max_segments': 16,
+    # 多源清洗：目录或通配符（如 'data/*.xlsx'），设置后代替 original_file；进程数None表示全部CPU核
+    'source_pattern': None,
+    'ingest_workers': None,
+    # 离线报告（report_cli.py）的输出目录，以及并行计算各领域的进程数（None表示全部CPU核）
+    'report_dir': 'reports',
+    'report_workers': None,
+    # 筛选和聚合的查询后端：'pandas'（在内存中的整表上计算）或 'duckdb'（在列式缓存上执行查询，需要安装duckdb）
+    # 两种后端下页面都会通过 load_data() 加载完整数据（概览、图表等仍直接使用它）
+    'query_backend': 'pandas',
+    # 按 (数据版本, 筛选条件) 缓存的筛选/聚合结果条数
+    'filter_cache_entries': 64,
+    # 筛选结果（明细行副本）的LRU缓存内存预算（MB）
+    'filter_memo_mb': 256,
+    # UP主聚合结果的LRU缓存：最多条数和内存预算（MB）
+    'aggregation_memo_entries': 32,
+    'aggregation_memo_mb': 256,
     'cache_time': 3600
 }
 
@@ -26,5 +55,51 @@ DEFAULT_FILTERS = {
     'domains': [],
     'genders': [],
     'min_plays': 0,
-    'max_plays': float('inf')
+    'max_plays': float('inf'),
+    # 日期区间（含两端），None表示不限
+    'start_date': None,
+    'end_date': None
+}
+
+# 图表配置
+CHART_CONFIG = {
+    # 散点图：超过该点数改用WebGL渲染
+    'scatter_webgl_threshold': 1000,
+    # 超过该点数在服务端二维分箱，绘制密度热力图（可按区域下钻查看单个点）
+    'scatter_density_threshold': 50000,
+    'scatter_density_bins': 100,
+    # 全为正数且跨越3个数量级以上的坐标轴按对数分箱
+    'scatter_density_log_axes': True,
+    # 时间序列：按图表宽度（像素）降采样，每像素最多保留的点数；方法为 'minmax' 或 'lttb'
+    'time_series_width_px': 1200,
+    'time_series_points_per_px': 2,
+    'time_series_downsample': 'minmax',
+    # 图表缓存：按 (数据指纹, 参数) 缓存构建好的图表，最多条数和按图中数组大小估算的内存预算（MB），条数为0时关闭
+    'figure_cache_entries': 128,
+    'figure_cache_mb': 64
+}
+
+# 本地HTTP查询服务（api_server.py）
+API_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8765,
+    # 同时计算的请求数上限，超出的请求排队，排队超过 queue_timeout 秒返回503
+    'max_concurrency': 4,
+    'queue_timeout': 10,
+    # 响应缓存：按 (接口, 数据版本, 规范化的参数) 缓存序列化后的响应，最多条数和内存预算（MB）
+    'response_cache_entries': 1024,
+    'response_cache_mb': 64,
+    # 单次返回的最大行数
+    'max_limit': 1000
+}
+
+# 性能记录：每次页面运行的各阶段耗时
+PERF_CONFIG = {
+    'enabled': True,
+    # 每次运行追加一行JSON到该文件（如 'perf_log.jsonl'），默认None不写日志
+    'log_file': None,
+    # 日志超过该大小（MB）时轮转为 <log_file>.1，只保留一份旧日志
+    'log_max_mb': 10,
+    # 侧边栏性能面板默认是否展开
+    'show_panel': False
 }
\ No newline at end of file
@@ -3,6 +3,11 @@ import numpy as np
 import re
 import os
 
+from config import DATA_CONFIG, WEIGHTS
+from utils.perf import span
+from utils.schema import (FIXED_INTEGER_COLUMNS, apply_schema, compact_frame, infer_schema, memory_footprint,
+                          merge_schemas)
+
 
 def clean_numeric_value(value):
     """
@@ -31,88 +36,170 @@ def clean_numeric_value(value):
         return 0
 
 
+# 原始中文列名到英文列名的映射
+COLUMN_MAPPING = {
+    '榜单类型': 'rank_type',
+    '创作领域': 'domain',
+    '时间': 'date',
+    '投币数': 'coins',
+    '头像': 'avatar',
+    '涨粉数': 'fans_growth',
+    '等级': 'level',
+    '获赞数': 'likes',
+    'mid': 'mid',
+    'up主': 'up_name',
+    'up主标签': 'up_tag',
+    '投稿视频数': 'video_count',
+    '播放数': 'plays',
+    '排名': 'rank',
+    '性别': 'gender',
+    '类型': 'type',
+    '弹幕数': 'danmu'
+}
+
+NUMERIC_COLUMNS = ['plays', 'coins', 'likes', 'danmu', 'fans_growth', 'video_count', 'level', 'rank']
+# level 保持浮点，其余数值列转换为整数
+INTEGER_COLUMNS = ['plays', 'coins', 'likes', 'danmu', 'fans_growth', 'video_count', 'rank']
+TEXT_COLUMNS = ['up_name', 'domain', 'gender', 'rank_type', 'type', 'up_tag', 'video_title']
+REQUIRED_COLUMNS = ['up_name', 'domain', 'plays', 'coins', 'likes', 'danmu', 'video_title']
+
+
+# 只匹配ASCII数字：字符串列的正则可能由 pyarrow 执行，其中 \d 不包含全角等Unicode数字
+NUMBER_PATTERN = r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?'
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def _clean_numeric_value_or_zero(value):
+    """逐个清理，格式错误（如 １.2.3w）时与向量化路径一样记为0，而不是让整次清洗失败"""
+    try:
+        return clean_numeric_value(value)
+    except ValueError:
+        return 0
+
+
+def _parse_float_text(text):
+    """把字符串列解析为浮点数，无法解析的值为NaN，与 float() 的规则一致"""
+    values = np.full(len(text), np.nan)
+    # 常规数字走快速的整列转换，其余少量值（如 1_000、inf）逐个交给 float()
+    is_number = text.str.fullmatch(NUMBER_PATTERN).to_numpy(dtype=bool, na_value=False)
+    if is_number.any():
+        values[is_number] = text[is_number].astype('float64').to_numpy()
+    if not is_number.all():
+        values[~is_number] = [_to_float(value) for value in text[~is_number]]
+    return values
+
+
+def clean_numeric_series(series):
+    """
+    按列向量化清理数值数据，结果与逐个调用 clean_numeric_value 一致
+    """
+    # 已经是数值类型的列无需字符串解析
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype('float64').fillna(0)
+
+    values = series.astype(object)
+    missing = values.isna().to_numpy()
+    text = values.where(~missing, '').astype(str).str.strip()
+
+    result = np.zeros(len(series), dtype='float64')
+
+    # 除“万”和全角逗号外含非ASCII字符（如全角、阿拉伯文数字）的少量值逐个清理，保证与 clean_numeric_value 一致
+    non_ascii = text.str.contains(r'[^\x00-\x7f万，]', regex=True).to_numpy(dtype=bool) & ~missing
+    if non_ascii.any():
+        result[non_ascii] = values[non_ascii].map(_clean_numeric_value_or_zero).to_numpy(dtype='float64')
+
+    # 处理万单位 (如 4.53w -> 45300)，取第一个数字片段并截断为整数
+    is_wan = (text.str.contains('w', case=False, regex=False) |
+              text.str.contains('万', regex=False)).to_numpy(dtype=bool) & ~missing & ~non_ascii
+    wan_mask = np.zeros(len(series), dtype=bool)
+    if is_wan.any():
+        wan_text = text[is_wan]
+        has_number = wan_text.str.contains(r'[0-9.]', regex=True).to_numpy(dtype=bool)
+        number_part = wan_text[has_number].str.replace(r'(?s)^[^0-9.]*([0-9.]+).*$', r'\1', regex=True)
+        wan_mask[np.flatnonzero(is_wan)[has_number]] = True
+        result[wan_mask] = np.trunc(_parse_float_text(number_part) * 10000)
+
+    # 处理普通数字，移除逗号等分隔符
+    plain_mask = ~wan_mask & ~missing & ~non_ascii
+    if plain_mask.any():
+        plain_text = text[plain_mask].str.replace(',', '', regex=False).str.replace('，', '', regex=False)
+        result[plain_mask] = _parse_float_text(plain_text)
+
+    return pd.Series(result, index=series.index, name=series.name).fillna(0)
+
+
+def clean_dataframe(df):
+    """
+    清洗已读入内存的原始数据（列名映射、数值/文本/日期列处理）
+    """
+    # 应用列名映射
+    df = df.rename(columns=COLUMN_MAPPING)
+
+    # 添加缺失的必要列
+    if 'video_title' not in df.columns and 'up_name' in df.columns:
+        # 创建虚拟的视频标题列
+        up_names = np.asarray(df['up_name'], dtype=object).astype(str)
+        df['video_title'] = pd.Series(np.char.add(up_names, '_视频'), index=df.index, dtype=object)
+
+    # 清理数值列
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            cleaned = clean_numeric_series(df[col])
+            # 对于整数列，转换为int
+            if col in INTEGER_COLUMNS:
+                cleaned = cleaned.astype(int)
+            df[col] = cleaned
+
+    # mid 等固定宽度整数列，无法解析的值记为0
+    for col, dtype in FIXED_INTEGER_COLUMNS.items():
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(dtype)
+
+    # 清理文本列
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna(f'未知{col}').astype(str)
+
+    # 处理日期列
+    if 'date' in df.columns:
+        try:
+            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        except Exception:
+            print("日期列处理失败")
+
+    return df
+
+
 def clean_bilibili_data(file_path):
     """
     清洗B站数据
     """
     try:
         # 读取数据
-        df = pd.read_excel(file_path)
-        print(f"原始数据形状: {df.shape}")
-        print(f"原始列名: {df.columns.tolist()}")
-
-        # 根据原始中文列名进行精确映射
-        column_mapping = {
-            '榜单类型': 'rank_type',
-            '创作领域': 'domain',
-            '时间': 'date',
-            '投币数': 'coins',
-            '头像': 'avatar',
-            '涨粉数': 'fans_growth',
-            '等级': 'level',
-            '获赞数': 'likes',
-            'mid': 'mid',
-            'up主': 'up_name',
-            'up主标签': 'up_tag',
-            '投稿视频数': 'video_count',
-            '播放数': 'plays',
-            '排名': 'rank',
-            '性别': 'gender',
-            '类型': 'type',
-            '弹幕数': 'danmu'
-        }
-
-        # 应用列名映射
-        df = df.rename(columns=column_mapping)
-        print(f"重命名后列名: {df.columns.tolist()}")
-
-        # 添加缺失的必要列
-        if 'video_title' not in df.columns:
-            # 创建虚拟的视频标题列
-            df['video_title'] = df.apply(lambda row: f"{row['up_name']}_视频", axis=1)
-            print("已创建虚拟 video_title 列")
-
-        # 清理数值列
-        numeric_columns = ['plays', 'coins', 'likes', 'danmu', 'fans_growth', 'video_count', 'level', 'rank']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = df[col].apply(clean_numeric_value)
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-                # 对于整数列，转换为int
-                if col in ['plays', 'coins', 'likes', 'danmu', 'fans_growth', 'video_count', 'rank']:
-                    df[col] = df[col].astype(int)
-                print(f"已清理数值列: {col}")
-
-        # 清理文本列
-        text_columns = ['up_name', 'domain', 'gender', 'rank_type', 'type', 'up_tag', 'video_title']
-        for col in text_columns:
-            if col in df.columns:
-                df[col] = df[col].fillna(f'未知{col}').astype(str)
-                print(f"已清理文本列: {col}")
-
-        # 处理日期列
-        if 'date' in df.columns:
-            try:
-                df['date'] = pd.to_datetime(df['date'], errors='coerce')
-                print("已处理日期列")
-            except:
-                print("日期列处理失败")
+        with span('clean.read') as record:
+            df = pd.read_excel(file_path)
+            record['rows'] = len(df)
+
+        with span('clean.transform', rows=len(df)):
+            df = clean_dataframe(df)
+
+        with span('clean.compact', rows=len(df)) as record:
+            record['bytes_before'] = memory_footprint(df)
+            df, _ = compact_frame(df)
+            record['bytes_after'] = memory_footprint(df)
 
         # 确保必要的列存在
-        required_columns = ['up_name', 'domain', 'plays', 'coins', 'likes', 'danmu', 'video_title']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
 
         if missing_columns:
             print(f"警告: 缺少以下必要列: {missing_columns}")
 
-        print(f"清洗后数据形状: {df.shape}")
-        print("数据清洗完成!")
-        print("最终列名:", df.columns.tolist())
-
-        # 显示前几行数据确认
-        print("\n前5行数据预览:")
-        print(df[['up_name', 'domain', 'plays', 'coins', 'likes', 'danmu', 'video_title']].head())
-
         return df
 
     except Exception as e:
@@ -122,48 +209,738 @@ def clean_bilibili_data(file_path):
         return None
 
 
-def create_sample_data():
+def _iter_raw_row_chunks(file_path, chunk_size):
+    """以 openpyxl 只读模式逐行读取工作簿第一个工作表，产出 (表头, 行列表)"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = list(header)
+        width = len(header)
+
+        buffer = []
+        for row in rows:
+            # 跳过空行，并补齐被截断的行尾
+            if row is None or all(value is None for value in row):
+                continue
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            buffer.append(row[:width])
+
+            if len(buffer) >= chunk_size:
+                yield header, buffer
+                buffer = []
+
+        if buffer:
+            yield header, buffer
+    finally:
+        workbook.close()
+
+
+def _rows_to_frame(header, rows):
+    """与 pd.read_excel 一样经过 TextParser 做类型推断"""
+    from pandas.io.parsers import TextParser
+
+    return TextParser([header] + rows, header=0).read()
+
+
+def iter_raw_chunks(file_path, chunk_size=None):
     """
-    创建示例数据用于测试
+    逐块读取原始工作簿，每 chunk_size 行产出一个原始DataFrame
     """
-    np.random.seed(42)
+    chunk_size = chunk_size or DATA_CONFIG['stream_chunk_size']
+    for header, rows in _iter_raw_row_chunks(file_path, chunk_size):
+        yield _rows_to_frame(header, rows)
 
-    # 创建示例数据
-    domains = ['游戏', '生活', '知识', '音乐', '舞蹈', '美食', '科技', '时尚']
-    genders = ['男', '女', '未知']
-    up_names = [f'UP主_{i}' for i in range(1, 51)]
 
-    data = []
-    for i in range(1000):
-        up_name = np.random.choice(up_names)
-        domain = np.random.choice(domains)
-        gender = np.random.choice(genders)
+def _stable_chunk_dtypes(chunk):
+    """
+    统一清洗器不处理的列（如 avatar）在各块中的类型，所有块才能按第一个块的schema写入：
+    文本或整块为空的列转为 str（保留缺失值），其余数值列转为 float64
+    """
+    handled = set(NUMERIC_COLUMNS) | set(FIXED_INTEGER_COLUMNS) | set(TEXT_COLUMNS) | {'date'}
+    for col in chunk.columns:
+        if col in handled or pd.api.types.is_bool_dtype(chunk[col]):
+            continue
+        if chunk[col].isna().all() or not pd.api.types.is_numeric_dtype(chunk[col]):
+            chunk[col] = chunk[col].astype('str')
+        else:
+            chunk[col] = chunk[col].astype('float64')
+    return chunk
 
-        # 生成视频数据
-        video_title = f'视频_{i + 1}'
 
-        # 根据领域和UP主设置不同的表现水平
-        base_plays = np.random.randint(1000, 50000)
-        if domain in ['游戏', '生活']:
-            base_plays *= 2
+def clean_bilibili_data_streaming(file_path, cache_path=None, chunk_size=None):
+    """
+    流式清洗大文件：逐块读取、清洗并追加写入列式缓存，峰值内存与文件大小无关
+    UP主聚合表和时间汇总表在写入每个块时逐块累积，不再读回明细
+    返回写入的行数，失败时返回None
+    """
+    from utils.aggregation import finish_up_aggregates, merge_up_aggregates, partial_up_aggregates
+    from utils.columnar_cache import write_frame_chunks
+    from utils.rollups import build_rollups, daily_up_rollup, merge_daily_rollups
+    from utils.summary import build_summary
+
+    cache_path = cache_path or DATA_CONFIG['cache_file']
+    chunk_size = chunk_size or DATA_CONFIG['stream_chunk_size']
+
+    # 各块的类别和取值范围不同，按原始类型写入，同时累积出整体的紧凑schema
+    # write_frame_chunks 在所有块写完后才生成元数据，此时 schema 已经完整
+    extra_meta = {}
+    # 可合并的部分结果：内存只与UP主数、(UP主, 日期) 数成正比，与行数无关
+    totals = {'up': None, 'daily': None, 'videos': 0, 'domains': set()}
 
-        plays = int(base_plays * np.random.uniform(0.5, 2.0))
-        coins = int(plays * np.random.uniform(0.01, 0.05))
-        likes = int(plays * np.random.uniform(0.02, 0.08))
-        danmu = int(plays * np.random.uniform(0.005, 0.02))
+    def cleaned_chunks():
+        for chunk in iter_raw_chunks(file_path, chunk_size):
+            chunk = _stable_chunk_dtypes(clean_dataframe(chunk))
+            extra_meta['schema'] = merge_schemas(extra_meta.get('schema'), infer_schema(chunk))
+            with span('clean.aggregate', rows=len(chunk)):
+                totals['up'] = merge_up_aggregates([totals['up'], partial_up_aggregates(chunk)])
+                totals['daily'] = merge_daily_rollups([totals['daily'], daily_up_rollup(chunk)])
+                totals['videos'] += int(chunk['video_count'].sum()) if 'video_count' in chunk.columns else len(chunk)
+                if 'domain' in chunk.columns:
+                    totals['domains'].update(chunk['domain'].dropna().unique())
+            yield chunk
 
-        data.append({
-            'up_name': up_name,
+    try:
+        with span('clean.stream') as record:
+            rows = write_frame_chunks(cleaned_chunks(), cache_path, file_path, extra_meta=extra_meta)
+            record['rows'] = rows
+        print(f"流式清洗完成: {rows} 行已写入 {cache_path}")
+
+        if rows:
+            # 领域、性别与全量清洗一样使用整体schema中的类别
+            up_aggregated = finish_up_aggregates(totals['up'])
+            if not up_aggregated.empty:
+                schema = extra_meta['schema']
+                categories = {col: spec for col, spec in schema['columns'].items() if col in ('domain', 'gender')}
+                up_aggregated = apply_schema(up_aggregated, dict(schema, columns=categories))
+                summary = build_summary(totals['videos'], len(up_aggregated), len(totals['domains']))
+                write_aggregated_data(up_aggregated, summary, cache_path, file_path)
+            with span('clean.rollup', rows=len(totals['daily'])):
+                rollups = build_rollups(totals['daily'])
+            write_rollup_data(rollups, cache_path, file_path)
+        return rows
+    except Exception as e:
+        print(f"流式清洗错误: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+# 增量清洗的附属文件：UP主部分聚合、每日UP主汇总（可相减、可合并）和墓碑（被移除的行）
+INCREMENTAL_STATES = ('upstate', 'daystate')
+
+
+def _raw_row_hashes(rows):
+    """按原始单元格内容计算行哈希，与分块方式和类型推断无关"""
+    frame = pd.DataFrame(rows, dtype=object).astype(str)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _occurrence_row_ids(hashes, seen_counts):
+    """
+    行哈希 + 该内容第几次出现 组成行标识，使完全重复的行也能一一对应
+    """
+    hash_series = pd.Series(hashes)
+    prior = seen_counts.reindex(hashes, fill_value=0).to_numpy()
+    occurrence = prior + hash_series.groupby(hash_series).cumcount().to_numpy()
+    seen_counts = seen_counts.add(hash_series.value_counts(), fill_value=0).astype('int64')
+
+    ids = pd.util.hash_pandas_object(pd.DataFrame({'hash': hashes, 'occurrence': occurrence}), index=False)
+    return ids.to_numpy(), seen_counts
+
+
+def _incremental_columns(meta):
+    """更新聚合状态需要的明细列"""
+    from utils.aggregation import AGGREGATION_INPUT_COLUMNS
+    from utils.rollups import ROLLUP_INPUT_COLUMNS
+
+    stored = meta.get('columns', [])
+    return [col for col in dict.fromkeys(AGGREGATION_INPUT_COLUMNS + ROLLUP_INPUT_COLUMNS) if col in stored]
+
+
+def _load_incremental_meta(file_path, cache_path):
+    """
+    上次增量清洗的缓存元数据；分段、状态文件缺失或不是同一次运行写入、源文件不同、
+    段数达到 incremental_max_segments 时返回None，触发全量重建
+    """
+    from utils.columnar_cache import read_meta, segment_paths, sidecar_path
+
+    meta = read_meta(cache_path)
+    info = (meta or {}).get('incremental')
+    if not info:
+        return None
+    if [source.get('path') for source in meta.get('sources', [])] != [os.path.abspath(file_path)]:
+        return None
+    if len(info['segments']) >= DATA_CONFIG['incremental_max_segments']:
+        return None
+    if not all(os.path.exists(path) for path in segment_paths(cache_path, meta)):
+        return None
+
+    names = INCREMENTAL_STATES + (('tombstones',) if info.get('tombstones') else ())
+    for name in names:
+        path = sidecar_path(cache_path, name)
+        if not os.path.exists(path) or (read_meta(path) or {}).get('incremental_build') != info['build']:
+            return None
+    return meta
+
+
+def _stored_row_index(paths, tombstones):
+    """已写入各段的行标识、排序键、段号和段内位置（去掉墓碑），只读取两个隐藏列"""
+    import pyarrow.parquet as pq
+    from utils.columnar_cache import ROW_COLUMNS, ROW_ID_COLUMN, ROW_ORDER_COLUMN
+
+    frames = []
+    for segment, path in enumerate(paths):
+        table = pq.read_table(path, columns=ROW_COLUMNS)
+        index = pd.DataFrame({
+            'row_id': table[ROW_ID_COLUMN].to_numpy(),
+            'order': table[ROW_ORDER_COLUMN].to_numpy(),
+            'segment': segment,
+            'position': np.arange(table.num_rows)
+        })
+        removed = tombstones.get(segment)
+        if removed is not None:
+            index = index.drop(index=removed)
+        frames.append(index)
+    return pd.concat(frames, ignore_index=True).set_index('row_id')
+
+
+def _fill_row_orders(orders):
+    """
+    新行（NaN）的排序键取前后两个已有行之间的值，使按排序键排列与原始行序一致
+    已有行的顺序变化或浮点精度用尽时返回None
+    """
+    known = ~np.isnan(orders)
+    if np.any(np.diff(orders[known]) <= 0):
+        return None
+    if known.all():
+        return orders
+
+    n = len(orders)
+    positions = np.arange(n)
+    prev = np.maximum.accumulate(np.where(known, positions, -1))
+    nxt = np.minimum.accumulate(np.where(known, positions, n)[::-1])[::-1]
+    low = orders[np.clip(prev, 0, None)]
+    high = orders[np.clip(nxt, None, n - 1)]
+    rank = positions - prev
+    run = nxt - prev - 1
+
+    has_prev = prev >= 0
+    has_next = nxt < n
+    # 前后都有已有行时等分区间，只有一侧时按步长1向外延伸，没有已有行时就是行号
+    filled = positions.astype('float64')
+    between = ~known & has_prev & has_next
+    filled[between] = low[between] + (high[between] - low[between]) * rank[between] / (run[between] + 1)
+    after = ~known & has_prev & ~has_next
+    filled[after] = low[after] + rank[after]
+    before = ~known & ~has_prev & has_next
+    filled[before] = high[before] - (run[before] + 1 - rank[before])
+    filled[known] = orders[known]
+    if np.any(np.diff(filled) <= 0):
+        return None
+    return filled
+
+
+def _summary_counts(df, sign=1):
+    """整体统计的可加部分：视频数和各领域行数（sign=-1 时用于减去被移除的行）"""
+    videos = int(df['video_count'].sum()) if 'video_count' in df.columns else len(df)
+    domains = df['domain'].astype(str).value_counts() if 'domain' in df.columns else pd.Series(dtype='int64')
+    return {'videos': sign * videos, 'domains': {name: sign * int(count) for name, count in domains.items()}}
+
+
+def _add_summary_counts(*counts):
+    domains = {}
+    for item in counts:
+        for name, count in item['domains'].items():
+            domains[name] = domains.get(name, 0) + count
+    return {'videos': sum(item['videos'] for item in counts),
+            'domains': {name: count for name, count in domains.items() if count > 0}}
+
+
+def _category_columns(up_aggregated, schema):
+    """领域、性别与全量清洗一样使用整体schema中的类别"""
+    categories = {col: spec for col, spec in schema['columns'].items() if col in ('domain', 'gender')}
+    return apply_schema(up_aggregated, dict(schema, columns=categories))
+
+
+def _write_incremental_outputs(file_path, cache_path, up_state, daily_state, counts, rollups, schema, info, rows):
+    """写入状态、UP主聚合表、时间汇总表，最后更新缓存元数据（元数据写入前中断时下次全量重建）"""
+    from utils.aggregation import finish_up_aggregates
+    from utils.columnar_cache import refresh_meta, sidecar_path, write_frame
+    from utils.summary import build_summary
+
+    build = {'incremental_build': info['build']}
+    write_frame(up_state.rename_axis('up_name').reset_index(), sidecar_path(cache_path, 'upstate'), file_path,
+                extra_meta=build)
+    write_frame(daily_state, sidecar_path(cache_path, 'daystate'), file_path, extra_meta=build)
+
+    up_aggregated = finish_up_aggregates(up_state)
+    if not up_aggregated.empty:
+        up_aggregated = _category_columns(up_aggregated, schema)
+        summary = build_summary(counts['videos'], len(up_aggregated), len(counts['domains']))
+        write_aggregated_data(up_aggregated, summary, cache_path, file_path)
+    write_rollup_data(rollups, cache_path, file_path, build=build)
+
+    refresh_meta(cache_path, file_path, rows, extra_meta={'schema': schema, 'incremental': dict(info, summary=counts)})
+
+
+def _rebuild_incremental(file_path, cache_path, chunk_size):
+    """
+    全量重建分段缓存：清洗全部原始行写成基础段（排序键为行号），删除旧的分段和墓碑，重建聚合状态
+    首次运行、状态失效、段数达到上限（合并分段）或行顺序变化时使用
+    """
+    import uuid
+    from utils.aggregation import partial_up_aggregates
+    from utils.columnar_cache import ROW_ID_COLUMN, ROW_ORDER_COLUMN, read_meta, segment_paths, sidecar_path, write_frame
+    from utils.rollups import build_rollups, daily_up_rollup
+
+    seen_counts = pd.Series(dtype='int64')
+    frames = []
+    ids = []
+    for header, rows in _iter_raw_row_chunks(file_path, chunk_size):
+        with span('clean.hash', rows=len(rows)):
+            chunk_ids, seen_counts = _occurrence_row_ids(_raw_row_hashes(rows), seen_counts)
+        with span('clean.transform', rows=len(rows)):
+            frames.append(clean_dataframe(_rows_to_frame(header, rows)))
+        ids.append(chunk_ids)
+    if not frames:
+        print("原始数据为空，无需清洗")
+        return 0
+
+    df, schema = compact_frame(pd.concat(frames, ignore_index=True))
+    orders = np.arange(len(df), dtype='float64')
+
+    # 旧的分段和墓碑不再使用
+    stale_paths = segment_paths(cache_path, read_meta(cache_path) or {})[1:] + [sidecar_path(cache_path, 'tombstones')]
+    # 状态写完之前 build 为None，中断时下次运行会再次全量重建
+    info = {'build': None, 'segments': [], 'tombstones': 0}
+    write_frame(df.assign(**{ROW_ID_COLUMN: np.concatenate(ids), ROW_ORDER_COLUMN: orders}), cache_path, file_path,
+                extra_meta={'schema': schema, 'incremental': info}, row_group_size=chunk_size)
+    for path in stale_paths:
+        for stale in (path, path + '.meta.json'):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+    with span('clean.aggregate', rows=len(df)):
+        up_state = partial_up_aggregates(df, orders)
+        daily_state = daily_up_rollup(df, orders)
+        rollups = build_rollups(daily_state)
+    info = dict(info, build=uuid.uuid4().hex)
+    _write_incremental_outputs(file_path, cache_path, up_state, daily_state, _summary_counts(df), rollups, schema,
+                               info, len(df))
+    print(f"增量缓存已全量重建: {len(df)} 行")
+    return len(df)
+
+
+def clean_bilibili_data_incremental(file_path, cache_path=None, chunk_size=None):
+    """
+    增量清洗：只清洗自上次运行以来新增或变化的行
+    列式缓存分段追加：新增/变化的行写成新的一段，被删除或修改的旧行记为墓碑（段号, 段内位置），已有的段不读也不重写；
+    UP主部分聚合和每日UP主汇总按变化的行相加、相减，只有被移除的行是某个UP主的最大值或第一行时才重读该UP主的行
+    原始工作簿无法只读一部分，仍需完整解析并哈希全部原始行来发现变化，并读取已有各段的行标识和排序键（每行16字节）
+    首次运行、段数达到 incremental_max_segments 或行顺序变化时全量重建一次
+    返回本次清洗的行数，失败时返回None
+    """
+    import uuid
+    import pyarrow as pa
+    from utils.aggregation import merge_up_aggregates, partial_up_aggregates, subtract_up_aggregates
+    from utils.columnar_cache import (ROW_ID_COLUMN, ROW_ORDER_COLUMN, is_cache_valid, read_meta, read_segment_rows,
+                                      read_segment_table, read_tombstones, segment_paths, sidecar_path, write_frame,
+                                      write_segment)
+    from utils.rollups import (build_rollups, daily_up_rollup, merge_daily_rollups, subtract_daily_rollups,
+                               update_rollups)
+
+    cache_path = cache_path or DATA_CONFIG['cache_file']
+    chunk_size = chunk_size or DATA_CONFIG['stream_chunk_size']
+
+    try:
+        meta = _load_incremental_meta(file_path, cache_path)
+        if meta is None:
+            return _rebuild_incremental(file_path, cache_path, chunk_size)
+        if is_cache_valid(cache_path):
+            print("原始数据未变化，无需清洗")
+            return 0
+
+        info = meta['incremental']
+        tombstones = read_tombstones(cache_path, meta)
+        stored = _stored_row_index(segment_paths(cache_path, meta), tombstones)
+        if not stored.index.is_unique:
+            return _rebuild_incremental(file_path, cache_path, chunk_size)
+
+        seen_counts = pd.Series(dtype='int64')
+        current_ids = []
+        current_orders = []
+        new_frames = []
+        new_positions = []
+        offset = 0
+        stored_orders = stored['order'].to_numpy()
+        # 原始文件仍需完整读一遍来计算哈希，但只有新增/变化的行会被清洗
+        for header, rows in _iter_raw_row_chunks(file_path, chunk_size):
+            with span('clean.hash', rows=len(rows)):
+                ids, seen_counts = _occurrence_row_ids(_raw_row_hashes(rows), seen_counts)
+            located = stored.index.get_indexer(ids)
+            current_ids.append(ids)
+            current_orders.append(np.where(located >= 0, stored_orders[located], np.nan))
+
+            is_new = located < 0
+            if is_new.any():
+                new_rows = [rows[i] for i in np.flatnonzero(is_new)]
+                with span('clean.transform', rows=len(new_rows)):
+                    new_frames.append(clean_dataframe(_rows_to_frame(header, new_rows)))
+                new_positions.append(offset + np.flatnonzero(is_new))
+            offset += len(rows)
+
+        current_ids = np.concatenate(current_ids) if current_ids else np.array([], dtype='uint64')
+        orders = _fill_row_orders(np.concatenate(current_orders) if current_orders else np.array([]))
+        if orders is None:
+            print("已有行的顺序发生变化，全量重建增量缓存")
+            return _rebuild_incremental(file_path, cache_path, chunk_size)
+        if len(current_ids) == 0:
+            print("原始数据为空，无需清洗")
+            return 0
+
+        removed = stored[~stored.index.isin(current_ids)]
+        info = dict(info, build=uuid.uuid4().hex, segments=list(info['segments']))
+        schema = meta.get('schema')
+        columns = _incremental_columns(meta)
+
+        # 新增/变化的行写成新的一段，已有的段保持不变
+        new_df = None
+        if new_frames:
+            new_positions = np.concatenate(new_positions)
+            new_df, schema = compact_frame(pd.concat(new_frames, ignore_index=True), schema)
+            new_df[ROW_ID_COLUMN] = current_ids[new_positions]
+            new_df[ROW_ORDER_COLUMN] = orders[new_positions]
+            segment_path = sidecar_path(cache_path, f'seg{len(info["segments"]) + 1}')
+            write_segment(new_df, segment_path, row_group_size=chunk_size)
+            info['segments'].append(os.path.basename(segment_path))
+
+        # 被移除的行记为墓碑，只读取它们所在的行组来更新聚合状态
+        paths = segment_paths(cache_path, {'incremental': info})
+        removed_rows = None
+        if not removed.empty:
+            for segment, group in removed.groupby('segment'):
+                positions = group['position'].to_numpy()
+                tombstones[segment] = np.union1d(tombstones.get(segment, []), positions).astype('int64')
+            tables = [read_segment_rows(paths[segment], group['position'].to_numpy(), columns + [ROW_ORDER_COLUMN])
+                      for segment, group in removed.groupby('segment')]
+            removed_rows = pa.concat_tables(tables, promote_options='permissive').sort_by(ROW_ORDER_COLUMN).to_pandas()
+        # 墓碑只与累计移除的行数有关，每次随本次的 build 一起重写
+        if tombstones:
+            tombstone_frame = pd.DataFrame({
+                'segment': np.concatenate([np.full(len(positions), segment) for segment, positions in tombstones.items()]),
+                'position': np.concatenate(list(tombstones.values()))
+            })
+            write_frame(tombstone_frame, sidecar_path(cache_path, 'tombstones'), file_path,
+                        extra_meta={'incremental_build': info['build']})
+            info['tombstones'] = len(tombstone_frame)
+
+        with span('clean.aggregate', rows=len(removed) + (0 if new_df is None else len(new_df))):
+            # 状态文件与本次运行前的分段属于同一次构建（已在 _load_incremental_meta 中检查）
+            up_state = pd.read_parquet(sidecar_path(cache_path, 'upstate')).set_index('up_name')
+            daily_state = pd.read_parquet(sidecar_path(cache_path, 'daystate'))
+
+            removed_up = removed_daily = None
+            if removed_rows is not None:
+                removed_order = removed_rows[ROW_ORDER_COLUMN].to_numpy()
+                removed_up = partial_up_aggregates(removed_rows, removed_order)
+                removed_daily = daily_up_rollup(removed_rows, removed_order)
+            up_state, stale_ups = subtract_up_aggregates(up_state, removed_up)
+            daily_state, stale_days = subtract_daily_rollups(daily_state, removed_daily)
+
+            up_parts = [up_state]
+            daily_parts = [daily_state]
+            rescan_ups = stale_ups.union(pd.Index(stale_days.get_level_values('up_name').unique()))
+            if new_df is not None:
+                fresh = new_df[~new_df['up_name'].isin(stale_ups)]
+                up_parts.append(partial_up_aggregates(fresh, fresh[ROW_ORDER_COLUMN].to_numpy()))
+                fresh = new_df[~_day_keys(new_df).isin(stale_days)]
+                daily_parts.append(daily_up_rollup(fresh, fresh[ROW_ORDER_COLUMN].to_numpy()))
+
+            # 无法相减的UP主 / (UP主, 日期)：从所有段中重读这些UP主的行（少见）
+            if len(rescan_ups):
+                with span('clean.rescan', rows=len(rescan_ups)):
+                    rescan = read_segment_table(paths, tombstones, columns,
+                                                filters=[('up_name', 'in', list(rescan_ups))]).to_pandas()
+                rows_up = rescan[rescan['up_name'].isin(stale_ups)]
+                up_parts.append(partial_up_aggregates(rows_up, rows_up[ROW_ORDER_COLUMN].to_numpy()))
+                rows_day = rescan[_day_keys(rescan).isin(stale_days)]
+                daily_parts.append(daily_up_rollup(rows_day, rows_day[ROW_ORDER_COLUMN].to_numpy()))
+
+            up_state = merge_up_aggregates(up_parts)
+            daily_state = merge_daily_rollups(daily_parts)
+
+            changed_dates = [frame['date'] for frame in (new_df, removed_rows)
+                             if frame is not None and 'date' in frame.columns]
+            rollup_path = sidecar_path(cache_path, 'rollup')
+            if (read_meta(rollup_path) or {}).get('incremental_build') == meta['incremental']['build']:
+                rollups = update_rollups(pd.read_parquet(rollup_path), daily_state,
+                                         pd.concat(changed_dates, ignore_index=True))
+            else:
+                rollups = build_rollups(daily_state)
+
+        counts = _add_summary_counts(info['summary'], *[_summary_counts(frame, sign) for frame, sign
+                                                        in ((removed_rows, -1), (new_df, 1)) if frame is not None])
+        _write_incremental_outputs(file_path, cache_path, up_state, daily_state, counts, rollups, schema, info,
+                                   len(current_ids))
+
+        cleaned_rows = 0 if new_df is None else len(new_df)
+        print(f"增量清洗完成: 清洗 {cleaned_rows} 行，移除 {len(removed)} 行，共 {len(current_ids)} 行")
+        return cleaned_rows
+    except Exception as e:
+        print(f"增量清洗错误: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def _day_keys(df):
+    """明细行的 (UP主, 日期) 键，与每日汇总的键对应"""
+    if 'date' not in df.columns:
+        return pd.MultiIndex.from_arrays([df['up_name'], pd.Series(pd.NaT, index=df.index)])
+    return pd.MultiIndex.from_arrays([df['up_name'], df['date'].dt.normalize()])
+
+
+SOURCE_EXTENSIONS = ('.xlsx', '.csv')
+
+
+def discover_sources(pattern):
+    """
+    把目录或通配符展开为排好序的源文件列表（.xlsx / .csv），忽略Excel的临时锁文件
+    """
+    import glob
+
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        paths = glob.glob(pattern)
+    return sorted(path for path in paths
+                  if path.lower().endswith(SOURCE_EXTENSIONS)
+                  and not os.path.basename(path).startswith('~$')
+                  and os.path.isfile(path))
+
+
+def _source_units(path):
+    """一个源文件拆成若干清洗单元：工作簿的每个工作表，或整个CSV"""
+    if path.lower().endswith('.csv'):
+        return [(path, None)]
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return [(path, name) for name in workbook.sheetnames]
+    finally:
+        workbook.close()
+
+
+def _read_csv(path):
+    """CSV可能是UTF-8（含BOM）或GBK导出"""
+    try:
+        return pd.read_csv(path, encoding='utf-8-sig', low_memory=False)
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding='gb18030', low_memory=False)
+
+
+def _clean_source_unit(unit):
+    """工作进程中执行：读取一个工作表/CSV并清洗"""
+    path, sheet_name = unit
+    df = _read_csv(path) if sheet_name is None else pd.read_excel(path, sheet_name=sheet_name)
+    if df.empty:
+        return None
+    return clean_dataframe(df)
+
+
+def clean_bilibili_data_multi(sources, cache_path=None, workers=None):
+    """
+    多源清洗：sources 为目录、通配符或文件列表
+    每个工作表/CSV在独立的工作进程中读取和清洗，结果按文件名和工作表顺序拼接后写入列式缓存
+    返回清洗后的数据框，失败时返回None
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from utils.columnar_cache import write_frame
+
+    cache_path = cache_path or DATA_CONFIG['cache_file']
+    paths = discover_sources(sources) if isinstance(sources, str) else sorted(sources)
+    if not paths:
+        print(f"没有找到源文件: {sources}")
+        return None
+
+    try:
+        units = [unit for path in paths for unit in _source_units(path)]
+        workers = workers or DATA_CONFIG.get('ingest_workers') or os.cpu_count() or 1
+        workers = min(workers, len(units))
+
+        with span('clean.multi') as record:
+            if workers <= 1:
+                frames = [_clean_source_unit(unit) for unit in units]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    frames = list(executor.map(_clean_source_unit, units))
+            frames = [frame for frame in frames if frame is not None]
+            if not frames:
+                print("源文件中没有数据")
+                return None
+            df = pd.concat(frames, ignore_index=True)
+            record['rows'] = len(df)
+
+        # 各工作表的类别不同，拼接后统一应用schema
+        with span('clean.compact', rows=len(df)) as record:
+            record['bytes_before'] = memory_footprint(df)
+            df, schema = compact_frame(df)
+            record['bytes_after'] = memory_footprint(df)
+        print(f"多源清洗完成: {len(paths)} 个文件、{len(units)} 个工作表，共 {len(df)} 行（{workers} 个进程）")
+
+        if write_frame(df, cache_path, paths, extra_meta={'schema': schema}):
+            print(f"列式缓存已写入: {cache_path}")
+            save_aggregated_data(df, cache_path, paths)
+            save_rollup_data(df, cache_path, paths)
+        return df
+    except Exception as e:
+        print(f"多源清洗错误: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+SYNTHETIC_DOMAINS = ['生活', '游戏', '知识', '动画', '娱乐', '音乐', '影视', '时尚', '汽车', '舞蹈', '美食',
+                     '动物圈', '科技', '运动', '鬼畜', '国创', '数码', '番剧', '纪录片', '资讯', '电影', '电视剧']
+SYNTHETIC_GENDERS = ['男', '女', '保密']
+SYNTHETIC_RANK_TYPES = ['日榜', '周榜', '月榜']
+
+
+def _synthetic_domains(n_domains):
+    """取真实的领域名，超出时补充编号领域"""
+    extra = [f'领域_{i}' for i in range(len(SYNTHETIC_DOMAINS) + 1, n_domains + 1)]
+    return (SYNTHETIC_DOMAINS + extra)[:n_domains]
+
+
+def _synthetic_uploaders(n_ups, domains, play_alpha, seed):
+    """
+    生成UP主的固定属性：领域、性别、mid、等级、投稿数，以及服从幂律分布的人气
+    同一个UP主在所有块中属性一致
+    """
+    rng = np.random.default_rng([seed, 0])
+    ids = np.arange(n_ups)
+    names = np.char.add('UP主_', (ids + 1).astype(str))
+    domain_codes = rng.integers(0, len(domains), n_ups)
+    # 人气（单条视频播放数的基准）服从帕累托分布，少数头部UP主占据大部分播放
+    popularity = 1000 * (1 + rng.pareto(play_alpha, n_ups))
+    # 活跃度：头部UP主上榜次数更多
+    activity = 1 / (1 + rng.permutation(n_ups)) ** 0.8
+    return {
+        'names': names,
+        'mid': rng.choice(2_000_000_000, n_ups, replace=False).astype(np.int64) + 1,
+        'domain_codes': domain_codes,
+        'gender_codes': rng.choice(len(SYNTHETIC_GENDERS), n_ups, p=[0.42, 0.2, 0.38]),
+        'level': rng.choice(np.arange(7, dtype='float64'), n_ups, p=[0.01, 0.01, 0.01, 0.02, 0.03, 0.07, 0.85]),
+        'video_count': np.minimum(1 + rng.pareto(1.1, n_ups) * 20, 20000).astype(np.int64),
+        'popularity': popularity,
+        'activity_cdf': np.cumsum(activity) / activity.sum()
+    }
+
+
+def iter_synthetic_chunks(n_rows, n_ups=5000, n_domains=22, start_date='2022-01-01', days=90,
+                          play_alpha=1.2, chunk_size=None, seed=42):
+    """
+    按块生成与清洗后数据结构一致的合成数据（全部向量化，每块一次性生成）
+    - n_ups 个UP主，各自固定领域/性别/mid，按幂律人气和活跃度分配上榜记录
+    - 日期均匀分布在 [start_date, start_date + days)
+    - 播放数为UP主人气乘以对数正态噪声，投币/点赞/弹幕/涨粉按播放数比例生成
+    """
+    chunk_size = chunk_size or DATA_CONFIG['stream_chunk_size']
+    domains = _synthetic_domains(n_domains)
+    uploaders = _synthetic_uploaders(n_ups, domains, play_alpha, seed)
+    domain_names = np.array(domains, dtype=object)
+    start = np.datetime64(pd.Timestamp(start_date).date(), 'D')
+
+    for chunk_no, offset in enumerate(range(0, n_rows, chunk_size), start=1):
+        size = min(chunk_size, n_rows - offset)
+        rng = np.random.default_rng([seed, chunk_no])
+
+        up = np.minimum(np.searchsorted(uploaders['activity_cdf'], rng.random(size)), n_ups - 1)
+        plays = (uploaders['popularity'][up] * rng.lognormal(0, 1, size)).astype(np.int64)
+        domain = domain_names[uploaders['domain_codes'][up]]
+        mid = uploaders['mid'][up]
+
+        chunk = pd.DataFrame({
+            'rank_type': np.array(SYNTHETIC_RANK_TYPES, dtype=object)[rng.choice(3, size, p=[0.5, 0.25, 0.25])],
             'domain': domain,
-            'video_title': video_title,
+            'date': start + rng.integers(0, days, size).astype('timedelta64[D]'),
+            'coins': (plays * rng.uniform(0.01, 0.05, size)).astype(np.int64),
+            'avatar': np.char.add(np.char.add('http://i0.hdslb.com/bfs/face/', mid.astype(str)), '.jpg'),
+            'fans_growth': (plays * rng.uniform(-0.002, 0.02, size)).astype(np.int64),
+            'level': uploaders['level'][up],
+            'likes': (plays * rng.uniform(0.02, 0.08, size)).astype(np.int64),
+            'mid': mid,
+            'up_name': uploaders['names'][up],
+            'up_tag': np.char.add(domain.astype(str), '区UP主'),
+            'video_count': uploaders['video_count'][up],
             'plays': plays,
-            'coins': coins,
-            'likes': likes,
-            'danmu': danmu,
-            'gender': gender
+            'rank': rng.integers(1, 51, size),
+            'gender': np.array(SYNTHETIC_GENDERS, dtype=object)[uploaders['gender_codes'][up]],
+            'type': domain,
+            'danmu': (plays * rng.uniform(0.005, 0.02, size)).astype(np.int64),
+            'video_title': np.char.add('视频_', np.arange(offset + 1, offset + size + 1).astype(str))
         })
+        chunk['date'] = chunk['date'].astype('datetime64[us]')
+        for col in TEXT_COLUMNS + ['avatar']:
+            chunk[col] = chunk[col].astype(str)
+        yield chunk
 
-    df = pd.DataFrame(data)
+
+def generate_synthetic_data(n_rows, **kwargs):
+    """生成合成数据并拼接为一个数据框，参数见 iter_synthetic_chunks"""
+    return pd.concat(iter_synthetic_chunks(n_rows, **kwargs), ignore_index=True)
+
+
+def to_raw_frame(df):
+    """
+    把清洗后结构的数据还原为原始工作簿格式（中文列名，一万以上的计数写成 x.xxw），用于测试清洗流程
+    """
+    raw = df.drop(columns=['video_title'], errors='ignore').copy()
+    for col in INTEGER_COLUMNS:
+        if col in raw.columns and col not in ('rank', 'video_count'):
+            values = raw[col].to_numpy()
+            as_wan = np.char.add(np.round(values / 10000, 2).astype(str), 'w')
+            raw[col] = np.where(np.abs(values) >= 10000, as_wan, values.astype(str)).astype(object)
+    return raw.rename(columns={english: chinese for chinese, english in COLUMN_MAPPING.items()})
+
+
+def write_synthetic_data(path, n_rows, **kwargs):
+    """
+    逐块生成并写入磁盘，内存占用只与块大小有关
+    - .csv：原始工作簿格式，可以用 --sources 走完整的清洗流程
+    - .parquet：清洗后的结构，直接用于基准测试
+    返回写入的行数
+    """
+    from utils.columnar_cache import write_frame_chunks
+
+    chunks = iter_synthetic_chunks(n_rows, **kwargs)
+    if path.lower().endswith('.csv'):
+        rows = 0
+        for i, chunk in enumerate(chunks):
+            to_raw_frame(chunk).to_csv(path, mode='w' if i == 0 else 'a', header=i == 0,
+                                        index=False, encoding='utf-8')
+            rows += len(chunk)
+    else:
+        params = {key: value for key, value in kwargs.items() if key != 'chunk_size'}
+        rows = write_frame_chunks(chunks, path, [], extra_meta={'synthetic': dict(params, n_rows=n_rows)})
+    print(f"合成数据已写入: {path} ({rows} 行)")
+    return rows
+
+
+def create_sample_data():
+    """
+    创建示例数据用于测试
+    """
+    # 50个UP主、8个领域、1000行
+    df = generate_synthetic_data(1000, n_ups=50, n_domains=8)
     print("示例数据创建完成!")
     print(f"示例数据形状: {df.shape}")
 
@@ -172,16 +949,93 @@ def create_sample_data():
 
 def save_cleaned_data(df, file_path='cleaned_bilibili_data.xlsx'):
     """
-    保存清洗后的数据
+    保存清洗后的数据，同时写入列式缓存（Parquet）供加载器快速读取
     """
     try:
         df.to_excel(file_path, index=False)
         print(f"数据已保存到: {file_path}")
-        return True
     except Exception as e:
         print(f"保存数据失败: {e}")
         return False
 
+    try:
+        from utils.columnar_cache import default_cache_path, write_frame
+        cache_path = default_cache_path(file_path)
+        df, schema = compact_frame(df)
+        if write_frame(df, cache_path, file_path, extra_meta={'schema': schema}):
+            print(f"列式缓存已写入: {cache_path}")
+            save_aggregated_data(df, cache_path, file_path)
+            save_rollup_data(df, cache_path, file_path)
+        else:
+            print("未安装pyarrow，跳过列式缓存")
+    except Exception as e:
+        print(f"写入列式缓存失败: {e}")
+
+    return True
+
+
+def save_aggregated_data(df, cache_path, source_paths):
+    """
+    清洗时物化未筛选的UP主聚合表（含综合得分），与列式缓存放在一起
+    """
+    from utils.aggregation import get_up_aggregated_data
+    from utils.summary import summarize_dataset
+
+    try:
+        up_aggregated = get_up_aggregated_data(df)
+        if up_aggregated.empty:
+            return False
+        return write_aggregated_data(up_aggregated, summarize_dataset(df, up_aggregated), cache_path, source_paths)
+    except Exception as e:
+        print(f"写入UP主聚合表失败: {e}")
+    return False
+
+
+def write_aggregated_data(up_aggregated, summary, cache_path, source_paths):
+    """写入UP主聚合表；记录打分权重，权重变化后加载时只需重新打分；首页统计直接读取元数据中的 summary"""
+    from utils.columnar_cache import sidecar_path, write_frame
+
+    try:
+        aggregate_path = sidecar_path(cache_path, 'agg')
+        extra_meta = {'score_weights': WEIGHTS, 'summary': summary}
+        if write_frame(up_aggregated, aggregate_path, source_paths, extra_meta=extra_meta):
+            print(f"UP主聚合表已写入: {aggregate_path}")
+            return True
+    except Exception as e:
+        print(f"写入UP主聚合表失败: {e}")
+    return False
+
+
+def save_rollup_data(df, cache_path, source_paths):
+    """
+    清洗时物化按日/周/月、按UP主和领域的时间汇总表，与列式缓存放在一起
+    """
+    from utils.rollups import build_rollups, daily_up_rollup
+
+    try:
+        with span('clean.rollup', rows=len(df)):
+            rollups = build_rollups(daily_up_rollup(df))
+        return write_rollup_data(rollups, cache_path, source_paths)
+    except Exception as e:
+        print(f"写入时间汇总表失败: {e}")
+    return False
+
+
+def write_rollup_data(rollups, cache_path, source_paths, build=None):
+    """写入时间汇总表；增量清洗时在元数据中记录本次的 incremental_build"""
+    from utils.columnar_cache import sidecar_path, write_frame
+
+    if rollups.empty:
+        return False
+    try:
+        rollup_path = sidecar_path(cache_path, 'rollup')
+        if write_frame(rollups, rollup_path, source_paths, extra_meta=build):
+            print(f"时间汇总表已写入: {rollup_path}（{len(rollups)} 行）")
+            return True
+    except Exception as e:
+        print(f"写入时间汇总表失败: {e}")
+    return False
+
 
 def test_data_loading():
     """测试数据加载和清洗"""
@@ -215,5 +1069,37 @@ def test_data_loading():
 
 
 if __name__ == "__main__":
-    # 直接运行这个文件时进行数据清洗测试
-    test_data_loading()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='B站数据清洗')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式清洗原始工作簿，结果直接写入列式缓存')
+    parser.add_argument('--incremental', action='store_true',
+                        help='只清洗上次运行之后新增或变化的行')
+    parser.add_argument('--sources', metavar='PATH_OR_GLOB',
+                        help='多源清洗：目录或通配符下的所有 .xlsx/.csv（每个工作表并行清洗）')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='多源清洗的进程数，默认使用全部CPU核')
+    parser.add_argument('--generate', type=int, metavar='ROWS',
+                        help='生成合成数据并写入 --output（.csv 为原始格式，.parquet 为清洗后结构）')
+    parser.add_argument('--output', default='synthetic_bilibili_data.csv')
+    parser.add_argument('--ups', type=int, default=5000, help='合成数据的UP主数量')
+    parser.add_argument('--domains', type=int, default=22, help='合成数据的领域数量')
+    parser.add_argument('--days', type=int, default=90, help='合成数据的日期跨度（天）')
+    args = parser.parse_args()
+
+    from utils.perf import end_run, format_run, start_run
+
+    start_run('data_cleaner')
+    if args.generate:
+        write_synthetic_data(args.output, args.generate, n_ups=args.ups, n_domains=args.domains, days=args.days)
+    elif args.sources:
+        clean_bilibili_data_multi(args.sources, workers=args.workers)
+    elif args.incremental:
+        clean_bilibili_data_incremental(DATA_CONFIG['original_file'])
+    elif args.stream:
+        clean_bilibili_data_streaming(DATA_CONFIG['original_file'])
+    else:
+        # 直接运行这个文件时进行数据清洗测试
+        test_data_loading()
+    print(format_run(end_run()))
\ No newline at end of file
@@ -1,6 +1,7 @@
 import streamlit as st
 from config import APP_CONFIG
-from PIL import Image
+from utils.perf import render_perf_panel, span, start_run
+from utils.summary import read_summary
 import os
 
 
@@ -23,8 +24,7 @@ def main():
             try:
                 # 加载并显示第一个Logo - 路径更新到assets文件夹
                 if os.path.exists("assets/WUT-Logo.png"):
-                    wut_logo = Image.open("assets/WUT-Logo.png")
-                    st.image(wut_logo, use_container_width=True, caption="WUT")
+                    st.image("assets/WUT-Logo.png", use_container_width=True, caption="WUT")
                 else:
                     st.error("assets/WUT-Logo.png not found")
             except Exception as e:
@@ -34,8 +34,7 @@ def main():
             try:
                 # 加载并显示第二个Logo - 路径更新到assets文件夹
                 if os.path.exists("assets/efrei.png"):
-                    efrei_logo = Image.open("assets/efrei.png")
-                    st.image(efrei_logo, use_container_width=True, caption="EFREI")
+                    st.image("assets/efrei.png", use_container_width=True, caption="EFREI")
                 else:
                     st.error("assets/efrei.png not found")
             except Exception as e:
@@ -54,6 +53,7 @@ def main():
     📊 **data overview** - View data summary and basic distribution
     📈 **in-depths_analysis** - Deeply explore data relationships and trends  
     🤝 **uploaders_recommand** - Intelligent Recommendation Based on Multi-Dimensional Ratings
+    📉 **Trends** - Daily, weekly and monthly trends per creative field and UP owner
 
     **Data Description:**
     - Each row of data represents a single video or multiple videos from a content creator.
@@ -73,34 +73,29 @@ def main():
     """)
 
     # 添加一些整体统计信息
+    # 读取清洗时预计算的统计（只读JSON），没有时才加载完整数据
     try:
-        from utils.data_loader import load_data, get_up_aggregated_data
-        df = load_data()
-        if not df.empty:
-            up_aggregated = get_up_aggregated_data(df)
+        with span('summary'):
+            summary = read_summary()
+            if summary is None:
+                from utils.data_loader import load_summary
+                summary = load_summary()
+        if summary['total_up'] > 0:
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                # 正确计算总视频数：使用video_count列的总和
-                if 'video_count' in df.columns:
-                    total_videos = df['video_count'].sum()  # 直接从原始数据计算
-                else:
-                    total_videos = len(df)  # 如果没有video_count列，回退到行数
-                st.metric("Total number of videos", total_videos)
+                # 总视频数为 video_count 列的总和
+                st.metric("Total number of videos", summary['total_videos'])
             with col2:
-                st.metric("Total number of UP owners", len(up_aggregated))
+                st.metric("Total number of UP owners", summary['total_up'])
             with col3:
-                st.metric("Coverage area", df['domain'].nunique() if 'domain' in df.columns else 0)
+                st.metric("Coverage area", summary['domains'])
             with col4:
-                # 使用正确的总视频数计算人均视频数
-                if 'video_count' in df.columns:
-                    total_videos = df['video_count'].sum()
-                else:
-                    total_videos = len(df)
-                avg_videos = total_videos / len(up_aggregated) if len(up_aggregated) > 0 else 0
-                st.metric("Average number of videos per person", f"{avg_videos:.1f}")
+                st.metric("Average number of videos per person", f"{summary['avg_videos_per_up']:.1f}")
     except Exception as e:
         st.info("Please prepare the data first to view the statistics.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    start_run('home')
+    main()
+    render_perf_panel()
\ No newline at end of file
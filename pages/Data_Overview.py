@@ -6,7 +6,12 @@ import os
 # 添加utils目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.data_loader import load_data, get_filtered_data, get_up_aggregated_data
+from utils.data_loader import (load_data, get_filtered_data, get_leaderboard, get_up_aggregated_view,
+                               get_aggregation_cache_stats, get_filter_cache_stats, sidebar_date_range)
+from utils.figure_cache import get_figure_cache_stats
+from utils.leaderboard import leaderboard_top
+from utils.perf import render_perf_panel, span, start_run
+from utils.report import overview_metrics
 from utils.charts import create_pie_chart, create_bar_chart, create_pie_chart_from_series
 
 
@@ -19,7 +24,9 @@ def main():
     st.title("📊 Data Overview")
 
     # 加载数据
-    df = load_data()
+    with span('load') as record:
+        df = load_data()
+        record['rows'] = len(df)
 
     if df.empty:
         st.error("Data loading failed, please check the data file")
@@ -56,43 +63,36 @@ def main():
         min_plays, max_plays = 0, 1000000
         st.sidebar.warning("Playback sequence does not exist")
 
+    # 日期区间筛选（含两端），默认覆盖全部日期时不生效
+    start_date, end_date = sidebar_date_range(df)
+
     # 应用筛选
     filters = {
         'domains': selected_domains,
         'genders': selected_gender,
         'min_plays': min_plays,
-        'max_plays': max_plays
+        'max_plays': max_plays,
+        'start_date': start_date,
+        'end_date': end_date
     }
 
     filtered_df = get_filtered_data(df, filters)
 
     # 获取UP主聚合数据
-    up_aggregated = get_up_aggregated_data(filtered_df)
+    up_aggregated = get_up_aggregated_view(df, filters)
 
-    # 关键指标
-    # 关键指标
-    # 关键指标
+    # 关键指标（与离线报告使用同一套计算）
+    metrics = overview_metrics(filtered_df, up_aggregated)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        # 正确计算视频数量：使用video_count列的总和
-        if 'video_count' in filtered_df.columns:
-            total_videos = filtered_df['video_count'].sum()  # 直接从筛选后的数据计算
-        else:
-            total_videos = len(filtered_df)  # 如果没有video_count列，回退到行数
-        st.metric("Number of videos", total_videos)
+        # 视频数量为 video_count 列的总和
+        st.metric("Number of videos", metrics['total_videos'])
     with col2:
-        st.metric("Number of UP owners", len(up_aggregated))
+        st.metric("Number of UP owners", metrics['total_up'])
     with col3:
-        avg_plays_per_video = filtered_df['plays'].mean() if 'plays' in filtered_df.columns else 0
-        st.metric("Average Views per Video", f"{avg_plays_per_video:.0f}")
+        st.metric("Average Views per Video", f"{metrics['avg_plays_per_video']:.0f}")
     with col4:
-        # 使用正确的总视频数计算平均视频数
-        if 'video_count' in filtered_df.columns:
-            total_videos = filtered_df['video_count'].sum()
-        else:
-            total_videos = len(filtered_df)
-        avg_videos_per_up = total_videos / len(up_aggregated) if len(up_aggregated) > 0 else 0
-        st.metric("Average number of videos per UP owner", f"{avg_videos_per_up:.1f}")
+        st.metric("Average number of videos per UP owner", f"{metrics['avg_videos_per_up']:.1f}")
 
     # 领域分布图表
     # 领域分布图表
@@ -103,10 +103,12 @@ def main():
             # 修正：根据是否有video_count列来正确统计视频数量
             if 'video_count' in filtered_df.columns:
                 # 如果有video_count列，按领域分组求和
-                domain_video_count = filtered_df.groupby('domain')['video_count'].sum()
+                domain_video_count = filtered_df.groupby('domain', observed=True)['video_count'].sum()
             else:
                 # 如果没有video_count列，使用value_counts统计行数
                 domain_video_count = filtered_df['domain'].value_counts()
+                # domain 是category列，去掉筛选后计数为0的类别
+                domain_video_count = domain_video_count[domain_video_count > 0]
 
             if not domain_video_count.empty:
                 fig_pie = create_pie_chart_from_series(
@@ -120,6 +122,7 @@ def main():
         with col2:
             if not up_aggregated.empty and 'domain' in up_aggregated.columns:
                 up_count_by_domain = up_aggregated['domain'].value_counts()
+                up_count_by_domain = up_count_by_domain[up_count_by_domain > 0]
                 if not up_count_by_domain.empty:
                     fig_bar = create_bar_chart(
                         up_count_by_domain.reset_index(),
@@ -140,7 +143,8 @@ def main():
                            ['up_name', 'domain', 'video_count', 'total_plays', 'avg_plays', 'comprehensive_score']
                            if col in up_aggregated.columns]
         if display_columns:
-            top_up = up_aggregated.nlargest(20, 'total_plays')
+            # 使用预先排好序的排名索引，不再每次 nlargest
+            top_up = leaderboard_top(get_leaderboard(df, filters), 'total_plays', 20)
             st.dataframe(top_up[display_columns], use_container_width=True)
         else:
             st.warning("No columns to display")
@@ -158,4 +162,7 @@ def main():
 
 
 if __name__ == "__main__":
+    start_run('Data_Overview')
     main()
+    render_perf_panel({'filter': get_filter_cache_stats(), 'aggregation': get_aggregation_cache_stats(),
+                       'figures': get_figure_cache_stats()})
@@ -6,7 +6,14 @@ import os
 # 添加utils目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.data_loader import load_data, get_filtered_data, get_up_aggregated_data
+from utils.data_loader import (load_data, get_filtered_data, get_leaderboard, get_top_rows, get_up_aggregated_view,
+                               get_aggregation_cache_stats, get_domain_comparison, get_filter_cache_stats,
+                               sidebar_date_range)
+from utils.figure_cache import get_figure_cache_stats
+from utils.leaderboard import leaderboard_top
+from utils.perf import render_perf_panel, span, start_run
+from utils.report import overview_metrics, video_statistics
+from config import CHART_CONFIG
 from utils.charts import create_scatter_plot, create_bar_chart
 
 
@@ -18,7 +25,9 @@ def main():
 
     st.title("📈 Deep Data Analysis")
 
-    df = load_data()
+    with span('load') as record:
+        df = load_data()
+        record['rows'] = len(df)
     if df.empty:
         st.error("Data loading failed")
         return
@@ -54,38 +63,33 @@ def main():
         min_plays, max_plays = 0, 1000000
         st.sidebar.warning("Playback sequence does not exist")
 
+    # 日期区间筛选（含两端），默认覆盖全部日期时不生效
+    start_date, end_date = sidebar_date_range(df)
+
     # 应用筛选 - 与数据概览页面保持一致
     filters = {
         'domains': selected_domains,
         'genders': selected_gender,
         'min_plays': min_plays,
-        'max_plays': max_plays
+        'max_plays': max_plays,
+        'start_date': start_date,
+        'end_date': end_date
     }
 
     filtered_df = get_filtered_data(df, filters)
-    up_aggregated = get_up_aggregated_data(filtered_df)
+    up_aggregated = get_up_aggregated_view(df, filters)
 
     # 关键指标 - 与数据概览页面保持一致
+    metrics = overview_metrics(filtered_df, up_aggregated)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        # 正确计算视频数量：使用video_count列的总和
-        if 'video_count' in filtered_df.columns:
-            total_videos = filtered_df['video_count'].sum()
-        else:
-            total_videos = len(filtered_df)
-        st.metric("Number of videos", total_videos)
+        st.metric("Number of videos", metrics['total_videos'])
     with col2:
-        st.metric("Number of UP owners", len(up_aggregated))
+        st.metric("Number of UP owners", metrics['total_up'])
     with col3:
-        avg_plays_per_video = filtered_df['plays'].mean() if 'plays' in filtered_df.columns else 0
-        st.metric("Average Views per Video", f"{avg_plays_per_video:.0f}")
+        st.metric("Average Views per Video", f"{metrics['avg_plays_per_video']:.0f}")
     with col4:
-        if 'video_count' in filtered_df.columns:
-            total_videos = filtered_df['video_count'].sum()
-        else:
-            total_videos = len(filtered_df)
-        avg_videos_per_up = total_videos / len(up_aggregated) if len(up_aggregated) > 0 else 0
-        st.metric("Average number of videos per UP owner", f"{avg_videos_per_up:.1f}")
+        st.metric("Average number of videos per UP owner", f"{metrics['avg_videos_per_up']:.1f}")
 
     tab1, tab2, tab3 = st.tabs(["Video creator analysis", "Video Analysis", "Domain Comparison"])
 
@@ -97,13 +101,25 @@ def main():
             # 确保有视频数量列用于散点图大小
             size_col = 'video_count' if 'video_count' in up_aggregated.columns else None
 
+            # 点数超过密度阈值时显示分箱热力图，可以框定区域下钻查看单个UP主
+            x_range = y_range = None
+            if len(up_aggregated) > CHART_CONFIG['scatter_density_threshold']:
+                with st.expander("Drill down into a region"):
+                    x_min, x_max = float(up_aggregated['total_plays'].min()), float(up_aggregated['total_plays'].max())
+                    y_min = float(up_aggregated['comprehensive_score'].min())
+                    y_max = float(up_aggregated['comprehensive_score'].max())
+                    x_range = st.slider("Total plays range", x_min, x_max, (x_min, x_max))
+                    y_range = st.slider("Overall score range", y_min, y_max, (y_min, y_max))
+
             fig_scatter = create_scatter_plot(
                 up_aggregated,
                 'total_plays',
                 'comprehensive_score',
                 'domain',
                 size_col,
-                "Relationship Between a Uploader's Total Views and Overall Score"
+                "Relationship Between a Uploader's Total Views and Overall Score",
+                x_range=x_range,
+                y_range=y_range
             )
             st.plotly_chart(fig_scatter, use_container_width=True)
 
@@ -115,7 +131,7 @@ def main():
             if 'total_plays' in up_aggregated.columns:
                 display_cols.append('total_plays')
 
-            top_up = up_aggregated.nlargest(10, 'comprehensive_score')[display_cols]
+            top_up = leaderboard_top(get_leaderboard(df, filters), 'comprehensive_score', 10)[display_cols]
             st.dataframe(top_up, use_container_width=True)
 
         else:
@@ -126,7 +142,7 @@ def main():
 
         if all(col in filtered_df.columns for col in ['plays', 'coins', 'likes']):
             # 播放数TOP 5视频 - 使用与数据概览一致的计数方式
-            top_videos = filtered_df.nlargest(5, 'plays')
+            top_videos = get_top_rows(df, filters, 5, 'plays')
 
             # 确保获取到足够的视频数据
             if len(top_videos) >= 5:
@@ -142,46 +158,33 @@ def main():
                     display_data,
                     'plays',
                     'video_title',
-                    "Top 5 Videos by Views"
+                    "Top 5 Videos by Views",
+                    # 调整图表高度以确保所有项目显示（图表会被缓存，不要原地修改）
+                    height=400
                 )
-                # 调整图表高度以确保所有项目显示
-                fig_plays.update_layout(height=400)
             else:
                 display_data = top_videos[['up_name', 'plays']].head(display_count)
                 fig_plays = create_bar_chart(
                     display_data,
                     'plays',
                     'up_name',
-                    "播放数TOP 5视频"
+                    "播放数TOP 5视频",
+                    height=400
                 )
-                fig_plays.update_layout(height=400)
 
             st.plotly_chart(fig_plays, use_container_width=True)
 
-            # 视频数据统计 - 与数据概览页面计数方式一致
+            # 视频数据统计 - count 与数据概览一致，为 video_count 之和
+            statistics = video_statistics(filtered_df)
             col1, col2 = st.columns(2)
             with col1:
                 st.write("Video Play Count Statistics:")
-                if 'plays' in filtered_df.columns:
-                    # 使用与数据概览一致的计数方式
-                    if 'video_count' in filtered_df.columns:
-                        total_count = filtered_df['video_count'].sum()
-                    else:
-                        total_count = len(filtered_df)
-
-                    plays_stats = filtered_df['plays'].describe()
-                    # 创建统计表格，确保count值与数据概览一致
+                plays_stats = statistics['plays']
+                if plays_stats is not None:
                     stats_data = {
                         'Statistical indicators': ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
-                        'Numerical value': [
-                            total_count,  # 使用与数据概览一致的计数
-                            f"{plays_stats['mean']:.0f}",
-                            f"{plays_stats['std']:.0f}",
-                            f"{plays_stats['min']:.0f}",
-                            f"{plays_stats['25%']:.0f}",
-                            f"{plays_stats['50%']:.0f}",
-                            f"{plays_stats['75%']:.0f}",
-                            f"{plays_stats['max']:.0f}"
+                        'Numerical value': [plays_stats['count']] + [
+                            f"{plays_stats[key]:.0f}" for key in ['mean', 'std', 'min', '25%', '50%', '75%', 'max']
                         ]
                     }
                     stats_df = pd.DataFrame(stats_data)
@@ -191,26 +194,16 @@ def main():
 
             with col2:
                 st.write("Video Interaction Data Statistics:")
-                numeric_cols = [col for col in ['coins', 'likes', 'danmu'] if col in filtered_df.columns]
-                if numeric_cols:
-                    # 使用与数据概览一致的计数方式
-                    if 'video_count' in filtered_df.columns:
-                        total_count = filtered_df['video_count'].sum()
-                    else:
-                        total_count = len(filtered_df)
-
-                    interaction_stats = filtered_df[numeric_cols].describe()
-                    # 创建互动数据统计表
-                    interaction_data = []
-                    for col in numeric_cols:
-                        col_stats = filtered_df[col].describe()
-                        interaction_data.append({
-                            'Indicator': col,
-                            'count': total_count,  # 使用与数据概览一致的计数
-                            'Mean': f"{col_stats['mean']:.0f}",
-                            'Maximum value': f"{col_stats['max']:.0f}"
-                        })
-                    interaction_df = pd.DataFrame(interaction_data)
+                if statistics['interactions']:
+                    interaction_df = pd.DataFrame([
+                        {
+                            'Indicator': item['indicator'],
+                            'count': item['count'],
+                            'Mean': f"{item['mean']:.0f}",
+                            'Maximum value': f"{item['max']:.0f}"
+                        }
+                        for item in statistics['interactions']
+                    ])
                     st.dataframe(interaction_df, use_container_width=True, hide_index=True)
                 else:
                     st.write("No interactive data columns available")
@@ -220,35 +213,31 @@ def main():
     with tab3:
         st.subheader("Cross-domain Performance Comparison")
 
-        if not up_aggregated.empty and 'domain' in up_aggregated.columns:
-            # 选择可用的数值列
-            available_numeric_cols = [col for col in ['total_plays', 'avg_plays', 'video_count', 'comprehensive_score']
-                                      if col in up_aggregated.columns]
-
-            if available_numeric_cols:
-                metrics_by_domain = up_aggregated.groupby('domain')[available_numeric_cols].mean().reset_index()
-
-                st.subheader("Average Performance of Content Creators in Various Fields")
-                st.dataframe(
-                    metrics_by_domain,
-                    use_container_width=True
-                )
+        metrics_by_domain = get_domain_comparison(df, filters)
+        if metrics_by_domain is not None:
+            st.subheader("Average Performance of Content Creators in Various Fields")
+            st.dataframe(
+                metrics_by_domain,
+                use_container_width=True
+            )
 
-                # 可视化第一个数值列的对比
-                if len(available_numeric_cols) > 0:
-                    first_numeric = available_numeric_cols[0]
-                    fig_comparison = create_bar_chart(
-                        metrics_by_domain,
-                        'domain',
-                        first_numeric,
-                        f"contrast of {first_numeric} of each domain"
-                    )
-                    st.plotly_chart(fig_comparison, use_container_width=True)
-            else:
-                st.warning("Countless value columns are available for comparison")
+            # 可视化第一个数值列的对比
+            first_numeric = metrics_by_domain.columns[1]
+            fig_comparison = create_bar_chart(
+                metrics_by_domain,
+                'domain',
+                first_numeric,
+                f"contrast of {first_numeric} of each domain"
+            )
+            st.plotly_chart(fig_comparison, use_container_width=True)
+        elif not up_aggregated.empty and 'domain' in up_aggregated.columns:
+            st.warning("Countless value columns are available for comparison")
         else:
             st.warning("Missing domain information or uploader data")
 
 
 if __name__ == "__main__":
+    start_run('In-depth_analysis')
     main()
+    render_perf_panel({'filter': get_filter_cache_stats(), 'aggregation': get_aggregation_cache_stats(),
+                       'figures': get_figure_cache_stats()})
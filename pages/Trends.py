@@ -0,0 +1,96 @@
+import streamlit as st
+import sys
+import os
+
+# 添加utils目录到Python路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.data_loader import load_rollup_names, load_rollups
+from utils.figure_cache import get_figure_cache_stats
+from utils.perf import render_perf_panel, span, start_run
+from utils.rollups import ROLLUP_METRICS
+from utils.charts import create_time_series
+
+PERIOD_LABELS = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly'}
+SCOPE_LABELS = {'domain': 'Creative field', 'up': 'UP owner'}
+
+
+def main():
+    st.set_page_config(
+        page_title="Trends - Bilibili Analytics Platform",
+        page_icon="📈"
+    )
+
+    st.title("📈 Trends")
+
+    # 侧边栏：只读取清洗时物化的时间汇总表，不加载明细数据
+    st.sidebar.header("🔍 Trend Settings")
+
+    scope = st.sidebar.radio(
+        "Group by",
+        options=list(SCOPE_LABELS),
+        format_func=SCOPE_LABELS.get
+    )
+    period = st.sidebar.radio(
+        "Granularity",
+        options=list(PERIOD_LABELS),
+        index=1,
+        format_func=PERIOD_LABELS.get
+    )
+
+    with span('load') as record:
+        names = load_rollup_names(scope)
+        record['rows'] = len(names)
+
+    if not names:
+        st.error("No time rollups available, please run data_cleaner.py first")
+        return
+
+    # UP主很多，默认只选总播放数最高的几个
+    selected_names = st.sidebar.multiselect(
+        f"Choose {SCOPE_LABELS[scope].lower()}s (sorted by total plays)",
+        options=names,
+        default=names[:5]
+    )
+    selected_metrics = st.sidebar.multiselect(
+        "Indicators",
+        options=ROLLUP_METRICS,
+        default=['plays']
+    )
+
+    if not selected_names or not selected_metrics:
+        st.info("Select at least one name and one indicator")
+        return
+
+    with span('rollups') as record:
+        rollups = load_rollups(scope, period, tuple(selected_names))
+        record['rows'] = len(rollups)
+
+    if rollups.empty:
+        st.warning("No trend data for the current selection")
+        return
+
+    # 每个指标一张图，每个名称一条曲线
+    for metric in selected_metrics:
+        if metric not in rollups.columns:
+            st.warning(f"{metric} is not available in the rollups")
+            continue
+        wide = rollups.pivot(index='date', columns='name', values=metric)
+        columns = [name for name in selected_names if name in wide.columns]
+        fig = create_time_series(
+            wide.reset_index(),
+            'date',
+            columns,
+            f"{PERIOD_LABELS[period]} {metric}"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("Rollup Data")
+    display_columns = ['name', 'date'] + [col for col in selected_metrics if col in rollups.columns]
+    st.dataframe(rollups[display_columns], use_container_width=True)
+
+
+if __name__ == "__main__":
+    start_run('Trends')
+    main()
+    render_perf_panel({'figures': get_figure_cache_stats()})
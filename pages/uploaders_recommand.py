@@ -6,7 +6,10 @@ import os
 # 添加utils目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.data_loader import load_data, get_filtered_data, get_up_aggregated_data
+from utils.data_loader import (load_data, get_filtered_data, get_recommendation_features, get_aggregation_cache_stats,
+                               get_filter_cache_stats)
+from utils.perf import render_perf_panel, span, start_run
+from utils.recommend import top_recommendations
 
 
 def main():
@@ -17,7 +20,9 @@ def main():
 
     st.title("🤝 Recommended Collaboration by the Uploader")
 
-    df = load_data()
+    with span('load') as record:
+        df = load_data()
+        record['rows'] = len(df)
     if df.empty:
         st.error("Data loading failed")
         return
@@ -32,7 +37,8 @@ def main():
     }
 
     filtered_df = get_filtered_data(df, filters)
-    up_aggregated = get_up_aggregated_data(filtered_df)
+    # 归一化后的特征矩阵按数据版本缓存，拖动权重滑块只需一次矩阵乘法
+    features = get_recommendation_features(df, filters)
 
     # 推荐参数设置
     st.sidebar.header("🎯 Recommended parameters")
@@ -47,54 +53,23 @@ def main():
         weight_video_count = st.slider("Video Quantity Weight", 0.0, 1.0, 0.2, 0.1)
         weight_consistency = st.slider("Stability Weight", 0.0, 1.0, 0.3, 0.1)
 
-    # 计算推荐分数
-    if not up_aggregated.empty and all(
-            col in up_aggregated.columns for col in ['total_plays', 'avg_plays', 'video_count']):
-        # 归一化数据
-        for col in ['total_plays', 'avg_plays', 'video_count']:
-            if up_aggregated[col].max() > up_aggregated[col].min():
-                up_aggregated[f'{col}_normalized'] = (
-                        (up_aggregated[col] - up_aggregated[col].min()) /
-                        (up_aggregated[col].max() - up_aggregated[col].min())
-                )
-            else:
-                up_aggregated[f'{col}_normalized'] = 0.5
-
-        # 计算稳定性分数
-        up_aggregated['stability_score'] = up_aggregated['avg_plays'] / (
-                    up_aggregated['total_plays'] / up_aggregated['video_count'] + 1)
-
-        # 归一化稳定性分数
-        if up_aggregated['stability_score'].max() > up_aggregated['stability_score'].min():
-            up_aggregated['stability_normalized'] = (
-                    (up_aggregated['stability_score'] - up_aggregated['stability_score'].min()) /
-                    (up_aggregated['stability_score'].max() - up_aggregated['stability_score'].min())
-            )
-        else:
-            up_aggregated['stability_normalized'] = 0.5
-
-        total_weight = weight_total_plays + weight_avg_plays + weight_video_count + weight_consistency
-
-        if total_weight > 0:
-            up_aggregated['推荐分数'] = (
-                    up_aggregated['total_plays_normalized'] * weight_total_plays +
-                    up_aggregated['avg_plays_normalized'] * weight_avg_plays +
-                    up_aggregated['video_count_normalized'] * weight_video_count +
-                    up_aggregated['stability_normalized'] * weight_consistency
-            )
+    weights = {
+        'total_plays': weight_total_plays,
+        'avg_plays': weight_avg_plays,
+        'video_count': weight_video_count,
+        'stability': weight_consistency
+    }
 
     # 按领域推荐
-    if not up_aggregated.empty and 'domain' in up_aggregated.columns:
+    if features is not None and features['domains']:
         selected_domain = st.selectbox(
             "🎯 Select target field",
-            options=up_aggregated['domain'].unique()
+            options=list(features['domains'])
         )
 
-        domain_up = up_aggregated[up_aggregated['domain'] == selected_domain]
-
-        if '推荐分数' in domain_up.columns:
-            top_up = domain_up.nlargest(10, '推荐分数')
+        top_up = top_recommendations(features, selected_domain, weights, 10)
 
+        if top_up is not None:
             # 显示推荐结果
             st.subheader(f"🏆Top 10 Recommended Creators in the Field of {selected_domain}")
 
@@ -142,4 +117,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    start_run('uploaders_recommand')
+    main()
+    render_perf_panel({'filter': get_filter_cache_stats(), 'aggregation': get_aggregation_cache_stats()})
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+离线生成所有页面视图的报告，不需要启动Streamlit
+
+用法:
+    python report_cli.py                              # 写入 DATA_CONFIG['report_dir']
+    python report_cli.py --output reports/nightly --format json --workers 4
+    python report_cli.py --weights 0.4,0.2,0.2,0.2    # 推荐权重：总播放,平均播放,视频数,稳定性
+
+输出:
+    report.json                 全部结果（概览指标、视频统计、领域对比、综合得分排名、各领域的推荐）
+    overview.parquet            每个范围（all / 各领域）一行关键指标
+    domain_comparison.parquet   各领域UP主的平均表现
+    top_uploaders.parquet       每个范围按综合得分的前N名
+    recommendations.parquet     每个领域的前N名推荐UP主
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_CONFIG
+from utils.perf import end_run, format_run, span, start_run
+from utils.recommend import RECOMMEND_FEATURES
+from utils.report import build_report, json_default, load_report_data
+
+# overview / top_uploaders 中全量数据的范围名
+ALL_SCOPE = 'all'
+
+
+def _scoped_frame(frames, scope_col):
+    """把 {范围: 数据框} 拼成一张长表，范围列和排名列放在最前面"""
+    parts = []
+    for scope, frame in frames.items():
+        if frame is None or frame.empty:
+            continue
+        part = frame.reset_index(drop=True)
+        # domain 是category列，各部分的类别不同，统一转为字符串再拼接
+        part = part.astype({col: 'str' for col in part.columns if isinstance(part[col].dtype, pd.CategoricalDtype)})
+        part.insert(0, 'rank', np.arange(1, len(part) + 1))
+        part.insert(0, scope_col, str(scope))
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def report_tables(report):
+    """报告中的表格部分整理为可写入Parquet的长表"""
+    views = dict({ALL_SCOPE: report}, **report['domains'])
+    overview = pd.DataFrame([dict(scope=str(scope), **view['overview']) for scope, view in views.items()])
+    return {
+        'overview': overview,
+        'domain_comparison': report['domain_comparison'],
+        'top_uploaders': _scoped_frame({scope: view['top_uploaders'] for scope, view in views.items()}, 'scope'),
+        'recommendations': _scoped_frame({domain: view['recommendations']
+                                          for domain, view in report['domains'].items()}, 'domain')
+    }
+
+
+def write_report(report, output_dir, formats):
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    if 'json' in formats:
+        path = os.path.join(output_dir, 'report.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=json_default)
+        written.append(path)
+    if 'parquet' in formats:
+        for name, frame in report_tables(report).items():
+            if frame is None or frame.empty:
+                continue
+            path = os.path.join(output_dir, f'{name}.parquet')
+            frame.to_parquet(path, index=False, engine='pyarrow')
+            written.append(path)
+    return written
+
+
+def parse_weights(text):
+    values = [float(value) for value in text.split(',')]
+    if len(values) != len(RECOMMEND_FEATURES):
+        raise argparse.ArgumentTypeError(f"需要 {len(RECOMMEND_FEATURES)} 个权重: {', '.join(RECOMMEND_FEATURES)}")
+    return dict(zip(RECOMMEND_FEATURES, values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=DATA_CONFIG['report_dir'], help='输出目录')
+    parser.add_argument('--format', default='json,parquet', help='逗号分隔：json、parquet')
+    parser.add_argument('--top', type=int, default=10, help='排名和推荐的人数')
+    parser.add_argument('--weights', type=parse_weights, default=None,
+                        help='推荐权重（总播放,平均播放,视频数,稳定性），默认与推荐页滑块一致')
+    parser.add_argument('--workers', type=int, default=DATA_CONFIG.get('report_workers'),
+                        help='并行计算各领域的进程数，默认使用全部CPU核')
+    args = parser.parse_args()
+
+    start_run('report_cli')
+    with span('report.load') as record:
+        df, up_aggregated = load_report_data()
+        record['rows'] = len(df) if df is not None else 0
+    if df is None or df.empty:
+        print("没有找到清洗后的数据，请先运行 data_cleaner.py")
+        return 1
+
+    with span('report.build'):
+        report = build_report(df, up_aggregated, weights=args.weights, n=args.top, workers=args.workers)
+    with span('report.write'):
+        written = write_report(report, args.output, [name.strip() for name in args.format.split(',')])
+
+    print(f"报告已生成: {len(report['domains'])} 个领域")
+    for path in written:
+        print(f"  {path}")
+    print(format_run(end_run()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试从仓库根目录导入 data_cleaner / utils
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
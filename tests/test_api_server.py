@@ -0,0 +1,50 @@
+import json
+
+import pandas as pd
+import pytest
+
+from api_server import cache_key, parse_filter_request, parse_leaderboard_request, parse_recommend_request
+from utils.report import json_default
+
+
+@pytest.mark.parametrize('parse', [parse_leaderboard_request, parse_recommend_request])
+def test_repeated_domain_is_rejected(parse):
+    # ?domain=a&domain=b 会被合并为列表，应返回400而不是在缓存键中报错
+    with pytest.raises(ValueError, match='domain'):
+        parse({'domain': ['生活', '游戏']})
+
+
+@pytest.mark.parametrize('parse', [parse_leaderboard_request, parse_recommend_request])
+def test_non_string_domain_is_rejected(parse):
+    # POST的JSON请求体中 domain 可能是任意类型
+    with pytest.raises(ValueError, match='domain'):
+        parse({'domain': {'name': '生活'}})
+
+
+def test_single_domain_is_hashable_in_cache_key():
+    request = parse_recommend_request({'domain': '生活'})
+    assert request['domain'] == '生活'
+    hash(cache_key('recommend', 'v1', request))
+    assert parse_leaderboard_request({})['domain'] is None
+
+
+@pytest.mark.parametrize('params', [{'domains': 5}, {'genders': {'a': 1}}, {'columns': 5}])
+def test_non_list_list_parameters_are_rejected(params):
+    # POST的JSON请求体中列表参数只能是字符串或列表，否则返回400而不是500
+    with pytest.raises(ValueError, match='list'):
+        parse_filter_request(params)
+
+
+def test_list_parameters_accept_string_and_list():
+    request = parse_filter_request({'domains': '生活, 游戏', 'genders': ['男'], 'columns': ['up_name']})
+    assert request['filters']['domains'] == ['生活', '游戏']
+    assert request['filters']['genders'] == ['男']
+    assert request['columns'] == ('up_name',)
+
+
+def test_dates_are_serialized_as_iso_strings():
+    data = pd.DataFrame({'publish_date': pd.to_datetime(['2023-01-02', None]), 'plays': [1, 2]})
+    payload = json.loads(json.dumps({'data': data, 'day': pd.Timestamp('2023-05-06')}, default=json_default))
+    assert payload['data'] == [{'publish_date': '2023-01-02T00:00:00', 'plays': 1},
+                               {'publish_date': None, 'plays': 2}]
+    assert payload['day'] == '2023-05-06T00:00:00'
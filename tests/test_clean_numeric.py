@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from data_cleaner import clean_numeric_series, clean_numeric_value
+
+
+CASES = [
+    '12', ' 3.5 ', '1,234', '1，234', '4.53w', '4.53W', '12万', '1e3', '.5', '-7',
+    '', None, float('nan'), 'abc', 'w', '1_000', 'inf',
+    '１２', '１.5w', '٣', '１，２３４', '３万',
+]
+
+
+@pytest.mark.parametrize('dtype', [object, 'str'])
+def test_series_matches_value_cleaner(dtype):
+    series = pd.Series(CASES, dtype=dtype)
+    expected = pd.Series([clean_numeric_value(value) for value in series], dtype='float64').fillna(0)
+    result = clean_numeric_series(series)
+    pd.testing.assert_series_equal(result, expected, check_names=False)
+
+
+def test_unicode_digits():
+    result = clean_numeric_series(pd.Series(['１２', '１.5w', '1_000', '٣'], dtype='str'))
+    assert result.tolist() == [12.0, 15000.0, 1000.0, 3.0]
+
+
+def test_malformed_wan_values_clean_to_zero():
+    # 全角与ASCII的格式错误值一样记为0，不能让整列清洗抛出异常
+    result = clean_numeric_series(pd.Series(['１.2.3w', '1.2.3w', '5'], dtype='str'))
+    assert result.tolist() == [0.0, 0.0, 5.0]
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaner import generate_synthetic_data
+from utils.data_loader import get_filtered_data
+from utils.filter_index import apply_filter_index, build_filter_index, date_bounds, filter_day, top_positions
+from utils.schema import compact_frame
+
+FILTER_CASES = [
+    {},
+    {'domains': [], 'genders': []},
+    {'domains': ['游戏']},
+    {'domains': ['游戏', '知识', '不存在的领域'], 'genders': ['女']},
+    {'min_plays': 1000.0},
+    {'min_plays': 1000.0, 'max_plays': 3000.0},
+    {'max_plays': 0.0},
+    {'min_plays': 1e12},
+    {'start_date': '2022-02-01'},
+    {'end_date': '2022-02-15'},
+    {'start_date': '2022-02-01', 'end_date': '2022-02-01'},
+    {'start_date': '2022-03-01', 'end_date': '2022-02-01'},
+    {'domains': ['知识'], 'min_plays': 500.0, 'start_date': '2022-01-20', 'end_date': '2022-03-10'},
+]
+
+
+def _sample_data(sort_by_date=False):
+    # 播放数取整到百位制造大量相同值，部分日期为空
+    df, _ = compact_frame(generate_synthetic_data(3000, n_ups=120, n_domains=6))
+    df['plays'] = df['plays'] // 100 * 100
+    df.loc[df.index[::37], 'date'] = pd.NaT
+    if sort_by_date:
+        df = df.sort_values('date', kind='stable').reset_index(drop=True)
+    return df
+
+
+def _pandas_mask(df, filters):
+    """与筛选条件等价的逐列比较"""
+    mask = pd.Series(True, index=df.index)
+    if filters.get('domains'):
+        mask &= df['domain'].isin(filters['domains'])
+    if filters.get('genders'):
+        mask &= df['gender'].isin(filters['genders'])
+    if filters.get('min_plays') is not None:
+        mask &= df['plays'] >= filters['min_plays']
+    if filters.get('max_plays') is not None:
+        mask &= df['plays'] <= filters['max_plays']
+    start, end = filter_day(filters.get('start_date')), filter_day(filters.get('end_date'))
+    if start is not None:
+        mask &= df['date'] >= start
+    if end is not None:
+        mask &= df['date'] < end + pd.Timedelta(days=1)
+    return mask.to_numpy()
+
+
+@pytest.mark.parametrize('sort_by_date', [False, True])
+@pytest.mark.parametrize('filters', FILTER_CASES)
+def test_filter_index_matches_pandas_mask(filters, sort_by_date):
+    df = _sample_data(sort_by_date)
+    index = build_filter_index(df)
+    expected = df[_pandas_mask(df, filters)]
+
+    pd.testing.assert_frame_equal(apply_filter_index(df, index, filters), expected)
+    pd.testing.assert_frame_equal(get_filtered_data(df, filters), expected)
+
+    # 前N名与 nlargest(keep='first') 一致，包括播放数相同的行
+    for n in (1, 10, len(df)):
+        top = top_positions(index, filters, n)
+        np.testing.assert_array_equal(df.index[top], expected.nlargest(n, 'plays').index)
+
+
+def test_date_bounds_ignore_missing_dates():
+    df = _sample_data()
+    assert date_bounds(build_filter_index(df)) == (df['date'].min(), df['date'].max())
+    df['date'] = pd.NaT
+    assert date_bounds(build_filter_index(df)) is None
@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+
+from data_cleaner import clean_bilibili_data, clean_bilibili_data_incremental, generate_synthetic_data, to_raw_frame
+from utils.aggregation import get_up_aggregated_data
+from utils.columnar_cache import read_frame, read_meta, sidecar_path
+from utils.rollups import build_rollups, daily_up_rollup
+from utils.schema import compact_frame
+from utils.summary import summarize_dataset
+
+
+def _run_and_compare(raw, source, cache):
+    # 增量结果（明细、聚合表、时间汇总表、概览）应与对当前原始表全量清洗一致
+    raw.to_excel(source, index=False)
+    cleaned = clean_bilibili_data_incremental(source, cache, chunk_size=90)
+    batch = clean_bilibili_data(source)
+    frame, _ = compact_frame(read_frame(cache), read_meta(cache)['schema'])
+    pd.testing.assert_frame_equal(frame, batch, check_dtype=False, check_categorical=False)
+    expected_agg = get_up_aggregated_data(batch)
+    pd.testing.assert_frame_equal(pd.read_parquet(sidecar_path(cache, 'agg')), expected_agg,
+                                  check_dtype=False, check_categorical=False)
+    pd.testing.assert_frame_equal(pd.read_parquet(sidecar_path(cache, 'rollup')),
+                                  build_rollups(daily_up_rollup(batch)), check_dtype=False)
+    assert read_meta(sidecar_path(cache, 'agg'))['summary'] == summarize_dataset(batch, expected_agg)
+    return cleaned
+
+
+def test_incremental_only_cleans_changed_rows(tmp_path):
+    source = str(tmp_path / 'raw.xlsx')
+    cache = str(tmp_path / 'cleaned.parquet')
+    raw = to_raw_frame(generate_synthetic_data(400, n_ups=30, n_domains=4))
+    assert _run_and_compare(raw, source, cache) == 400
+    base_mtime = os.stat(cache).st_mtime_ns
+
+    # 追加：新行写成新的段，基础文件不重写
+    extra = to_raw_frame(generate_synthetic_data(50, n_ups=35, n_domains=5, seed=7))
+    raw = pd.concat([raw, extra], ignore_index=True)
+    assert _run_and_compare(raw, source, cache) == 50
+    assert os.stat(cache).st_mtime_ns == base_mtime
+    assert len(read_meta(cache)['incremental']['segments']) == 1
+
+    # 修改与删除：旧行记为墓碑
+    raw.loc[10, '播放数'] = '999'
+    assert _run_and_compare(raw, source, cache) == 1
+    raw = raw.drop(index=[3, 4, 200]).reset_index(drop=True)
+    assert _run_and_compare(raw, source, cache) == 0
+    assert read_meta(cache)['incremental']['tombstones'] == 4
+    assert os.stat(cache).st_mtime_ns == base_mtime
+
+
+def test_incremental_removes_first_and_max_rows(tmp_path):
+    # 删除某个UP主的首行或最大播放行时，需要重扫该UP主
+    source = str(tmp_path / 'raw.xlsx')
+    cache = str(tmp_path / 'cleaned.parquet')
+    raw = to_raw_frame(generate_synthetic_data(300, n_ups=20, n_domains=4))
+    _run_and_compare(raw, source, cache)
+
+    first_row = raw.index[raw['up主'] == raw['up主'].iloc[0]][0]
+    raw = raw.drop(index=[first_row]).reset_index(drop=True)
+    assert _run_and_compare(raw, source, cache) == 0
+
+    plays = raw['播放数'].map(lambda v: float(v[:-1]) * 10000 if v.endswith('w') else float(v))
+    raw = raw.drop(index=[plays.idxmax()]).reset_index(drop=True)
+    assert _run_and_compare(raw, source, cache) == 0
+
+
+def test_incremental_keeps_row_order(tmp_path):
+    source = str(tmp_path / 'raw.xlsx')
+    cache = str(tmp_path / 'cleaned.parquet')
+    raw = to_raw_frame(generate_synthetic_data(300, n_ups=20, n_domains=4))
+    _run_and_compare(raw, source, cache)
+    base_mtime = os.stat(cache).st_mtime_ns
+
+    # 插入到中间和开头的行按原始顺序排列
+    middle = to_raw_frame(generate_synthetic_data(5, n_ups=25, n_domains=5, seed=8))
+    head = to_raw_frame(generate_synthetic_data(3, n_ups=25, n_domains=5, seed=9))
+    raw = pd.concat([raw.iloc[:100], middle, raw.iloc[100:]], ignore_index=True)
+    assert _run_and_compare(raw, source, cache) == 5
+    raw = pd.concat([head, raw], ignore_index=True)
+    assert _run_and_compare(raw, source, cache) == 3
+    assert os.stat(cache).st_mtime_ns == base_mtime
+
+    # 顺序整体变化时退回全量重建
+    raw = raw.iloc[::-1].reset_index(drop=True)
+    assert _run_and_compare(raw, source, cache) == len(raw)
+    assert read_meta(cache)['incremental']['segments'] == []
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from data_cleaner import clean_bilibili_data, clean_dataframe, generate_synthetic_data, to_raw_frame
+from utils.columnar_cache import write_frame
+from utils.query_backend import DuckDBBackend, PandasBackend
+from utils.schema import compact_frame
+
+pytest.importorskip('duckdb')
+
+FILTER_CASES = [
+    {},
+    {'domains': ['游戏', '知识'], 'min_plays': 1000.0},
+    {'genders': ['女'], 'start_date': '2022-02-01', 'end_date': '2022-03-15'},
+    {'min_plays': 1e12},
+]
+
+
+def _backends(df, schema, tmp_path):
+    source = tmp_path / 'source.xlsx'
+    source.write_bytes(b'placeholder')
+    cache = str(tmp_path / 'cleaned.parquet')
+    write_frame(df, cache, str(source), extra_meta={'schema': schema})
+    return PandasBackend(df), DuckDBBackend(cache, schema)
+
+
+def _assert_same(left, right):
+    if left is None or right is None:
+        assert left is None and right is None
+        return
+    # 结果应完全一致（不设容差），行号索引的类型可以不同
+    pd.testing.assert_frame_equal(left, right, check_exact=True, check_index_type=False)
+
+
+@pytest.mark.parametrize('filters', FILTER_CASES)
+def test_duckdb_backend_matches_pandas(filters, tmp_path):
+    df, schema = compact_frame(clean_dataframe(to_raw_frame(generate_synthetic_data(3000, n_ups=150, n_domains=6))))
+    pandas_backend, duckdb_backend = _backends(df, schema, tmp_path)
+    for query in ['filter', 'aggregate', 'domain_means']:
+        _assert_same(getattr(pandas_backend, query)(filters), getattr(duckdb_backend, query)(filters))
+
+
+def test_domain_means_match_on_sample_data(tmp_path):
+    # 样例数据中有UP主的平均播放数落在 .xx5 附近，舍入方向不同会使领域均值出现微小差异
+    df, schema = compact_frame(clean_bilibili_data('bilibili_data.xlsx'))
+    pandas_backend, duckdb_backend = _backends(df, schema, tmp_path)
+    for filters in [{}, {'min_plays': 10000.0}]:
+        _assert_same(pandas_backend.domain_means(filters), duckdb_backend.domain_means(filters))
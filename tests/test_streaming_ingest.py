@@ -0,0 +1,44 @@
+import pandas as pd
+
+from data_cleaner import clean_bilibili_data, clean_bilibili_data_streaming, generate_synthetic_data, to_raw_frame
+from utils.aggregation import get_up_aggregated_data
+from utils.columnar_cache import read_meta, sidecar_path
+from utils.rollups import build_rollups, daily_up_rollup
+from utils.schema import compact_frame
+from utils.summary import summarize_dataset
+
+
+def test_streaming_handles_null_leading_chunk(tmp_path):
+    # 第一个块的头像全为空，后面的块才有字符串
+    raw = to_raw_frame(generate_synthetic_data(40, n_ups=10, n_domains=3))
+    raw['头像'] = [None] * 20 + ['http://i0.hdslb.com/bfs/face/example.jpg'] * 20
+    source = tmp_path / 'raw.xlsx'
+    raw.to_excel(source, index=False)
+    cache = tmp_path / 'cleaned.parquet'
+
+    rows = clean_bilibili_data_streaming(str(source), str(cache), chunk_size=20)
+
+    assert rows == 40
+    streamed, _ = compact_frame(pd.read_parquet(cache), read_meta(str(cache))['schema'])
+    batch = clean_bilibili_data(str(source))
+    assert streamed['avatar'].isna().sum() == 20
+    pd.testing.assert_frame_equal(streamed, batch, check_dtype=False, check_categorical=False)
+
+
+def test_streaming_aggregates_match_batch(tmp_path):
+    # 聚合表和时间汇总表逐块累积，结果应与对完整数据聚合一致
+    raw = to_raw_frame(generate_synthetic_data(300, n_ups=25, n_domains=4))
+    source = tmp_path / 'raw.xlsx'
+    raw.to_excel(source, index=False)
+    cache = tmp_path / 'cleaned.parquet'
+
+    clean_bilibili_data_streaming(str(source), str(cache), chunk_size=70)
+
+    batch = clean_bilibili_data(str(source))
+    expected_agg = get_up_aggregated_data(batch)
+    expected_rollups = build_rollups(daily_up_rollup(batch))
+    streamed_agg = pd.read_parquet(sidecar_path(str(cache), 'agg'))
+    streamed_rollups = pd.read_parquet(sidecar_path(str(cache), 'rollup'))
+    pd.testing.assert_frame_equal(streamed_agg, expected_agg, check_dtype=False, check_categorical=False)
+    pd.testing.assert_frame_equal(streamed_rollups, expected_rollups, check_dtype=False)
+    assert read_meta(sidecar_path(str(cache), 'agg'))['summary'] == summarize_dataset(batch, expected_agg)
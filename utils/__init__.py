@@ -1,3 +1,28 @@
 # 使utils成为Python包
-from .data_loader import load_data, load_cleaned_data, get_filtered_data, get_data_summary
-from .charts import create_scatter_plot, create_bar_chart, create_pie_chart, create_pie_chart_from_series, create_time_series, create_empty_plot
\ No newline at end of file
+# 子模块按需导入（PEP 562），导入 utils.perf 等轻量模块时不会连带加载 pandas/plotly
+import importlib
+
+_EXPORTS = {
+    'data_loader': ['load_data', 'load_cleaned_data', 'load_up_aggregated_data', 'get_dataset_version',
+                    'get_filter_index', 'get_filtered_data', 'get_up_aggregated_data', 'get_up_aggregated_view',
+                    'get_aggregation_cache_stats', 'get_filter_cache_stats', 'get_data_summary', 'load_rollups',
+                    'load_rollup_names'],
+    'charts': ['create_scatter_plot', 'create_bar_chart', 'create_pie_chart', 'create_pie_chart_from_series',
+               'create_time_series', 'create_empty_plot']
+}
+_ATTRIBUTE_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_ATTRIBUTE_MODULES)
+
+
+def __getattr__(name):
+    module = _ATTRIBUTE_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,217 @@
+import pandas as pd
+
+from utils.perf import span
+from utils.scoring import apply_comprehensive_score
+
+# 聚合会用到的明细列，物化聚合表时只需读取这些列
+AGGREGATION_INPUT_COLUMNS = ['up_name', 'domain', 'gender', 'plays', 'coins', 'likes', 'danmu',
+                             'video_title', 'video_count']
+
+
+def _agg_config(columns):
+    """构建聚合配置 - 只使用实际存在的列"""
+    agg_config = {}
+
+    # 添加可用的列到聚合配置
+    if 'domain' in columns:
+        agg_config['domain'] = 'first'
+
+    if 'gender' in columns:
+        agg_config['gender'] = 'first'
+
+    if 'plays' in columns:
+        agg_config['plays'] = ['sum', 'mean', 'max']
+
+    if 'coins' in columns:
+        agg_config['coins'] = ['sum', 'mean']
+
+    if 'likes' in columns:
+        agg_config['likes'] = ['sum', 'mean']
+
+    if 'danmu' in columns:
+        agg_config['danmu'] = ['sum', 'mean']
+
+    if 'video_title' in columns:
+        agg_config['video_title'] = 'count'
+    elif 'video_count' in columns:
+        agg_config['video_count'] = 'sum'
+    else:
+        # 用 up_name 计数作为视频数
+        agg_config['up_name'] = 'count'
+    return agg_config
+
+
+def _finish_aggregation(up_aggregated):
+    """扁平化后的聚合结果 -> 重命名为页面使用的列名并打分"""
+    # 重命名列 - 修复列名映射
+    column_mapping = {}
+    if 'video_title_count' in up_aggregated.columns:
+        column_mapping['video_title_count'] = 'video_count'
+    elif 'up_name_count' in up_aggregated.columns:
+        column_mapping['up_name_count'] = 'video_count'
+    elif 'video_count_first' in up_aggregated.columns:
+        column_mapping['video_count_first'] = 'video_count'
+
+    # 修复领域和性别列名
+    if 'domain_first' in up_aggregated.columns:
+        column_mapping['domain_first'] = 'domain'
+    if 'gender_first' in up_aggregated.columns:
+        column_mapping['gender_first'] = 'gender'
+
+    if 'plays_sum' in up_aggregated.columns:
+        column_mapping['plays_sum'] = 'total_plays'
+    if 'plays_mean' in up_aggregated.columns:
+        column_mapping['plays_mean'] = 'avg_plays'
+    if 'plays_max' in up_aggregated.columns:
+        column_mapping['plays_max'] = 'max_plays'
+    if 'coins_sum' in up_aggregated.columns:
+        column_mapping['coins_sum'] = 'total_coins'
+    if 'coins_mean' in up_aggregated.columns:
+        column_mapping['coins_mean'] = 'avg_coins'
+    if 'likes_sum' in up_aggregated.columns:
+        column_mapping['likes_sum'] = 'total_likes'
+    if 'likes_mean' in up_aggregated.columns:
+        column_mapping['likes_mean'] = 'avg_likes'
+    if 'danmu_sum' in up_aggregated.columns:
+        column_mapping['danmu_sum'] = 'total_danmu'
+    if 'danmu_mean' in up_aggregated.columns:
+        column_mapping['danmu_mean'] = 'avg_danmu'
+
+    up_aggregated = up_aggregated.rename(columns=column_mapping)
+
+    # 计算综合得分（权重来自 config.WEIGHTS）
+    with span('aggregate.score', rows=len(up_aggregated)):
+        apply_comprehensive_score(up_aggregated)
+    return up_aggregated
+
+
+def get_up_aggregated_data(df):
+    """按UP主聚合数据"""
+    if df.empty:
+        print("The data frame is empty and cannot be aggregated")
+        return pd.DataFrame()
+
+    # 确保必要的列存在
+    if 'up_name' not in df.columns:
+        print("Error: Missing up_name column, unable to aggregate data")
+        print("Available Columns:", df.columns.tolist())
+        return pd.DataFrame()
+
+    agg_config = _agg_config(df.columns)
+
+    # 按UP主分组，计算聚合指标
+    try:
+        with span('aggregate.groupby', rows=len(df)):
+            up_aggregated = df.groupby('up_name').agg(agg_config).round(2)
+
+        # 扁平化列名
+        up_aggregated.columns = ['_'.join(col).strip() for col in up_aggregated.columns.values]
+        up_aggregated = _finish_aggregation(up_aggregated.reset_index())
+
+        return up_aggregated
+
+    except Exception as e:
+        print(f"Failed to aggregate data for the uploader: {e}")
+        import traceback
+        traceback.print_exc()
+        return pd.DataFrame()
+
+
+def _partial_parts(agg_config):
+    """聚合配置 -> 可跨数据块合并的部分聚合列 {列名: (明细列, 块内聚合, 块间合并)}；均值拆为求和与计数"""
+    parts = {}
+    for col, funcs in agg_config.items():
+        for func in [funcs] if isinstance(funcs, str) else funcs:
+            if func == 'mean':
+                parts[f'{col}_sum'] = (col, 'sum', 'sum')
+                parts[f'{col}_count'] = (col, 'count', 'sum')
+            else:
+                parts[f'{col}_{func}'] = (col, func, 'sum' if func == 'count' else func)
+    return parts
+
+
+def partial_up_aggregates(df, order=None):
+    """
+    一个数据块的部分UP主聚合（行数、求和、计数、最大值、第一个取值），
+    流式清洗时逐块调用，再用 merge_up_aggregates 合并，无需保留全部明细
+    order 为各行在原始文件中的排序键（df 须已按它排序），记录每个UP主第一行的排序键 first_order，
+    合并时按它而不是块的先后决定第一个取值
+    """
+    if df.empty or 'up_name' not in df.columns:
+        return pd.DataFrame()
+
+    grouped = df.groupby('up_name', sort=False)
+    partial = {'row_count': grouped.size()}
+    for name, (col, func, _) in _partial_parts(_agg_config(df.columns)).items():
+        partial[name] = grouped.size() if col == 'up_name' else grouped[col].agg(func)
+    if order is not None:
+        partial['first_order'] = pd.Series(order, index=df.index).groupby(df['up_name'], sort=False).min()
+    return pd.DataFrame(partial)
+
+
+def _merge_config(partial):
+    merge_config = {name: merge for name, (_, _, merge) in _partial_parts(_agg_config_from_parts(partial)).items()}
+    merge_config['row_count'] = 'sum'
+    if 'first_order' in partial.columns:
+        merge_config['first_order'] = 'min'
+    return merge_config
+
+
+def merge_up_aggregates(partials):
+    """合并多个数据块的部分聚合（first 取最早的非空值：有 first_order 时按它，否则按块的先后）"""
+    partials = [partial for partial in partials if partial is not None and not partial.empty]
+    if not partials:
+        return pd.DataFrame()
+    merged = pd.concat(partials)
+    if 'first_order' in merged.columns:
+        merged = merged.sort_values('first_order', kind='stable')
+    return merged.groupby(level=0, sort=False).agg(_merge_config(merged))
+
+
+def subtract_up_aggregates(partial, removed):
+    """
+    从部分聚合中减去被移除的行（removed 为这些行的部分聚合，带 first_order）：求和与计数直接相减
+    被移除的行可能是UP主的最大值或第一行时无法相减，这些UP主从结果中去掉，作为第二个返回值交给调用方重算
+    没有剩余行的UP主直接去掉
+    """
+    if removed is None or removed.empty:
+        return partial, pd.Index([])
+
+    partial = partial.copy()
+    removed = removed[removed.index.isin(partial.index)]
+    current = partial.loc[removed.index]
+    stale = pd.Series(False, index=removed.index)
+    for name, merge in _merge_config(partial).items():
+        if merge == 'sum':
+            partial.loc[removed.index, name] = current[name] - removed[name]
+        elif merge == 'max':
+            stale |= removed[name] >= current[name]
+        elif merge == 'min':
+            stale |= removed[name] <= current[name]
+
+    stale_ups = stale.index[stale.to_numpy() & (partial.loc[removed.index, 'row_count'] > 0).to_numpy()]
+    partial = partial[(partial['row_count'] > 0) & ~partial.index.isin(stale_ups)]
+    return partial, stale_ups
+
+
+def _agg_config_from_parts(partial):
+    """由部分聚合的列名还原出明细中存在的列"""
+    return _agg_config({name.rsplit('_', 1)[0] for name in partial.columns})
+
+
+def finish_up_aggregates(partial):
+    """合并后的部分聚合 -> 与 get_up_aggregated_data 相同的UP主聚合表"""
+    if partial is None or partial.empty:
+        return pd.DataFrame()
+
+    flat = {}
+    for col, funcs in _agg_config_from_parts(partial).items():
+        for func in [funcs] if isinstance(funcs, str) else funcs:
+            if func == 'mean':
+                flat[f'{col}_mean'] = partial[f'{col}_sum'] / partial[f'{col}_count']
+            else:
+                flat[f'{col}_{func}'] = partial[f'{col}_{func}']
+
+    up_aggregated = pd.DataFrame(flat).sort_index().round(2)
+    up_aggregated.index.name = 'up_name'
+    return _finish_aggregation(up_aggregated.reset_index())
@@ -1,10 +1,21 @@
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
+import numpy as np
 
+from config import CHART_CONFIG
+from utils.downsample import downsample
+from utils.figure_cache import cached_figure
+from utils.perf import timed
 
-def create_scatter_plot(df, x_col, y_col, color_col, size_col=None, title=""):
-    """创建散点图"""
+# plotly 只在真正构建图表时导入（首次约0.2秒），导入本模块不加载 plotly
+
+
+@timed('chart.scatter')
+@cached_figure
+def create_scatter_plot(df, x_col, y_col, color_col, size_col=None, title="", x_range=None, y_range=None):
+    """
+    创建散点图
+    点数超过 scatter_webgl_threshold 时用WebGL渲染，超过 scatter_density_threshold 时改为服务端分箱的密度热力图
+    x_range / y_range 为 (下限, 上限)，用于下钻：只绘制该区域内的点
+    """
     required_cols = [x_col, y_col, color_col]
     if size_col:
         required_cols.append(size_col)
@@ -14,6 +25,11 @@ def create_scatter_plot(df, x_col, y_col, color_col, size_col=None, title=""):
         print(f"警告: 缺少列 {missing_cols}，无法创建散点图")
         return create_empty_plot(title)
 
+    df = select_region(df, x_col, y_col, x_range, y_range)
+    if len(df) > CHART_CONFIG['scatter_density_threshold']:
+        return create_density_heatmap(df, x_col, y_col, title)
+
+    import plotly.express as px
     fig = px.scatter(
         df,
         x=x_col,
@@ -22,17 +38,82 @@ def create_scatter_plot(df, x_col, y_col, color_col, size_col=None, title=""):
         size=size_col,
         hover_name='up_name' if 'up_name' in df.columns else None,
         title=title,
-        size_max=30
+        size_max=30,
+        render_mode='webgl' if len(df) > CHART_CONFIG['scatter_webgl_threshold'] else 'svg'
+    )
+    return fig
+
+
+def select_region(df, x_col, y_col, x_range=None, y_range=None):
+    """保留落在 x_range / y_range（闭区间）内的行，范围为None时不限制"""
+    mask = None
+    for col, value_range in ((x_col, x_range), (y_col, y_range)):
+        if value_range is None:
+            continue
+        low, high = value_range
+        in_range = df[col].between(low, high).to_numpy()
+        mask = in_range if mask is None else mask & in_range
+    return df if mask is None else df[mask]
+
+
+def _bin_edges(values, bins):
+    """分箱边界，以及该轴是否使用对数刻度"""
+    low, high = values.min(), values.max()
+    if CHART_CONFIG['scatter_density_log_axes'] and low > 0 and high / low >= 1000:
+        return np.geomspace(low, high, bins + 1), True
+    if high == low:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1), False
+
+
+def create_density_heatmap(df, x_col, y_col, title="", bins=None):
+    """
+    在服务端用 histogram2d 分箱，只把每个格子的计数发给浏览器，数据量与点数无关
+    """
+    bins = bins or CHART_CONFIG['scatter_density_bins']
+    x = df[x_col].to_numpy(dtype='float64')
+    y = df[y_col].to_numpy(dtype='float64')
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    if len(x) == 0:
+        return create_empty_plot(title)
+
+    x_edges, x_log = _bin_edges(x, bins)
+    y_edges, y_log = _bin_edges(y, bins)
+    counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    # 空格子不着色
+    z = np.where(counts > 0, counts, np.nan).T
+
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Heatmap(
+        x=x_edges,
+        y=y_edges,
+        z=z,
+        colorscale='Viridis',
+        colorbar=dict(title='count'),
+        hovertemplate=f'{x_col}: %{{x}}<br>{y_col}: %{{y}}<br>count: %{{z}}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f"{title} ({len(x):,} points, binned)" if title else f"{len(x):,} points, binned",
+        xaxis_title=x_col,
+        yaxis_title=y_col
     )
+    if x_log:
+        fig.update_xaxes(type='log')
+    if y_log:
+        fig.update_yaxes(type='log')
     return fig
 
 
-def create_bar_chart(df, x_col, y_col, title=""):
-    """创建柱状图"""
+@timed('chart.bar')
+@cached_figure
+def create_bar_chart(df, x_col, y_col, title="", height=None):
+    """创建柱状图，height 为图表高度（像素）"""
     if x_col not in df.columns or y_col not in df.columns:
         print(f"警告: 缺少列 {x_col} 或 {y_col}，无法创建柱状图")
         return create_empty_plot(title)
 
+    import plotly.express as px
     fig = px.bar(
         df,
         x=x_col,
@@ -40,9 +121,13 @@ def create_bar_chart(df, x_col, y_col, title=""):
         title=title,
         text_auto='.2f'
     )
+    if height:
+        fig.update_layout(height=height)
     return fig
 
 
+@timed('chart.pie')
+@cached_figure
 def create_pie_chart(df, names_col, values_col, title=""):
     """创建饼图"""
     if names_col not in df.columns or values_col not in df.columns:
@@ -52,6 +137,7 @@ def create_pie_chart(df, names_col, values_col, title=""):
     pie_data = df[[names_col, values_col]].copy()
     pie_data = pie_data.dropna()
 
+    import plotly.express as px
     fig = px.pie(
         pie_data,
         names=names_col,
@@ -61,6 +147,8 @@ def create_pie_chart(df, names_col, values_col, title=""):
     return fig
 
 
+@timed('chart.pie')
+@cached_figure
 def create_pie_chart_from_series(series, title=""):
     """从Series创建饼图（用于value_counts结果）"""
     if series.empty:
@@ -69,6 +157,7 @@ def create_pie_chart_from_series(series, title=""):
     pie_data = series.reset_index()
     pie_data.columns = ['category', 'count']
 
+    import plotly.express as px
     fig = px.pie(
         pie_data,
         names='category',
@@ -78,20 +167,42 @@ def create_pie_chart_from_series(series, title=""):
     return fig
 
 
-def create_time_series(df, date_col, value_cols, title=""):
-    """创建时间序列图"""
+@timed('chart.time_series')
+@cached_figure
+def create_time_series(df, date_col, value_cols, title="", width=None, method=None):
+    """
+    创建时间序列图
+    每条曲线最多保留 width（像素）* time_series_points_per_px 个点，超过时按 method 降采样（默认保留峰谷的 minmax）
+    """
     if date_col not in df.columns:
         return create_empty_plot(title)
 
+    width = width or CHART_CONFIG['time_series_width_px']
+    method = method or CHART_CONFIG['time_series_downsample']
+    max_points = int(width * CHART_CONFIG['time_series_points_per_px'])
+
+    # 降采样要求x有序
+    if not df[date_col].is_monotonic_increasing:
+        df = df.sort_values(date_col, kind='stable')
+
+    import plotly.graph_objects as go
     fig = go.Figure()
 
     for col in value_cols:
         if col in df.columns:
+            series = df[[date_col, col]].dropna()
+            x = series[date_col].to_numpy()
+            y = series[col].to_numpy()
+            downsampled = len(series) > max_points
+            if downsampled:
+                keep = downsample(x, y, max_points, method)
+                x, y = x[keep], y[keep]
             fig.add_trace(go.Scatter(
-                x=df[date_col],
-                y=df[col],
+                x=x,
+                y=y,
                 name=col,
-                mode='lines+markers'
+                # 降采样后点很密，不再绘制标记
+                mode='lines' if downsampled else 'lines+markers'
             ))
 
     fig.update_layout(title=title)
@@ -100,6 +211,7 @@ def create_time_series(df, date_col, value_cols, title=""):
 
 def create_empty_plot(title="暂无数据"):
     """创建空图表"""
+    import plotly.graph_objects as go
     fig = go.Figure()
     fig.add_annotation(
         text=title,
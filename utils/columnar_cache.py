@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+
+
+META_SUFFIX = '.meta.json'
+CACHE_FORMAT_VERSION = 1
+
+# 增量清洗写入的分段缓存中每行的内容标识和排序键（原始文件中的行序），读取时去掉
+ROW_ID_COLUMN = '__row_id'
+ROW_ORDER_COLUMN = '__row_order'
+ROW_COLUMNS = [ROW_ID_COLUMN, ROW_ORDER_COLUMN]
+
+
+def default_cache_path(source_file):
+    """与Excel文件同名的Parquet缓存路径"""
+    return os.path.splitext(source_file)[0] + '.parquet'
+
+
+def sidecar_path(cache_path, name):
+    """与列式缓存放在一起的附属文件（如聚合表），如 xxx.agg.parquet"""
+    return os.path.splitext(cache_path)[0] + f'.{name}.parquet'
+
+
+def _meta_path(cache_path):
+    return cache_path + META_SUFFIX
+
+
+def _file_sha256(path, block_size=1 << 20):
+    """计算文件的sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path):
+    """
+    记录源文件的 mtime / size / hash，用于判断缓存是否过期
+    """
+    stat = os.stat(path)
+    return {
+        'path': os.path.abspath(path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': _file_sha256(path)
+    }
+
+
+def _as_source_list(source_paths):
+    if isinstance(source_paths, (str, os.PathLike)):
+        return [source_paths]
+    return list(source_paths)
+
+
+def parquet_available():
+    """pyarrow 是可选依赖，未安装时缓存功能整体关闭"""
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def read_meta(cache_path):
+    """读取缓存元数据，不存在或损坏时返回None"""
+    try:
+        with open(_meta_path(cache_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(cache_path, meta):
+    tmp_path = _meta_path(cache_path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, _meta_path(cache_path))
+
+
+def source_paths_of(cache_path):
+    """缓存记录的源文件路径列表"""
+    meta = read_meta(cache_path)
+    if not meta:
+        return []
+    return [source['path'] for source in meta.get('sources', []) if source.get('path')]
+
+
+def cache_version(cache_path):
+    """由源文件hash和行数得到的数据版本号，没有元数据时返回None"""
+    meta = read_meta(cache_path)
+    if not meta or not meta.get('sources'):
+        return None
+    digest = hashlib.sha1()
+    for source in meta['sources']:
+        digest.update(source.get('sha256', '').encode())
+    digest.update(str(meta.get('rows')).encode())
+    return digest.hexdigest()[:16]
+
+
+def _source_still_matches(recorded):
+    """
+    先比较 mtime/size（不读文件），不一致时再比较hash；
+    仅被touch过的文件会刷新记录而不会判定为过期
+    """
+    path = recorded.get('path')
+    if not path or not os.path.exists(path):
+        return False, recorded
+
+    stat = os.stat(path)
+    if stat.st_mtime_ns == recorded.get('mtime_ns') and stat.st_size == recorded.get('size'):
+        return True, recorded
+
+    if stat.st_size != recorded.get('size'):
+        return False, recorded
+
+    if _file_sha256(path) == recorded.get('sha256'):
+        refreshed = dict(recorded, mtime_ns=stat.st_mtime_ns)
+        return True, refreshed
+
+    return False, recorded
+
+
+def is_cache_valid(cache_path):
+    """判断列式缓存是否存在且与源文件一致"""
+    if not os.path.exists(cache_path):
+        return False
+
+    meta = read_meta(cache_path)
+    if not meta or meta.get('format_version') != CACHE_FORMAT_VERSION or not meta.get('sources'):
+        return False
+
+    refreshed_sources = []
+    changed = False
+    for recorded in meta['sources']:
+        matches, refreshed = _source_still_matches(recorded)
+        if not matches:
+            return False
+        changed = changed or refreshed is not recorded
+        refreshed_sources.append(refreshed)
+
+    if changed:
+        meta['sources'] = refreshed_sources
+        try:
+            write_meta(cache_path, meta)
+        except OSError:
+            pass
+
+    return True
+
+
+def _build_meta(source_paths, rows, dtypes, extra_meta=None):
+    meta = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'sources': [source_fingerprint(path) for path in _as_source_list(source_paths)],
+        'rows': int(rows),
+        'columns': [str(col) for col in dtypes.index],
+        'dtypes': {str(col): str(dtype) for col, dtype in dtypes.items()}
+    }
+    if extra_meta:
+        meta.update(extra_meta)
+    return meta
+
+
+def write_frame(df, cache_path, source_paths, extra_meta=None, row_group_size=None):
+    """
+    将DataFrame写入Parquet缓存，并记录源文件指纹
+    """
+    if not parquet_available():
+        return False
+
+    tmp_path = cache_path + '.tmp'
+    df.to_parquet(tmp_path, index=False, engine='pyarrow', row_group_size=row_group_size)
+    os.replace(tmp_path, cache_path)
+
+    write_meta(cache_path, _build_meta(source_paths, len(df), df.dtypes, extra_meta))
+    return True
+
+
+def refresh_meta(cache_path, source_paths, rows, extra_meta=None):
+    """只更新已有缓存元数据中的源文件指纹、行数和 extra_meta，不重写数据文件（增量清洗追加分段后使用）"""
+    meta = read_meta(cache_path) or {}
+    meta.update(extra_meta or {})
+    meta['sources'] = [source_fingerprint(path) for path in _as_source_list(source_paths)]
+    meta['rows'] = int(rows)
+    write_meta(cache_path, meta)
+
+
+def write_segment(df, path, row_group_size=None):
+    """
+    写入分段缓存的一段（不写元数据，由基础文件的元数据统一记录）
+    行组较小时，读取少数几行只需解码它们所在的行组
+    """
+    tmp_path = path + '.tmp'
+    df.to_parquet(tmp_path, index=False, engine='pyarrow', row_group_size=row_group_size)
+    os.replace(tmp_path, path)
+
+
+def read_segment_rows(path, positions, columns=None):
+    """按行位置读取一段中的少数几行（Arrow 表），只解码这些行所在的行组"""
+    import numpy as np
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    sizes = [parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)]
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    positions = np.sort(np.asarray(positions))
+    groups = np.unique(np.searchsorted(starts, positions, side='right') - 1)
+    table = parquet_file.read_row_groups(groups.tolist(), columns=columns)
+    # 读取的行组拼在一起后，段内位置 -> 表内位置
+    offsets = np.concatenate([[0], np.cumsum([sizes[group] for group in groups])])
+    group_of = np.searchsorted(groups, np.searchsorted(starts, positions, side='right') - 1)
+    return table.take(offsets[group_of] + positions - starts[groups[group_of]])
+
+
+def write_frame_chunks(chunks, cache_path, source_paths, extra_meta=None):
+    """
+    逐块追加写入Parquet缓存，内存占用只与单个块的大小有关
+    所有块按第一个块的schema写入，返回写入的行数（没有数据时返回0）
+    """
+    if not parquet_available():
+        return 0
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tmp_path = cache_path + '.tmp'
+    writer = None
+    schema = None
+    dtypes = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                dtypes = chunk.dtypes
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        return 0
+
+    os.replace(tmp_path, cache_path)
+    write_meta(cache_path, _build_meta(source_paths, rows, dtypes, extra_meta))
+    return rows
+
+
+def segment_paths(cache_path, meta=None):
+    """
+    分段缓存（增量清洗）的数据文件：基础文件为第0段，之后每次增量追加一段
+    普通缓存只有基础文件
+    """
+    meta = meta if meta is not None else (read_meta(cache_path) or {})
+    directory = os.path.dirname(cache_path)
+    segments = (meta.get('incremental') or {}).get('segments', [])
+    return [cache_path] + [os.path.join(directory, name) for name in segments]
+
+
+def read_segment_table(paths, tombstones=None, columns=None, filters=None):
+    """
+    读取分段缓存并拼接为一个 Arrow 表，按 ROW_ORDER_COLUMN 排序，保留 ROW_COLUMNS
+    tombstones 为 {段号: 被移除的行位置数组}；各段的类别和整数宽度不同，拼接时自动放宽
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    read_columns = None if columns is None else list(dict.fromkeys(list(columns) + ROW_COLUMNS))
+    tables = []
+    for segment, path in enumerate(paths):
+        table = pq.read_table(path, columns=read_columns)
+        removed = (tombstones or {}).get(segment)
+        if removed is not None and len(removed):
+            keep = np.ones(table.num_rows, dtype=bool)
+            keep[removed] = False
+            table = table.filter(pa.array(keep))
+        if filters:
+            table = table.filter(pq.filters_to_expression(filters))
+        tables.append(table)
+    table = pa.concat_tables(tables, promote_options='permissive')
+    if len(paths) > 1 or tombstones:
+        table = table.sort_by(ROW_ORDER_COLUMN)
+    return table
+
+
+def read_tombstones(cache_path, meta=None):
+    """分段缓存中被移除的行：{段号: 行位置数组}，没有时为空字典"""
+    import pyarrow.parquet as pq
+
+    meta = meta if meta is not None else (read_meta(cache_path) or {})
+    if not (meta.get('incremental') or {}).get('tombstones'):
+        return {}
+    table = pq.read_table(sidecar_path(cache_path, 'tombstones')).to_pandas()
+    return {int(segment): group['position'].to_numpy()
+            for segment, group in table.groupby('segment')}
+
+
+def read_frame(cache_path, columns=None, filters=None):
+    """
+    读取有效的Parquet缓存，缓存缺失、过期或pyarrow不可用时返回None
+    filters 为pyarrow的行过滤条件（如 [('scope', '==', 'up')]），按行组统计跳过不匹配的数据
+    增量清洗写入的分段缓存会拼接所有段、去掉被移除的行并按原始行序排列
+    """
+    if not parquet_available() or not is_cache_valid(cache_path):
+        return None
+
+    import pandas as pd
+    try:
+        meta = read_meta(cache_path) or {}
+        if not meta.get('incremental'):
+            return pd.read_parquet(cache_path, columns=columns, filters=filters, engine='pyarrow')
+        table = read_segment_table(segment_paths(cache_path, meta), read_tombstones(cache_path, meta), columns,
+                                   filters)
+        return table.drop_columns(ROW_COLUMNS).to_pandas()
+    except Exception as e:
+        print(f"Failed to read columnar cache {cache_path}: {e}")
+        return None
@@ -1,7 +1,35 @@
 import pandas as pd
 import streamlit as st
+import hashlib
 import os
 
+from config import DATA_CONFIG, WEIGHTS
+from utils.aggregation import get_up_aggregated_data
+from utils.columnar_cache import cache_version, is_cache_valid, read_frame, read_meta, source_paths_of, write_frame
+from utils.filter_index import build_filter_index, date_bounds, filters_from_key, normalize_filters, top_positions
+from utils.leaderboard import build_leaderboard
+from utils.memo import LRUMemo
+from utils.perf import timed
+from utils.query_backend import PandasBackend, create_backend
+from utils.recommend import build_recommendation_features
+from utils.report import domain_comparison
+from utils.rollups import build_rollups, daily_up_rollup
+from utils.schema import compact_frame
+from utils.scoring import apply_comprehensive_score
+from utils.summary import read_summary, store_summary, summarize_dataset
+
+
+# 按 (数据版本, 筛选条件) 缓存的UP主聚合结果，进程内所有会话共享
+_aggregation_memo = LRUMemo(
+    max_entries=DATA_CONFIG['aggregation_memo_entries'],
+    max_bytes=DATA_CONFIG['aggregation_memo_mb'] * 1024 * 1024
+)
+# 按 (数据版本, 筛选条件) 缓存的筛选结果（取出的行副本），同时限制条数和内存
+_filter_memo = LRUMemo(
+    max_entries=DATA_CONFIG['filter_cache_entries'],
+    max_bytes=DATA_CONFIG['filter_memo_mb'] * 1024 * 1024
+)
+
 
 @st.cache_data
 def load_data():
@@ -15,12 +43,33 @@ def load_data():
 def load_cleaned_data():
     """
     加载清洗后的数据，如果不存在则先进行清洗
+    优先读取列式缓存，缓存缺失或过期时才解析Excel并重建缓存
     """
-    cleaned_file = 'cleaned_bilibili_data.xlsx'
-    original_file = 'bilibili_data.xlsx'
+    cleaned_file = DATA_CONFIG['cleaned_file']
+    original_file = DATA_CONFIG['original_file']
+    cache_file = DATA_CONFIG['cache_file']
+
+    # 列式缓存有效时直接读取
+    df = read_frame(cache_file)
+
+    # 多源模式：源文件集合变化（新增/删除文件）时也需要重新清洗
+    source_pattern = DATA_CONFIG.get('source_pattern')
+    if source_pattern:
+        from data_cleaner import clean_bilibili_data_multi, discover_sources
+        sources = discover_sources(source_pattern)
+        if df is not None and sorted(os.path.abspath(path) for path in sources) != sorted(source_paths_of(cache_file)):
+            df = None
+        if df is None and sources:
+            df = clean_bilibili_data_multi(sources, cache_file)
+
+    # 增量模式下原始数据变化时，只清洗新增/变化的行
+    if df is None and DATA_CONFIG.get('incremental_ingest') and os.path.exists(original_file):
+        from data_cleaner import clean_bilibili_data_incremental
+        if clean_bilibili_data_incremental(original_file, cache_file) is not None:
+            df = read_frame(cache_file)
 
     # 如果清洗后的数据不存在，先进行清洗
-    if not os.path.exists(cleaned_file):
+    if df is None and not os.path.exists(cleaned_file):
         st.info("Cleaning data, please wait...")
         try:
             # 尝试从根目录导入清洗函数
@@ -28,7 +77,19 @@ def load_cleaned_data():
             sys.path.append('.')  # 添加当前目录到Python路径
             from data_cleaner import clean_bilibili_data, save_cleaned_data
 
-            if os.path.exists(original_file):
+            if os.path.exists(original_file) and DATA_CONFIG.get('streaming_ingest'):
+                # 流式清洗只写列式缓存，不生成Excel
+                from data_cleaner import clean_bilibili_data_streaming
+                if clean_bilibili_data_streaming(original_file, cache_file):
+                    df = read_frame(cache_file)
+                if df is not None:
+                    st.success("Data cleaning completed!")
+                else:
+                    st.error("Data cleaning failed, using sample data")
+                    from data_cleaner import create_sample_data
+                    df = create_sample_data()
+                    save_cleaned_data(df, cleaned_file)
+            elif os.path.exists(original_file):
                 df = clean_bilibili_data(original_file)
                 if df is not None:
                     save_cleaned_data(df, cleaned_file)
@@ -48,10 +109,11 @@ def load_cleaned_data():
             from data_cleaner import create_sample_data
             df = create_sample_data()
             save_cleaned_data(df, cleaned_file)
-    else:
-        # 直接加载清洗后的数据
+    elif df is None:
+        # 直接加载清洗后的数据，并重建列式缓存
         try:
             df = pd.read_excel(cleaned_file)
+            _rebuild_cache(df, cache_file, cleaned_file)
             st.success("Data loaded successfully!")
         except Exception as e:
             st.error(f"Failed to load cleaned data: {e}")
@@ -65,207 +127,287 @@ def load_cleaned_data():
     if missing_columns:
         st.warning(f"Missing the following items: {missing_columns}")
 
+    # 加载时确定一次数据版本，下游缓存以它为键而不是哈希整个数据框
+    version = None
+    schema = None
+    if is_cache_valid(cache_file) and (read_meta(cache_file) or {}).get('rows') == len(df):
+        version = cache_version(cache_file)
+        schema = read_meta(cache_file).get('schema')
+
+    # 每个会话都持有一份数据，统一转换为紧凑的列类型（category / 窄整数）
+    df, _ = compact_frame(df, schema)
+    _set_dataset_version(df, version or _hash_dataset(df))
+
     return df
 
 
+def _hash_dataset(df):
+    """没有缓存指纹时按内容计算版本号，O(rows)，每份数据只算一次"""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()[:16]
+
+
+def _set_dataset_version(df, version):
+    df.attrs['dataset_version'] = version
+    df.attrs['dataset_rows'] = len(df)
+
+
+def get_dataset_version(df):
+    """
+    数据版本号：load_data() 返回的数据自带（随缓存副本一起保存）
+    attrs 会传播到派生的数据框，因此行数不一致时重新计算
+    """
+    version = df.attrs.get('dataset_version')
+    if version is not None and df.attrs.get('dataset_rows') == len(df):
+        return version
+
+    version = _hash_dataset(df)
+    _set_dataset_version(df, version)
+    return version
+
+
+def _rebuild_cache(df, cache_file, source_paths, extra_meta=None):
+    """重建列式缓存，失败时不影响数据加载"""
+    try:
+        df, schema = compact_frame(df)
+        write_frame(df, cache_file, source_paths, extra_meta=dict(extra_meta or {}, schema=schema))
+    except Exception as e:
+        print(f"Failed to rebuild columnar cache: {e}")
+
+
 @st.cache_data
-def get_filtered_data(df, filters):
-    """根据筛选条件过滤数据"""
-    filtered_df = df.copy()
+def load_up_aggregated_data():
+    """
+    读取清洗时物化的未筛选UP主聚合表，缺失或过期时现场聚合并补写
+    """
+    aggregate_file = DATA_CONFIG['aggregate_file']
+
+    up_aggregated = read_frame(aggregate_file)
+    if up_aggregated is not None:
+        # 物化后 config.WEIGHTS 变化：只重新打分，不重新聚合
+        if (read_meta(aggregate_file) or {}).get('score_weights') != WEIGHTS:
+            apply_comprehensive_score(up_aggregated)
+        return up_aggregated
+
+    df = load_cleaned_data()
+    up_aggregated = get_up_aggregated_data(df)
+
+    source_paths = source_paths_of(DATA_CONFIG['cache_file'])
+    if source_paths and not up_aggregated.empty:
+        _rebuild_cache(up_aggregated, aggregate_file, source_paths,
+                       {'score_weights': WEIGHTS, 'summary': summarize_dataset(df, up_aggregated)})
+
+    return up_aggregated
+
 
-    # 修复过滤逻辑 - 安全地处理filters参数
-    if filters is not None:
-        if 'domains' in filters and filters['domains']:
-            domains = filters['domains']
-            if isinstance(domains, list) and len(domains) > 0:
-                filtered_df = filtered_df[filtered_df['domain'].isin(domains)]
+@st.cache_data
+def load_rollups(scope, period, names=None):
+    """
+    读取清洗时物化的时间汇总表中一个 (范围, 粒度) 的行，names 为None时读取该范围的全部名称
+    只按条件读取汇总表，不加载明细；汇总表缺失或过期时由完整数据现场构建并补写
+    """
+    rollup_file = DATA_CONFIG['rollup_file']
+    filters = [('scope', '==', scope), ('period', '==', period)]
+    if names is not None:
+        filters.append(('name', 'in', [str(name) for name in names]))
+
+    rollups = read_frame(rollup_file, filters=filters)
+    if rollups is not None:
+        return rollups
+
+    rollups = build_rollups(daily_up_rollup(load_cleaned_data()))
+    source_paths = source_paths_of(DATA_CONFIG['cache_file'])
+    if source_paths and not rollups.empty:
+        try:
+            write_frame(rollups, rollup_file, source_paths)
+        except Exception as e:
+            print(f"Failed to rebuild rollups: {e}")
 
-        if 'genders' in filters and filters['genders']:
-            genders = filters['genders']
-            if isinstance(genders, list) and len(genders) > 0:
-                filtered_df = filtered_df[filtered_df['gender'].isin(genders)]
+    if rollups.empty:
+        return rollups
+    mask = (rollups['scope'] == scope) & (rollups['period'] == period)
+    if names is not None:
+        mask &= rollups['name'].isin([str(name) for name in names])
+    return rollups[mask].reset_index(drop=True)
 
-        if 'min_plays' in filters and filters['min_plays'] is not None:
-            filtered_df = filtered_df[filtered_df['plays'] >= filters['min_plays']]
 
-        if 'max_plays' in filters and filters['max_plays'] is not None:
-            filtered_df = filtered_df[filtered_df['plays'] <= filters['max_plays']]
+@st.cache_data
+def load_rollup_names(scope):
+    """汇总表中某个范围的全部名称，按总播放数降序（读取月度汇总）"""
+    monthly = load_rollups(scope, 'month')
+    if monthly.empty:
+        return []
+    if 'plays' not in monthly.columns:
+        return sorted(monthly['name'].unique().tolist())
+    totals = monthly.groupby('name')['plays'].sum().sort_values(ascending=False, kind='stable')
+    return totals.index.tolist()
+
+
+def load_summary():
+    """
+    首页的整体统计：优先读取物化聚合表元数据，没有时加载完整数据计算并补写
+    """
+    summary = read_summary()
+    if summary is None:
+        summary = summarize_dataset(load_data(), load_up_aggregated_data())
+        store_summary(summary)
+    return summary
+
 
+@timed('aggregate')
+def get_up_aggregated_view(df, filters):
+    """
+    筛选没有去掉任何行时直接使用物化的聚合表，否则对筛选结果聚合
+    聚合结果按 (数据版本, 规范化的筛选条件) 存入LRU缓存；df 必须是 load_data() 返回的完整数据
+    """
+    filtered_df = get_filtered_data(df, filters)
+    if len(filtered_df) == len(df):
+        return load_up_aggregated_data()
+
+    version = get_dataset_version(df)
+    backend = get_query_backend(version, df)
+    key = (version, normalize_filters(filters))
+    up_aggregated = _aggregation_memo.get_or_compute(key, lambda: backend.aggregate(filters))
+    # 返回副本，调用方可以自由添加列
+    return up_aggregated.copy()
+
+
+def get_aggregation_cache_stats():
+    """UP主聚合缓存的命中/未命中次数和占用"""
+    return _aggregation_memo.stats()
+
+
+@st.cache_resource(max_entries=4)
+def get_filter_index(dataset_version, _df):
+    """每个数据版本构建一次筛选索引，所有会话共享（只读）"""
+    return build_filter_index(_df)
+
+
+def get_date_bounds(df):
+    """数据中最早和最晚的日期，直接取自筛选索引中排好序的日期；没有日期时返回None"""
+    return date_bounds(get_filter_index(get_dataset_version(df), df))
+
+
+def sidebar_date_range(df):
+    """
+    侧边栏的日期区间选择，返回 (start_date, end_date)，供 filters 使用
+    默认覆盖全部日期；某一端等于数据的边界时为None（不生效，与未筛选共享缓存），没有日期列时都为None
+    """
+    bounds = get_date_bounds(df)
+    if bounds is None:
+        return None, None
+
+    first_day, last_day = bounds[0].date(), bounds[1].date()
+    date_range = st.sidebar.date_input(
+        "Date range",
+        value=(first_day, last_day),
+        min_value=first_day,
+        max_value=last_day
+    )
+    # 只选了开始日期时不限制结束日期
+    selected_dates = list(date_range) if isinstance(date_range, (list, tuple)) else [date_range]
+    start_date = selected_dates[0] if len(selected_dates) > 0 else None
+    end_date = selected_dates[1] if len(selected_dates) > 1 else None
+    return (None if start_date == first_day else start_date,
+            None if end_date == last_day else end_date)
+
+
+@st.cache_resource(max_entries=4)
+def get_query_backend(dataset_version, _df):
+    """
+    每个数据版本创建一次查询后端（DATA_CONFIG['query_backend']），所有会话共享
+    duckdb 只在数据来自有效的列式缓存时使用，否则退回 pandas
+    """
+    name = DATA_CONFIG.get('query_backend', 'pandas')
+    cache_file = DATA_CONFIG['cache_file']
+    parquet_path, schema = None, None
+    # 增量清洗写入的分段缓存需要拼接各段、去掉墓碑，只能由 read_frame 读取
+    if (name == 'duckdb' and is_cache_valid(cache_file) and cache_version(cache_file) == dataset_version
+            and not read_meta(cache_file).get('incremental')):
+        parquet_path, schema = cache_file, read_meta(cache_file).get('schema')
+    return create_backend(name, _df, parquet_path, schema, index=get_filter_index(dataset_version, _df))
+
+
+@timed('filter')
+def get_filtered_data(df, filters):
+    """
+    根据筛选条件过滤数据
+    缓存键为 (数据版本, 规范化的筛选条件)，查找缓存是O(1)而不是哈希整个数据框
+    """
+    version = get_dataset_version(df)
+    filter_key = normalize_filters(filters)
+    backend = get_query_backend(version, df)
+    # 结果在会话间共享且不复制，调用方不要原地修改
+    filtered_df = _filter_memo.get((version, filter_key))
+    if filtered_df is None:
+        filtered_df = backend.filter(filters_from_key(filter_key))
+        # 没有去掉任何行时 pandas 后端直接返回完整数据，无需占用缓存预算
+        if filtered_df is not df:
+            _filter_memo.put((version, filter_key), filtered_df)
     return filtered_df
 
 
-def get_up_aggregated_data(df):
-    """按UP主聚合数据"""
-    if df.empty:
-        print("The data frame is empty and cannot be aggregated")
-        return pd.DataFrame()
+def get_filter_cache_stats():
+    """筛选结果缓存的命中/未命中次数和占用"""
+    return _filter_memo.stats()
 
-    # 确保必要的列存在
-    if 'up_name' not in df.columns:
-        print("Error: Missing up_name column, unable to aggregate data")
-        print("Available Columns:", df.columns.tolist())
-        return pd.DataFrame()
-
-    print(f"Start aggregating data, number of raw data rows: {len(df)}")
-    print(f"Number of UP owners: {df['up_name'].nunique()}")
-
-    # 构建聚合配置 - 只使用实际存在的列
-    agg_config = {}
-
-    # 添加可用的列到聚合配置
-    if 'domain' in df.columns:
-        agg_config['domain'] = 'first'
-        print("find domain")
-    else:
-        print("not find domain")
-
-    if 'gender' in df.columns:
-        agg_config['gender'] = 'first'
-        print("find gender")
-    else:
-        print("not find gender 列")
-
-    if 'plays' in df.columns:
-        agg_config['plays'] = ['sum', 'mean', 'max']
-        print("find plays")
-    else:
-        print("not find plays")
-
-    if 'coins' in df.columns:
-        agg_config['coins'] = ['sum', 'mean']
-        print("find coins")
-    else:
-        print("not find coins")
-
-    if 'likes' in df.columns:
-        agg_config['likes'] = ['sum', 'mean']
-        print("find likes")
-    else:
-        print("not find likes")
-
-    if 'danmu' in df.columns:
-        agg_config['danmu'] = ['sum', 'mean']
-        print("find danmu")
-    else:
-        print("not find danmu")
-
-    if 'video_title' in df.columns:
-        agg_config['video_title'] = 'count'
-        print("find video_title")
-    elif 'video_count' in df.columns:
-        agg_config['video_count'] = 'sum'
-        print("find video_count")
-    else:
-        agg_config['up_name'] = 'count'
-        print("Use up_name count as the number of videos")
-
-    print(f"Aggregate Configuration: {agg_config}")
-
-    # 按UP主分组，计算聚合指标
-    try:
-        up_aggregated = df.groupby('up_name').agg(agg_config).round(2)
-        print(f"Data shape after aggregation: {up_aggregated.shape}")
-
-        # 扁平化列名
-        up_aggregated.columns = ['_'.join(col).strip() for col in up_aggregated.columns.values]
-        up_aggregated = up_aggregated.reset_index()
-
-        print(f"Column names after flattening: {up_aggregated.columns.tolist()}")
-
-        # 重命名列 - 修复列名映射
-        column_mapping = {}
-        if 'video_title_count' in up_aggregated.columns:
-            column_mapping['video_title_count'] = 'video_count'
-        elif 'up_name_count' in up_aggregated.columns:
-            column_mapping['up_name_count'] = 'video_count'
-        elif 'video_count_first' in up_aggregated.columns:
-            column_mapping['video_count_first'] = 'video_count'
-
-        # 修复领域和性别列名
-        if 'domain_first' in up_aggregated.columns:
-            column_mapping['domain_first'] = 'domain'
-        if 'gender_first' in up_aggregated.columns:
-            column_mapping['gender_first'] = 'gender'
-
-        if 'plays_sum' in up_aggregated.columns:
-            column_mapping['plays_sum'] = 'total_plays'
-        if 'plays_mean' in up_aggregated.columns:
-            column_mapping['plays_mean'] = 'avg_plays'
-        if 'plays_max' in up_aggregated.columns:
-            column_mapping['plays_max'] = 'max_plays'
-        if 'coins_sum' in up_aggregated.columns:
-            column_mapping['coins_sum'] = 'total_coins'
-        if 'coins_mean' in up_aggregated.columns:
-            column_mapping['coins_mean'] = 'avg_coins'
-        if 'likes_sum' in up_aggregated.columns:
-            column_mapping['likes_sum'] = 'total_likes'
-        if 'likes_mean' in up_aggregated.columns:
-            column_mapping['likes_mean'] = 'avg_likes'
-        if 'danmu_sum' in up_aggregated.columns:
-            column_mapping['danmu_sum'] = 'total_danmu'
-        if 'danmu_mean' in up_aggregated.columns:
-            column_mapping['danmu_mean'] = 'avg_danmu'
-
-        up_aggregated = up_aggregated.rename(columns=column_mapping)
-        print(f"Renamed column: {up_aggregated.columns.tolist()}")
-
-        # 计算综合得分
-        if not up_aggregated.empty:
-            score_components = []
-            weights = []
-
-            if 'total_plays' in up_aggregated.columns:
-                if up_aggregated['total_plays'].max() > up_aggregated['total_plays'].min():
-                    normalized_plays = (up_aggregated['total_plays'] - up_aggregated['total_plays'].min()) / (
-                                up_aggregated['total_plays'].max() - up_aggregated['total_plays'].min())
-                else:
-                    normalized_plays = up_aggregated['total_plays'] * 0
-                score_components.append(normalized_plays)
-                weights.append(0.2)
-
-            if 'total_coins' in up_aggregated.columns:
-                if up_aggregated['total_coins'].max() > up_aggregated['total_coins'].min():
-                    normalized_coins = (up_aggregated['total_coins'] - up_aggregated['total_coins'].min()) / (
-                                up_aggregated['total_coins'].max() - up_aggregated['total_coins'].min())
-                else:
-                    normalized_coins = up_aggregated['total_coins'] * 0
-                score_components.append(normalized_coins)
-                weights.append(0.3)
-
-            if 'total_likes' in up_aggregated.columns:
-                if up_aggregated['total_likes'].max() > up_aggregated['total_likes'].min():
-                    normalized_likes = (up_aggregated['total_likes'] - up_aggregated['total_likes'].min()) / (
-                                up_aggregated['total_likes'].max() - up_aggregated['total_likes'].min())
-                else:
-                    normalized_likes = up_aggregated['total_likes'] * 0
-                score_components.append(normalized_likes)
-                weights.append(0.3)
-
-            if 'total_danmu' in up_aggregated.columns:
-                if up_aggregated['total_danmu'].max() > up_aggregated['total_danmu'].min():
-                    normalized_danmu = (up_aggregated['total_danmu'] - up_aggregated['total_danmu'].min()) / (
-                                up_aggregated['total_danmu'].max() - up_aggregated['total_danmu'].min())
-                else:
-                    normalized_danmu = up_aggregated['total_danmu'] * 0
-                score_components.append(normalized_danmu)
-                weights.append(0.2)
 
-            if score_components and sum(weights) > 0:
-                total_score = sum(comp * weight for comp, weight in zip(score_components, weights)) / sum(weights)
-                up_aggregated['comprehensive_score'] = total_score.round(4)
-                print("Overall score calculation completed")
+def get_leaderboard(df, filters):
+    """
+    聚合表各指标的全局/分领域降序排名索引，按 (数据版本, 筛选条件) 缓存
+    配合 leaderboard_top 使用，前N名和分页都是切片；df 必须是 load_data() 返回的完整数据
+    """
+    return _leaderboard(get_dataset_version(df), normalize_filters(filters), df)
 
-        print(f"Final aggregated data shape: {up_aggregated.shape}")
-        if not up_aggregated.empty:
-            print(f"Aggregated Data Preview:\n{up_aggregated.head()}")
 
-        return up_aggregated
+@st.cache_resource(max_entries=DATA_CONFIG['filter_cache_entries'])
+def _leaderboard(dataset_version, filter_key, _df):
+    # 所有会话共享（只读）
+    return build_leaderboard(get_up_aggregated_view(_df, filters_from_key(filter_key)))
 
-    except Exception as e:
-        print(f"Failed to aggregate data for the uploader: {e}")
-        import traceback
-        traceback.print_exc()
-        return pd.DataFrame()
+
+@timed('aggregate')
+def get_domain_comparison(df, filters):
+    """
+    各领域UP主的平均表现，按 (数据版本, 筛选条件) 缓存；df 必须是 load_data() 返回的完整数据
+    pandas 后端复用缓存的聚合视图，duckdb 后端在引擎中分组求均值，只取回每个领域一行
+    """
+    return _domain_comparison(get_dataset_version(df), normalize_filters(filters), df)
+
+
+@st.cache_resource(max_entries=DATA_CONFIG['filter_cache_entries'])
+def _domain_comparison(dataset_version, filter_key, _df):
+    backend = get_query_backend(dataset_version, _df)
+    filters = filters_from_key(filter_key)
+    if isinstance(backend, PandasBackend):
+        return domain_comparison(get_up_aggregated_view(_df, filters))
+    return backend.domain_means(filters)
+
+
+@timed('top_rows')
+def get_top_rows(df, filters, n, column='plays'):
+    """
+    筛选结果中按 column 降序的前 n 行，等价于 get_filtered_data(df, filters).nlargest(n, column)
+    plays 直接使用筛选索引中的降序位置
+    """
+    if column != 'plays' or column not in df.columns:
+        return get_filtered_data(df, filters).nlargest(n, column)
+    index = get_filter_index(get_dataset_version(df), df)
+    return df.take(top_positions(index, filters, n))
+
+
+def get_recommendation_features(df, filters):
+    """
+    推荐特征矩阵（全局归一化后按领域切分），按 (数据版本, 筛选条件) 缓存
+    拖动权重滑块时直接复用，不再重新聚合和归一化；df 必须是 load_data() 返回的完整数据
+    """
+    return _recommendation_features(get_dataset_version(df), normalize_filters(filters), df)
+
+
+@st.cache_resource(max_entries=DATA_CONFIG['filter_cache_entries'])
+def _recommendation_features(dataset_version, filter_key, _df):
+    # 所有会话共享（只读）
+    return build_recommendation_features(get_up_aggregated_view(_df, filters_from_key(filter_key)))
 
 
 def get_data_summary(df):
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+def _as_float(values):
+    """日期转换为整数时间戳，统一按浮点数计算"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype('int64').astype('float64')
+    return values.astype('float64')
+
+
+def minmax_downsample(x, y, n_out):
+    """
+    按x轴等宽分桶（对应屏幕上的像素列），每个桶保留最小值和最大值所在的点
+    峰值和谷值不会丢失；x 必须已排序。返回保留点的位置（升序）
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+    n_buckets = max(n_out // 2, 1)
+    x_low, x_high = x[0], x[-1]
+    if x_high > x_low:
+        bucket = np.minimum(((x - x_low) / (x_high - x_low) * n_buckets).astype(np.int64), n_buckets - 1)
+    else:
+        bucket = np.arange(n) * n_buckets // n
+
+    # 每个桶内按 y 排序，第一个是最小值、最后一个是最大值；NaN 排在最后且不保留
+    valid = ~np.isnan(y)
+    positions = np.flatnonzero(valid)
+    order = positions[np.lexsort((y[positions], bucket[positions]))]
+    sorted_buckets = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+
+    keep = np.concatenate([order[starts], order[ends], [0, n - 1]])
+    return np.unique(keep)
+
+
+def lttb_downsample(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets：每个桶保留与前一个保留点、下一个桶均值构成最大三角形的点
+    视觉形状保留得最好；x 必须已排序且 y 不含NaN。返回保留点的位置（升序）
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+    # 首尾两点固定保留，中间 n - 2 个点分成 n_out - 2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        bucket_x, bucket_y = x[start:end], y[start:end]
+        area = np.abs((x[previous] - avg_x) * (bucket_y - y[previous]) -
+                      (x[previous] - bucket_x) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        keep[i + 1] = previous
+
+    return keep
+
+
+DOWNSAMPLERS = {
+    'minmax': minmax_downsample,
+    'lttb': lttb_downsample
+}
+
+
+def downsample(x, y, n_out, method='minmax'):
+    """按 method 选择降采样算法，返回保留点的位置"""
+    return DOWNSAMPLERS[method](x, y, n_out)
@@ -0,0 +1,99 @@
+import functools
+import hashlib
+
+import pandas as pd
+
+from config import CHART_CONFIG
+from utils.memo import LRUMemo
+
+
+# 构建好的Plotly图表，进程内所有会话共享；按估算的数据大小计入内存预算
+_figure_cache = LRUMemo(
+    max_entries=CHART_CONFIG['figure_cache_entries'],
+    max_bytes=CHART_CONFIG['figure_cache_mb'] * 1024 * 1024
+)
+
+
+def data_fingerprint(data):
+    """按内容（含索引、列名和类型）计算数据框/Series的指纹，O(rows)，远低于重建图表的开销"""
+    digest = hashlib.sha1()
+    if isinstance(data, pd.DataFrame):
+        digest.update(repr(list(zip(map(str, data.columns), map(str, data.dtypes)))).encode())
+    else:
+        digest.update(repr((str(data.name), str(data.dtype))).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _argument_key(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return ('data', data_fingerprint(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_argument_key(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _argument_key(item)) for key, item in value.items()))
+    return value
+
+
+# 估算图表大小时计入的逐点数据属性（轨迹和 marker 上）
+_POINT_PROPERTIES = ['x', 'y', 'z', 'text', 'hovertext', 'customdata', 'ids', 'size', 'color']
+# 每条轨迹和布局的固定开销（字节）
+_TRACE_OVERHEAD = 1024
+
+
+def _value_size(value):
+    if value is None:
+        return 0
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return 16 * len(value)
+    return 8
+
+
+def estimate_figure_size(fig):
+    """按轨迹中的数组估算图表占用的字节数，不需要序列化整个图表"""
+    size = _TRACE_OVERHEAD
+    for trace in fig.data:
+        size += _TRACE_OVERHEAD
+        parts = [trace]
+        if 'marker' in trace and trace['marker'] is not None:
+            parts.append(trace['marker'])
+        for part in parts:
+            for name in _POINT_PROPERTIES:
+                if name in part:
+                    size += _value_size(part[name])
+    return size
+
+
+def cached_figure(builder):
+    """
+    图表构建函数的缓存装饰器：键为 (函数名, 数据指纹, 其余参数)
+    缓存中的图表在会话间共享，每次返回一份副本，调用方可以自由修改
+    """
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        if not CHART_CONFIG['figure_cache_entries']:
+            return builder(*args, **kwargs)
+
+        import plotly.graph_objects as go
+
+        key = (builder.__name__, _argument_key(args), _argument_key(kwargs))
+        fig = _figure_cache.get(key)
+        if fig is None:
+            fig = builder(*args, **kwargs)
+            _figure_cache.put(key, fig, size=estimate_figure_size(fig))
+        return go.Figure(fig)
+
+    return wrapper
+
+
+def get_figure_cache_stats():
+    """图表缓存的命中/未命中次数和占用"""
+    return _figure_cache.stats()
+
+
+def clear_figure_cache():
+    _figure_cache.clear()
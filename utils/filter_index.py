@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+
+
+# 筛选条件键 -> 数据列
+CATEGORY_FILTERS = {
+    'domains': 'domain',
+    'genders': 'gender'
+}
+RANGE_FILTERS = ['min_plays', 'max_plays']
+# 日期区间（按天，含两端），值为日期或 'YYYY-MM-DD' 字符串
+DATE_FILTERS = ['start_date', 'end_date']
+# datetime64 的 NaT 按 int64 最小值存储，排序后位于最前面
+NAT_VALUE = np.iinfo('int64').min
+
+
+def filter_day(value):
+    """日期筛选值 -> 当天0点的 Timestamp，空值返回None"""
+    if value is None or value == '':
+        return None
+    return pd.Timestamp(value).normalize()
+
+
+def normalize_filters(filters):
+    """
+    把筛选条件规范化为可哈希的元组，用作缓存键；等价的条件得到相同的键
+    与筛选逻辑一致：只有非空列表和非None的区间值才生效
+    """
+    if not filters:
+        return ()
+
+    key = []
+    for filter_key in CATEGORY_FILTERS:
+        selected = filters.get(filter_key)
+        if isinstance(selected, list) and len(selected) > 0:
+            key.append((filter_key, tuple(sorted(set(selected), key=str))))
+    for filter_key in RANGE_FILTERS:
+        value = filters.get(filter_key)
+        if value is not None:
+            key.append((filter_key, float(value)))
+    for filter_key in DATE_FILTERS:
+        day = filter_day(filters.get(filter_key))
+        if day is not None:
+            key.append((filter_key, day.strftime('%Y-%m-%d')))
+    return tuple(key)
+
+
+def filters_from_key(filter_key):
+    """normalize_filters 的逆操作"""
+    return {name: list(value) if isinstance(value, tuple) else value for name, value in filter_key}
+
+
+def build_filter_index(df):
+    """
+    构建筛选索引：
+    - domain / gender 的整数编码，以及每个取值的行位图（np.packbits 压缩）
+    - plays 的排序索引，播放数区间用 searchsorted 定位
+    - plays 的稳定降序索引，筛选后的 nlargest('plays') 按它扫描即可
+    - date 的排序索引，日期区间用 searchsorted 定位为其上的一段连续切片
+    """
+    index = {
+        'rows': len(df),
+        'categories': {},
+        'plays_values': None,
+        'plays_order': None,
+        'plays_sorted': None,
+        'plays_desc': None,
+        'date_values': None,
+        'date_order': None,
+        'date_sorted': None
+    }
+
+    for filter_key, col in CATEGORY_FILTERS.items():
+        if col not in df.columns:
+            continue
+        codes, values = pd.factorize(df[col])
+        bitmaps = {value: np.packbits(codes == code) for code, value in enumerate(values)}
+        index['categories'][filter_key] = {
+            'column': col,
+            'codes': codes,
+            'bitmaps': bitmaps
+        }
+
+    if 'plays' in df.columns:
+        plays = df['plays'].to_numpy()
+        order = np.argsort(plays, kind='stable')
+        index['plays_values'] = plays
+        index['plays_order'] = order
+        index['plays_sorted'] = plays[order]
+        index['plays_desc'] = np.argsort(-plays.astype('float64'), kind='stable')
+
+    if 'date' in df.columns and pd.api.types.is_datetime64_any_dtype(df['date']):
+        # 统一为纳秒的 int64，比较和二分查找都在整数上进行
+        dates = df['date'].to_numpy(dtype='datetime64[ns]').view('int64')
+        order = np.argsort(dates, kind='stable')
+        index['date_values'] = dates
+        index['date_order'] = order
+        index['date_sorted'] = dates[order]
+
+    return index
+
+
+def _category_bitmap(category, selected, n_bytes):
+    """选中取值的位图取并集，未出现的取值被忽略（与 isin 一致）"""
+    result = np.zeros(n_bytes, dtype=np.uint8)
+    for value in selected:
+        bitmap = category['bitmaps'].get(value)
+        if bitmap is not None:
+            result |= bitmap
+    return result
+
+
+def _plays_range(index, min_plays, max_plays):
+    """用二分查找把播放数区间转换为排序索引上的 [lo, hi)"""
+    plays_sorted = index['plays_sorted']
+    lo = 0 if min_plays is None else int(np.searchsorted(plays_sorted, min_plays, side='left'))
+    hi = len(plays_sorted) if max_plays is None else int(np.searchsorted(plays_sorted, max_plays, side='right'))
+    return lo, max(lo, hi)
+
+
+def date_bounds(index):
+    """数据中最早和最晚的日期（Timestamp），没有日期列或全为空时返回None"""
+    dates = index['date_sorted']
+    if dates is None:
+        return None
+    lo = int(np.searchsorted(dates, NAT_VALUE, side='right'))
+    if lo == len(dates):
+        return None
+    return pd.Timestamp(dates[lo]), pd.Timestamp(dates[-1])
+
+
+def _date_range(index, start_date, end_date):
+    """
+    日期区间转换为日期排序索引上的 [lo, hi)：start_date 当天0点起，到 end_date 次日0点之前
+    任一端生效时排除空日期，与按列比较的结果一致
+    """
+    dates_sorted = index['date_sorted']
+    start, end = filter_day(start_date), filter_day(end_date)
+    if start is None and end is None:
+        return 0, len(dates_sorted)
+    lo = int(np.searchsorted(dates_sorted, NAT_VALUE, side='right'))
+    if start is not None:
+        lo = max(lo, int(np.searchsorted(dates_sorted, start.as_unit('ns').value, side='left')))
+    hi = len(dates_sorted)
+    if end is not None:
+        next_day = (end + pd.Timedelta(days=1)).as_unit('ns').value
+        hi = int(np.searchsorted(dates_sorted, next_day, side='left'))
+    return lo, max(lo, hi)
+
+
+def _active_ranges(index, filters):
+    """
+    生效的区间条件，每个为 (排序索引, 每行的值, 排序后的值, lo, hi)
+    不缩小范围的区间（覆盖全部行）不算生效
+    """
+    ranges = []
+    if filters is None:
+        return ranges
+    n_rows = index['rows']
+    if index['plays_order'] is not None:
+        lo, hi = _plays_range(index, filters.get('min_plays'), filters.get('max_plays'))
+        if (lo, hi) != (0, n_rows):
+            ranges.append((index['plays_order'], index['plays_values'], index['plays_sorted'], lo, hi))
+    if index['date_order'] is not None:
+        lo, hi = _date_range(index, filters.get('start_date'), filters.get('end_date'))
+        if (lo, hi) != (0, n_rows):
+            ranges.append((index['date_order'], index['date_values'], index['date_sorted'], lo, hi))
+    return ranges
+
+
+def filter_positions(index, filters):
+    """
+    根据筛选条件计算命中行的位置（升序），没有任何条件生效时返回None
+    只有一个区间条件且命中的行在数据中是连续的（如按日期存储时的日期区间）时返回 slice，取行不需要复制
+    """
+    n_rows = index['rows']
+    n_bytes = (n_rows + 7) // 8
+    bitmap = None
+
+    if filters is not None:
+        for filter_key, category in index['categories'].items():
+            selected = filters.get(filter_key)
+            # 与原逻辑一致：只有非空列表才生效
+            if isinstance(selected, list) and len(selected) > 0:
+                category_bitmap = _category_bitmap(category, selected, n_bytes)
+                bitmap = category_bitmap if bitmap is None else bitmap & category_bitmap
+
+    ranges = _active_ranges(index, filters)
+    if not ranges:
+        if bitmap is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bitmap, count=n_rows))
+
+    # 最窄的区间决定候选行，其余区间按值的上下界逐行检查
+    ranges.sort(key=lambda item: item[4] - item[3])
+    order, _, _, lo, hi = ranges[0]
+    rows = order[lo:hi]
+    if len(rows) == 0:
+        return rows
+    if bitmap is None and len(ranges) == 1:
+        first, last = int(rows.min()), int(rows.max())
+        if last - first + 1 == len(rows):
+            return slice(first, last + 1)
+
+    for _, values, values_sorted, other_lo, other_hi in ranges[1:]:
+        if other_hi == other_lo:
+            return rows[:0]
+        candidate = values[rows]
+        rows = rows[(candidate >= values_sorted[other_lo]) & (candidate <= values_sorted[other_hi - 1])]
+    if bitmap is not None:
+        rows = rows[np.unpackbits(bitmap, count=n_rows)[rows].astype(bool)]
+    return np.sort(rows)
+
+
+def apply_filter_index(df, index, filters):
+    """按索引筛选：位图求交 + 一次取行，不复制整个数据框"""
+    positions = filter_positions(index, filters)
+    if positions is None:
+        return df
+    if isinstance(positions, slice):
+        return df.iloc[positions]
+    return df.take(positions)
+
+
+def top_positions(index, filters, n):
+    """
+    筛选结果中 plays 最大的 n 行的位置（降序，值相同时位置靠前的优先，与 nlargest 一致）
+    沿降序索引分块扫描，找到 n 行即停止，不需要对筛选结果排序
+    """
+    order = index['plays_desc']
+    positions = filter_positions(index, filters)
+    if positions is None:
+        return order[:n]
+
+    selected = np.zeros(index['rows'], dtype=bool)
+    selected[positions] = True
+
+    found = []
+    count = 0
+    start = 0
+    block = max(n * 16, 4096)
+    while start < len(order) and count < n:
+        segment = order[start:start + block]
+        hits = segment[selected[segment]]
+        found.append(hits)
+        count += len(hits)
+        start += block
+        block *= 2
+    return np.concatenate(found)[:n] if found else order[:0]
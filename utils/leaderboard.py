@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+
+# 预先排好序的聚合指标
+LEADERBOARD_METRICS = ['total_plays', 'avg_plays', 'video_count', 'comprehensive_score']
+
+
+def descending_order(values):
+    """
+    稳定的降序位置：值相同时位置靠前的在前（与 nlargest(keep='first') 一致）
+    NaN 不参与排名（nlargest 同样会丢弃）
+    """
+    values = np.asarray(values, dtype='float64')
+    order = np.argsort(-values, kind='stable')
+    return order[:np.count_nonzero(~np.isnan(values))]
+
+
+def _split_by_domain(order, codes, n_domains):
+    """把全局降序位置按领域拆开，每个领域内仍保持降序"""
+    order = order[codes[order] >= 0]
+    domain_codes = codes[order]
+    grouped = order[np.argsort(domain_codes, kind='stable')]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(domain_codes, minlength=n_domains))])
+    return [grouped[bounds[code]:bounds[code + 1]] for code in range(n_domains)]
+
+
+def build_leaderboard(up_aggregated, metrics=None):
+    """
+    为聚合表的每个指标构建全局和分领域的降序排名索引
+    前N名和分页查询只需对索引切片，不需要重新排序
+    """
+    metrics = [metric for metric in (metrics or LEADERBOARD_METRICS) if metric in up_aggregated.columns]
+    board = {'frame': up_aggregated, 'metrics': {}}
+
+    codes, domains = None, []
+    if 'domain' in up_aggregated.columns:
+        codes, domains = pd.factorize(up_aggregated['domain'])
+
+    for metric in metrics:
+        order = descending_order(up_aggregated[metric].to_numpy(dtype='float64', na_value=np.nan))
+        by_domain = {}
+        if codes is not None:
+            by_domain = dict(zip(domains, _split_by_domain(order, codes, len(domains))))
+        board['metrics'][metric] = {'order': order, 'domains': by_domain}
+
+    return board
+
+
+def leaderboard_positions(board, metric, n, offset=0, domain=None):
+    """
+    排名第 offset+1 到 offset+n 的行位置；指标没有索引时返回None
+    domain 不为None时只在该领域内排名
+    """
+    entry = board['metrics'].get(metric)
+    if entry is None:
+        return None
+    order = entry['order'] if domain is None else entry['domains'].get(domain, np.array([], dtype=np.intp))
+    return order[offset:offset + n]
+
+
+def leaderboard_top(board, metric, n, offset=0, domain=None):
+    """
+    排名第 offset+1 到 offset+n 的UP主（按 metric 降序），如 offset=499, n=21 即第500-520名
+    指标没有索引时退回到 nlargest
+    """
+    positions = leaderboard_positions(board, metric, n, offset, domain)
+    if positions is not None:
+        return board['frame'].take(positions)
+
+    frame = board['frame']
+    if domain is not None:
+        frame = frame[frame['domain'] == domain]
+    return frame.nlargest(offset + n, metric).iloc[offset:]
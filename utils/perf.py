@@ -0,0 +1,160 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import PERF_CONFIG
+
+
+# 每个Streamlit会话的脚本运行在各自的线程里，记录按线程隔离
+_local = threading.local()
+
+
+def start_run(page):
+    """开始记录一次页面运行（rerun）"""
+    if not PERF_CONFIG['enabled']:
+        _local.run = None
+        return
+    _local.run = {
+        'page': page,
+        'started_at': time.time(),
+        'start': time.perf_counter(),
+        'depth': 0,
+        'started_spans': 0,
+        'spans': []
+    }
+
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+
+@contextmanager
+def span(stage, rows=None):
+    """
+    记录一个阶段的耗时和行数；没有开始记录时不产生开销
+    用法: with span('filter') as record: ...; record['rows'] = len(result)
+    """
+    run = current_run()
+    record = {'stage': stage, 'rows': rows}
+    if run is None:
+        yield record
+        return
+
+    record['depth'] = run['depth']
+    record['order'] = run['started_spans']
+    run['started_spans'] += 1
+    run['depth'] += 1
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        run['depth'] -= 1
+        run['spans'].append(record)
+
+
+def timed(stage):
+    """装饰器：记录函数耗时，返回DataFrame时同时记录行数"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_run() is None:
+                return func(*args, **kwargs)
+            import pandas as pd
+            with span(stage) as record:
+                result = func(*args, **kwargs)
+                if isinstance(result, (pd.DataFrame, pd.Series)):
+                    record['rows'] = len(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def _rotate_log(log_file):
+    """日志超过 log_max_mb 时改名为 <log_file>.1（覆盖上一份），磁盘占用有上限"""
+    max_bytes = PERF_CONFIG.get('log_max_mb', 10) * 1024 * 1024
+    try:
+        if os.path.getsize(log_file) >= max_bytes:
+            os.replace(log_file, log_file + '.1')
+    except FileNotFoundError:
+        pass
+
+
+def end_run(extra=None):
+    """结束本次记录，按配置追加一行JSON到日志文件，返回本次记录"""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+
+    record = {
+        'ts': run['started_at'],
+        'page': run['page'],
+        'total_ms': round((time.perf_counter() - run['start']) * 1000, 3),
+        # 嵌套的阶段先结束，按开始顺序排列更易读
+        'spans': sorted(run['spans'], key=lambda item: item['order'])
+    }
+    if extra:
+        record.update(extra)
+
+    log_file = PERF_CONFIG.get('log_file')
+    if log_file:
+        try:
+            _rotate_log(log_file)
+            with open(log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        except OSError as e:
+            print(f"Failed to write performance log: {e}")
+    return record
+
+
+def _format_memory(item):
+    """阶段记录的内存变化（如 clean.compact 的压缩前后），没有时返回None"""
+    if item.get('bytes_before') is None or item.get('bytes_after') is None:
+        return None
+    return f"{item['bytes_before'] / 1e6:.1f} MB -> {item['bytes_after'] / 1e6:.1f} MB"
+
+
+def format_run(record):
+    """把一次记录格式化为文本，命令行脚本使用"""
+    lines = [f"[{record['page']}] total {record['total_ms']:.1f} ms"]
+    for item in record['spans']:
+        rows = f", rows={item['rows']}" if item.get('rows') is not None else ''
+        memory = _format_memory(item)
+        memory = f", memory {memory}" if memory else ''
+        lines.append(f"{'  ' * (item.get('depth', 0) + 1)}{item['stage']}: {item.get('ms', 0):.1f} ms{rows}{memory}")
+    return '\n'.join(lines)
+
+
+def render_perf_panel(extra_stats=None):
+    """
+    在侧边栏显示本次运行的性能面板（可选），并结束记录
+    """
+    import streamlit as st
+
+    extra = {'cache': extra_stats} if extra_stats else None
+    record = end_run(extra)
+    if record is None:
+        return
+
+    if st.sidebar.checkbox("Show performance", value=PERF_CONFIG['show_panel'], key='perf_panel'):
+        with st.sidebar.expander("⏱️ Performance", expanded=True):
+            st.caption(f"Total: {record['total_ms']:.1f} ms")
+            if record['spans']:
+                import pandas as pd
+                spans_df = pd.DataFrame([
+                    {'stage': '  ' * item.get('depth', 0) + item['stage'],
+                     'ms': item.get('ms'),
+                     'rows': item.get('rows'),
+                     'memory': _format_memory(item)}
+                    for item in record['spans']
+                ])
+                # 只有清洗等少数阶段记录内存变化
+                if spans_df['memory'].isna().all():
+                    spans_df = spans_df.drop(columns='memory')
+                st.dataframe(spans_df, hide_index=True)
+            if extra_stats:
+                st.json(extra_stats)
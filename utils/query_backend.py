@@ -0,0 +1,219 @@
+import threading
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from utils.aggregation import get_up_aggregated_data
+from utils.filter_index import CATEGORY_FILTERS, apply_filter_index, build_filter_index, filter_day
+from utils.report import domain_comparison
+from utils.schema import apply_schema
+from utils.scoring import apply_comprehensive_score
+
+
+# 聚合表中 (源列, 聚合函数) -> 结果列，顺序与 get_up_aggregated_data 的列顺序一致
+AGGREGATE_METRICS = [
+    ('plays', 'sum', 'total_plays'),
+    ('plays', 'avg', 'avg_plays'),
+    ('plays', 'max', 'max_plays'),
+    ('coins', 'sum', 'total_coins'),
+    ('coins', 'avg', 'avg_coins'),
+    ('likes', 'sum', 'total_likes'),
+    ('likes', 'avg', 'avg_likes'),
+    ('danmu', 'sum', 'total_danmu'),
+    ('danmu', 'avg', 'avg_danmu')
+]
+
+
+def duckdb_available():
+    """duckdb 是可选依赖，未安装时只能使用 pandas 后端"""
+    try:
+        import duckdb  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class QueryBackend(ABC):
+    """
+    查询后端：筛选明细、按UP主聚合、按领域求UP主指标的均值
+    filters 与页面的筛选条件格式相同；返回的数据框与 pandas 实现一致
+    """
+    name = None
+
+    @abstractmethod
+    def filter(self, filters):
+        """筛选后的明细行"""
+
+    @abstractmethod
+    def aggregate(self, filters):
+        """筛选后按UP主聚合（含综合得分）"""
+
+    @abstractmethod
+    def domain_means(self, filters):
+        """各领域UP主指标的均值，没有领域时返回None"""
+
+
+class PandasBackend(QueryBackend):
+    """在内存中的完整数据框上用筛选索引和 groupby 计算"""
+    name = 'pandas'
+
+    def __init__(self, df, index=None):
+        self.df = df
+        self.index = index if index is not None else build_filter_index(df)
+
+    def filter(self, filters):
+        return apply_filter_index(self.df, self.index, filters)
+
+    def aggregate(self, filters):
+        return get_up_aggregated_data(self.filter(filters))
+
+    def domain_means(self, filters):
+        return domain_comparison(self.aggregate(filters))
+
+
+class DuckDBBackend(QueryBackend):
+    """
+    在 Parquet 列式缓存上用 DuckDB 执行筛选和按UP主分组，只把结果集取回 pandas
+    'first'（UP主的领域/性别）按文件行号取第一个非空值，与 pandas 一致；
+    四舍五入、综合得分和领域均值在取回的聚合表上用与 pandas 相同的代码计算
+    """
+    name = 'duckdb'
+
+    def __init__(self, parquet_path, schema=None):
+        import duckdb
+
+        self.parquet_path = parquet_path
+        self.schema = schema
+        self._connection = duckdb.connect()
+        self._local = threading.local()
+        # 按文件行号保证结果顺序与 pandas 一致
+        self._source = f"read_parquet('{parquet_path.replace(chr(39), chr(39) * 2)}', file_row_number = true)"
+        described = self._cursor().execute(f"DESCRIBE SELECT * FROM {self._source}").fetchall()
+        self.column_types = {row[0]: row[1] for row in described if row[0] != 'file_row_number'}
+
+    def _cursor(self):
+        # 同一个连接不能在多个线程中同时执行查询，每个线程使用各自的游标
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self._local.cursor = self._connection.cursor()
+        return cursor
+
+    def _where(self, filters):
+        """筛选条件转换为 WHERE 子句和参数：只有非空列表和非None的区间值才生效（与 normalize_filters 一致）"""
+        clauses, params = [], []
+        filters = filters or {}
+        for filter_key, col in CATEGORY_FILTERS.items():
+            selected = filters.get(filter_key)
+            if col in self.column_types and isinstance(selected, list) and len(selected) > 0:
+                clauses.append(f'list_contains(?, "{col}")')
+                params.append([str(value) for value in selected])
+        if 'plays' in self.column_types:
+            if filters.get('min_plays') is not None:
+                clauses.append('plays >= ?')
+                params.append(float(filters['min_plays']))
+            if filters.get('max_plays') is not None:
+                clauses.append('plays <= ?')
+                params.append(float(filters['max_plays']))
+        if 'date' in self.column_types:
+            start, end = filter_day(filters.get('start_date')), filter_day(filters.get('end_date'))
+            if start is not None:
+                clauses.append('"date" >= ?')
+                params.append(start.to_pydatetime())
+            if end is not None:
+                clauses.append('"date" < ?')
+                params.append((end + pd.Timedelta(days=1)).to_pydatetime())
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def _query(self, sql, params):
+        # 经 Arrow 取回，文本列与 pd.read_parquet 一样是 str 类型
+        return self._cursor().execute(sql, params).fetch_arrow_table().to_pandas()
+
+    def _is_integer(self, col):
+        return 'INT' in self.column_types.get(col, '')
+
+    def filter(self, filters):
+        where, params = self._where(filters)
+        result = self._query(f"SELECT * FROM {self._source}{where} ORDER BY file_row_number", params)
+        # 行号作为索引，与 pandas 后端的 take 结果一致
+        result.index = pd.Index(result.pop('file_row_number').to_numpy(dtype='int64'))
+        return apply_schema(result, self.schema) if self.schema else result
+
+    def _aggregate_select(self):
+        """与 get_up_aggregated_data 相同的聚合列"""
+        select = ['up_name']
+        for col in ['domain', 'gender']:
+            if col in self.column_types:
+                select.append(f'arg_min("{col}", file_row_number) FILTER (WHERE "{col}" IS NOT NULL) AS "{col}"')
+        for col, func, name in AGGREGATE_METRICS:
+            if col in self.column_types:
+                # 整数的 SUM 在 DuckDB 中是128位整数，转回 BIGINT
+                cast = '::BIGINT' if func == 'sum' and self._is_integer(col) else ''
+                select.append(f'{func}("{col}"){cast} AS {name}')
+        if 'video_title' in self.column_types:
+            select.append('count(video_title) AS video_count')
+        elif 'video_count' in self.column_types:
+            cast = '::BIGINT' if self._is_integer('video_count') else ''
+            select.append(f'sum(video_count){cast} AS video_count')
+        else:
+            select.append('count(up_name) AS video_count')
+        return ', '.join(select)
+
+    def _apply_source_schema(self, df, sources):
+        """
+        结果列 -> 明细列，按明细列的schema转换类型（与 pandas 聚合的结果类型一致）：
+        领域/性别使用相同的类别，整数求和保持明细的整数宽度（放不下时 apply_schema 自动放宽）
+        """
+        if not self.schema:
+            return df
+        specs = {col: self.schema['columns'][source] for col, source in sources.items()
+                 if col in df.columns and source in self.schema['columns']}
+        return apply_schema(df, {'version': self.schema.get('version'), 'columns': specs})
+
+    def _finish_aggregate(self, up_aggregated):
+        """取回后的类型、四舍五入和综合得分与 pandas 聚合保持一致"""
+        sources = {'domain': 'domain', 'gender': 'gender'}
+        sources.update({name: col for col, func, name in AGGREGATE_METRICS if func == 'sum'})
+        if 'video_title' not in self.column_types:
+            sources['video_count'] = 'video_count'
+        up_aggregated = self._apply_source_schema(up_aggregated, sources)
+        # pandas 的整数求和放不下明细的宽度时直接得到 int64，而 apply_schema 只放宽到刚好够用的宽度
+        columns = self.schema['columns'] if self.schema else {}
+        widened = {col: 'int64' for col, source in sources.items()
+                   if col in up_aggregated.columns and source in columns
+                   and pd.api.types.is_integer_dtype(up_aggregated[col])
+                   and str(up_aggregated[col].dtype) != columns[source]['dtype']}
+        up_aggregated = up_aggregated.astype(widened).round(2)
+        apply_comprehensive_score(up_aggregated)
+        return up_aggregated
+
+    def aggregate(self, filters):
+        if 'up_name' not in self.column_types:
+            return pd.DataFrame()
+        where, params = self._where(filters)
+        where = where + (' AND ' if where else ' WHERE ') + 'up_name IS NOT NULL'
+        up_aggregated = self._query(
+            f"SELECT {self._aggregate_select()} FROM {self._source}{where} GROUP BY up_name ORDER BY up_name",
+            params
+        )
+        if up_aggregated.empty:
+            return pd.DataFrame()
+        return self._finish_aggregate(up_aggregated)
+
+    def domain_means(self, filters):
+        """
+        按UP主分组在 DuckDB 中完成，领域均值在取回的聚合表（已保留两位小数）上计算，与 pandas 后端完全一致
+        （在 SQL 中用 round_even 舍入时，个别 .xx5 附近的值与 numpy 的舍入方向不同）
+        """
+        return domain_comparison(self.aggregate(filters))
+
+
+def create_backend(name, df, parquet_path=None, schema=None, index=None):
+    """
+    按名称创建查询后端；duckdb 不可用或没有与 df 一致的列式缓存时退回 pandas
+    """
+    if name == 'duckdb':
+        if not duckdb_available():
+            print("duckdb is not installed, falling back to the pandas query backend")
+        elif parquet_path:
+            return DuckDBBackend(parquet_path, schema)
+    return PandasBackend(df, index)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from utils.perf import timed
+
+
+# 推荐分数使用的指标及页面滑块的默认权重
+DEFAULT_RECOMMEND_WEIGHTS = {
+    'total_plays': 0.3,
+    'avg_plays': 0.2,
+    'video_count': 0.2,
+    'stability': 0.3
+}
+
+RECOMMEND_INPUT_COLUMNS = ['total_plays', 'avg_plays', 'video_count']
+RECOMMEND_FEATURES = ['total_plays', 'avg_plays', 'video_count', 'stability']
+
+
+def _stability_score(up_aggregated):
+    return up_aggregated['avg_plays'] / (up_aggregated['total_plays'] / up_aggregated['video_count'] + 1)
+
+
+def build_recommendation_features(up_aggregated):
+    """
+    预先计算推荐用的特征矩阵（对全部UP主做全局min-max归一化）
+    并按领域切分成连续的子矩阵；缺少必要列时返回None
+    权重变化时只需要对所选领域的子矩阵做一次矩阵乘法
+    """
+    if up_aggregated.empty or not all(col in up_aggregated.columns for col in RECOMMEND_INPUT_COLUMNS):
+        return None
+
+    raw = np.column_stack([
+        up_aggregated['total_plays'].to_numpy(dtype='float64'),
+        up_aggregated['avg_plays'].to_numpy(dtype='float64'),
+        up_aggregated['video_count'].to_numpy(dtype='float64'),
+        _stability_score(up_aggregated).to_numpy(dtype='float64')
+    ])
+    low = raw.min(axis=0)
+    span = raw.max(axis=0) - low
+    # 所有值相同的特征取0.5
+    matrix = np.where(span > 0, (raw - low) / np.where(span > 0, span, 1), 0.5)
+
+    domains = {}
+    if 'domain' in up_aggregated.columns:
+        # 领域按首次出现的顺序排列（与 unique() 一致），每个领域内保持原有行序
+        codes, uniques = pd.factorize(up_aggregated['domain'])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))])
+        order = order[np.count_nonzero(codes < 0):]
+        for code, domain in enumerate(uniques):
+            positions = order[bounds[code]:bounds[code + 1]]
+            domains[domain] = {'positions': positions, 'matrix': np.ascontiguousarray(matrix[positions])}
+
+    return {
+        'frame': up_aggregated,
+        'keys': RECOMMEND_FEATURES,
+        'matrix': matrix,
+        'domains': domains
+    }
+
+
+def stable_top_n(scores, n):
+    """
+    分数最高的 n 个位置（降序），分数相同时位置靠前的优先，与 nlargest(keep='first') 一致
+    先用 partition 找到第 n 大的值选出候选（O(n)），只对这 n 个候选排序；NaN不参与排名
+    """
+    valid = np.flatnonzero(~np.isnan(scores))
+    if len(valid) > n:
+        values = scores[valid]
+        kth = np.partition(values, len(values) - n)[len(values) - n]
+        above = valid[values > kth]
+        ties = valid[values == kth][:n - len(above)]
+        valid = np.concatenate([above, ties])
+    return valid[np.lexsort((valid, -scores[valid]))][:n]
+
+
+@timed('score')
+def top_recommendations(features, domain, weights, n=10):
+    """
+    所选领域的前 n 名推荐UP主（按 推荐分数 降序），权重之和为0时返回None
+    """
+    if features is None or sum(weights.values()) <= 0:
+        return None
+
+    domain_features = features['domains'].get(domain)
+    if domain_features is None:
+        return features['frame'].iloc[0:0].assign(推荐分数=pd.Series(dtype='float64'))
+
+    vector = np.array([weights[key] for key in features['keys']], dtype='float64')
+    scores = domain_features['matrix'] @ vector
+    top = stable_top_n(scores, n)
+
+    top_up = features['frame'].take(domain_features['positions'][top])
+    top_up['推荐分数'] = scores[top]
+    return top_up
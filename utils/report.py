@@ -0,0 +1,164 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_CONFIG, WEIGHTS
+from utils.aggregation import get_up_aggregated_data
+from utils.columnar_cache import read_frame, read_meta
+from utils.filter_index import apply_filter_index, build_filter_index
+from utils.leaderboard import build_leaderboard, leaderboard_top
+from utils.perf import span
+from utils.recommend import DEFAULT_RECOMMEND_WEIGHTS, build_recommendation_features, top_recommendations
+from utils.schema import compact_frame
+from utils.scoring import apply_comprehensive_score
+from utils.summary import summarize_dataset
+
+
+# 与页面一致的展示列和对比指标
+DOMAIN_COMPARISON_COLUMNS = ['total_plays', 'avg_plays', 'video_count', 'comprehensive_score']
+INTERACTION_COLUMNS = ['coins', 'likes', 'danmu']
+TOP_UPLOADER_COLUMNS = ['up_name', 'domain', 'comprehensive_score', 'video_count', 'total_plays']
+RECOMMENDATION_COLUMNS = ['up_name', 'video_count', 'total_plays', 'avg_plays', '推荐分数']
+
+
+def total_video_count(df):
+    """视频总数：video_count 列的总和，没有该列时为行数"""
+    return int(df['video_count'].sum()) if 'video_count' in df.columns else len(df)
+
+
+def overview_metrics(filtered_df, up_aggregated):
+    """概览页的关键指标：视频数、UP主数、单个视频平均播放数、UP主人均视频数"""
+    summary = summarize_dataset(filtered_df, up_aggregated)
+    summary['avg_plays_per_video'] = float(filtered_df['plays'].mean()) if 'plays' in filtered_df.columns else 0
+    return summary
+
+
+def domain_comparison(up_aggregated):
+    """各领域UP主的平均表现，没有领域或数值列时返回None"""
+    if up_aggregated.empty or 'domain' not in up_aggregated.columns:
+        return None
+    columns = [col for col in DOMAIN_COMPARISON_COLUMNS if col in up_aggregated.columns]
+    if not columns:
+        return None
+    return up_aggregated.groupby('domain', observed=True)[columns].mean().reset_index()
+
+
+def video_statistics(filtered_df):
+    """
+    播放数的描述统计和互动数据（投币/点赞/弹幕）的均值、最大值
+    count 统一为视频总数（video_count 之和），与概览指标一致；缺少 plays 列时 plays 为None
+    """
+    total = total_video_count(filtered_df)
+    plays = None
+    if 'plays' in filtered_df.columns:
+        described = filtered_df['plays'].describe()
+        plays = dict({'count': total}, **{key: float(value) for key, value in described.drop('count').items()})
+
+    interactions = [
+        {'indicator': col, 'count': total, 'mean': float(filtered_df[col].mean()), 'max': float(filtered_df[col].max())}
+        for col in INTERACTION_COLUMNS if col in filtered_df.columns
+    ]
+    return {'plays': plays, 'interactions': interactions}
+
+
+def top_uploaders(up_aggregated, n=10, metric='comprehensive_score'):
+    """按 metric 降序的前 n 名UP主"""
+    if up_aggregated.empty or metric not in up_aggregated.columns:
+        return up_aggregated.iloc[0:0]
+    top_up = leaderboard_top(build_leaderboard(up_aggregated, [metric]), metric, n)
+    return top_up[[col for col in TOP_UPLOADER_COLUMNS if col in top_up.columns]]
+
+
+def json_default(value):
+    """json.dump 的 default：数据框转为记录列表，日期转为ISO字符串，numpy标量转为Python标量"""
+    if isinstance(value, pd.DataFrame):
+        dates = value.select_dtypes(include=['datetime', 'datetimetz']).columns
+        if len(dates):
+            value = value.assign(**{col: value[col].map(lambda t: t.isoformat(), na_action='ignore').astype(object)
+                                    for col in dates})
+        return json.loads(value.to_json(orient='records', force_ascii=False))
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def load_report_data():
+    """
+    不依赖Streamlit加载清洗后的数据和UP主聚合表（读取列式缓存，缺失时读取清洗后的Excel）
+    返回 (明细数据, 聚合表)，没有数据时返回 (None, None)
+    """
+    cache_file = DATA_CONFIG['cache_file']
+    df = read_frame(cache_file)
+    schema = (read_meta(cache_file) or {}).get('schema') if df is not None else None
+    if df is None and os.path.exists(DATA_CONFIG['cleaned_file']):
+        df = pd.read_excel(DATA_CONFIG['cleaned_file'])
+    if df is None:
+        return None, None
+    df, _ = compact_frame(df, schema)
+
+    aggregate_file = DATA_CONFIG['aggregate_file']
+    up_aggregated = read_frame(aggregate_file)
+    if up_aggregated is None:
+        up_aggregated = get_up_aggregated_data(df)
+    elif (read_meta(aggregate_file) or {}).get('score_weights') != WEIGHTS:
+        apply_comprehensive_score(up_aggregated)
+    return df, up_aggregated
+
+
+def _view_report(filtered_df, up_aggregated, n):
+    return {
+        'overview': overview_metrics(filtered_df, up_aggregated),
+        'video_statistics': video_statistics(filtered_df),
+        'top_uploaders': top_uploaders(up_aggregated, n)
+    }
+
+
+def _domain_report(task):
+    """工作进程中执行：对单个领域的明细聚合，计算该领域的指标、统计和综合得分排名"""
+    domain, domain_df, n = task
+    return domain, _view_report(domain_df, get_up_aggregated_data(domain_df), n)
+
+
+def build_report(df, up_aggregated, weights=None, n=10, workers=None):
+    """
+    计算所有页面视图：全量的概览指标、视频统计、领域对比和综合得分排名，
+    以及每个领域（与页面只选择该领域时相同）的指标、统计、排名和前 n 名推荐UP主
+    各领域的聚合在独立的工作进程中并行计算；workers 默认使用全部CPU核
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    weights = weights or DEFAULT_RECOMMEND_WEIGHTS
+    report = _view_report(df, up_aggregated, n)
+    report['domain_comparison'] = domain_comparison(up_aggregated)
+
+    # 推荐分数在全量聚合表上归一化（与推荐页一致），每个领域只是一次矩阵乘法
+    with span('report.recommend'):
+        features = build_recommendation_features(up_aggregated)
+        recommendations = {}
+        for domain in (features['domains'] if features is not None else []):
+            top_up = top_recommendations(features, domain, weights, n)
+            if top_up is not None:
+                recommendations[domain] = top_up[[col for col in RECOMMENDATION_COLUMNS if col in top_up.columns]]
+
+    domains = list(df['domain'].unique()) if 'domain' in df.columns else []
+    index = build_filter_index(df)
+    tasks = [(domain, apply_filter_index(df, index, {'domains': [domain]}), n) for domain in domains]
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(tasks))
+
+    with span('report.domains', rows=len(tasks)):
+        if workers <= 1:
+            results = [_domain_report(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_domain_report, tasks))
+
+    report['domains'] = {}
+    for domain, domain_report in results:
+        domain_report['recommendations'] = recommendations.get(domain)
+        report['domains'][domain] = domain_report
+    return report
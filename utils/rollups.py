@@ -0,0 +1,162 @@
+import pandas as pd
+
+
+# 汇总的指标：同一UP主同一天的多行求和；fans_growth 是UP主当天的涨粉数，同一天的多行取最大值
+ROLLUP_METRICS = ['plays', 'coins', 'likes', 'danmu', 'fans_growth']
+SNAPSHOT_METRICS = ['fans_growth']
+# 时间粒度，date 列为每个周期的第一天（周一 / 每月1日）
+ROLLUP_PERIODS = ['day', 'week', 'month']
+# 汇总范围 -> 明细中的分组列，汇总表中统一写在 name 列
+ROLLUP_SCOPES = {'up': 'up_name', 'domain': 'domain'}
+ROLLUP_KEY_COLUMNS = ['scope', 'period', 'name', 'date']
+
+# 构建汇总表需要读取的明细列
+ROLLUP_INPUT_COLUMNS = ['up_name', 'domain', 'date'] + ROLLUP_METRICS
+
+
+def period_start(dates, period):
+    """日期 -> 所在周期的第一天"""
+    days = dates.dt.normalize()
+    if period == 'week':
+        return days - pd.to_timedelta(days.dt.dayofweek, unit='D')
+    if period == 'month':
+        return days - pd.to_timedelta(days.dt.day - 1, unit='D')
+    return days
+
+
+def _metrics(df):
+    return [col for col in ROLLUP_METRICS if col in df.columns]
+
+
+def daily_up_rollup(df, order=None):
+    """
+    明细 -> 每个UP主每天一行，UP主的领域取当天的第一个值；没有日期的行不参与汇总
+    order 为各行在原始文件中的排序键（df 须已按它排序）时额外记录行数 row_count 和第一行的排序键 first_order，
+    供增量清洗合并、相减
+    """
+    if 'up_name' not in df.columns or 'date' not in df.columns:
+        return pd.DataFrame()
+
+    rows = df[df['up_name'].notna() & df['date'].notna()]
+    metrics = _metrics(rows)
+    # 明细是窄整数，按天、周、月累加后可能溢出，统一按int64求和
+    frame = rows[metrics].astype('int64')
+    frame['up_name'] = rows['up_name']
+    frame['date'] = rows['date'].dt.normalize()
+    agg_config = {col: 'max' if col in SNAPSHOT_METRICS else 'sum' for col in metrics}
+    if 'domain' in rows.columns:
+        frame['domain'] = rows['domain']
+        agg_config['domain'] = 'first'
+    if order is not None:
+        frame['row_count'] = 1
+        frame['first_order'] = pd.Series(order, index=df.index)[rows.index]
+        agg_config.update(row_count='sum', first_order='min')
+    return frame.groupby(['up_name', 'date'], observed=True).agg(agg_config).reset_index()
+
+
+def _daily_merge_config(daily):
+    agg_config = {col: 'max' if col in SNAPSHOT_METRICS else 'sum' for col in _metrics(daily)}
+    if 'domain' in daily.columns:
+        agg_config['domain'] = 'first'
+    if 'first_order' in daily.columns:
+        agg_config.update(row_count='sum', first_order='min')
+    return agg_config
+
+
+def merge_daily_rollups(parts):
+    """
+    合并多个数据块的每日UP主汇总（流式清洗时逐块累积），同一UP主同一天跨块的行再次求和 / 取最大值
+    有 first_order 时领域按它取第一行的值，否则按块的先后
+    """
+    parts = [part for part in parts if part is not None and not part.empty]
+    if not parts:
+        return pd.DataFrame()
+    merged = pd.concat(parts, ignore_index=True)
+    if 'first_order' in merged.columns:
+        merged = merged.sort_values('first_order', kind='stable')
+    return merged.groupby(['up_name', 'date'], observed=True).agg(_daily_merge_config(merged)).reset_index()
+
+
+def subtract_daily_rollups(daily, removed):
+    """
+    从每日汇总中减去被移除的行（removed 为这些行的每日汇总，带 first_order）
+    被移除的行可能是当天的最大值（fans_growth）或第一行时无法相减，这些 (UP主, 日期) 从结果中去掉，
+    作为第二个返回值（MultiIndex）交给调用方重算；没有剩余行的直接去掉
+    """
+    keys = ['up_name', 'date']
+    if removed is None or removed.empty:
+        return daily, pd.MultiIndex.from_arrays([[], []], names=keys)
+
+    daily = daily.set_index(keys)
+    removed = removed.set_index(keys)
+    removed = removed[removed.index.isin(daily.index)]
+    current = daily.loc[removed.index]
+    stale = pd.Series(False, index=removed.index)
+    for col, merge in _daily_merge_config(daily).items():
+        if merge == 'sum':
+            daily.loc[removed.index, col] = current[col] - removed[col]
+        elif merge == 'max':
+            stale |= removed[col] >= current[col]
+        elif merge == 'min':
+            stale |= removed[col] <= current[col]
+
+    stale_keys = stale.index[stale.to_numpy() & (daily.loc[removed.index, 'row_count'] > 0).to_numpy()]
+    daily = daily[(daily['row_count'] > 0) & ~daily.index.isin(stale_keys)]
+    return daily.reset_index(), stale_keys
+
+
+def build_rollups(daily, periods=None):
+    """
+    由每日UP主汇总生成所有 (范围, 粒度) 的汇总表，合并为一张按 ROLLUP_KEY_COLUMNS 排序的长表
+    周、月和领域的 fans_growth 是每日值之和
+    """
+    periods = periods or {period: None for period in ROLLUP_PERIODS}
+    if daily.empty:
+        return pd.DataFrame()
+
+    metrics = _metrics(daily)
+    parts = []
+    for period, starts in periods.items():
+        frame = daily.assign(date=period_start(daily['date'], period))
+        if starts is not None:
+            frame = frame[frame['date'].isin(starts)]
+        for scope, col in ROLLUP_SCOPES.items():
+            if col not in frame.columns:
+                continue
+            grouped = frame.groupby([col, 'date'], observed=True)[metrics].sum().reset_index()
+            grouped = grouped.rename(columns={col: 'name'}).astype({'name': 'str'})
+            grouped.insert(0, 'period', period)
+            grouped.insert(0, 'scope', scope)
+            parts.append(grouped)
+
+    if not parts:
+        return pd.DataFrame()
+    return sort_rollups(pd.concat(parts, ignore_index=True))
+
+
+def sort_rollups(rollups):
+    # 按范围、粒度、名称排序写入，读取时的过滤条件能跳过无关的行组
+    return rollups.sort_values(ROLLUP_KEY_COLUMNS, kind='stable').reset_index(drop=True)
+
+
+def update_rollups(rollups, daily, changed_dates):
+    """
+    增量更新：只重算 changed_dates（新增或移除的明细行的日期）所在的日、周、月
+    daily 是更新后的完整每日UP主汇总，只有落在这些周期内的行会参与汇总
+    """
+    changed = pd.Series(pd.to_datetime(pd.Series(changed_dates)).dropna().unique())
+    if changed.empty:
+        return rollups
+
+    starts = {period: pd.Index(period_start(changed, period).unique()) for period in ROLLUP_PERIODS}
+    dates = daily['date']
+    affected = pd.Series(False, index=daily.index)
+    for period, period_starts in starts.items():
+        affected |= period_start(dates, period).isin(period_starts)
+
+    stale = pd.Series(False, index=rollups.index)
+    for period, period_starts in starts.items():
+        stale |= (rollups['period'] == period) & rollups['date'].isin(period_starts)
+
+    fresh = build_rollups(daily[affected], starts)
+    return sort_rollups(pd.concat([rollups[~stale], fresh], ignore_index=True))
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+
+SCHEMA_VERSION = 1
+
+# 低基数文本列存为 category
+CATEGORY_COLUMNS = ['domain', 'gender', 'rank_type', 'type', 'up_tag']
+# 计数列使用能容纳取值范围的最小有符号整数类型
+# 注意：窄整数逐元素运算可能溢出，需要时先 astype('int64')；sum/groupby 求和会自动升为int64
+COUNTER_COLUMNS = ['plays', 'coins', 'likes', 'danmu', 'fans_growth', 'video_count', 'rank']
+# 固定宽度的整数列（mid 可能超过int32范围，且不随数据变化）
+FIXED_INTEGER_COLUMNS = {'mid': 'int64'}
+
+INTEGER_WIDTHS = ['int8', 'int16', 'int32', 'int64']
+
+
+def _smallest_int_dtype(min_value, max_value):
+    """能容纳 [min_value, max_value] 的最小有符号整数类型"""
+    for dtype in INTEGER_WIDTHS:
+        info = np.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            return dtype
+    return 'int64'
+
+
+def _wider_int_dtype(left, right):
+    return INTEGER_WIDTHS[max(INTEGER_WIDTHS.index(left), INTEGER_WIDTHS.index(right))]
+
+
+def _present_values(series):
+    """列中出现的非空取值（category列只取实际出现的类别）"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = np.unique(series.cat.codes.to_numpy())
+        return [str(value) for value in series.cat.categories[codes[codes >= 0]]]
+    return [str(value) for value in series.dropna().unique()]
+
+
+def infer_schema(df):
+    """
+    根据数据推断紧凑的列类型：
+    - 低基数文本列 -> category（类别按字符串排序，保证跨次运行一致）
+    - 计数列 -> 最小安全宽度的整数
+    - mid -> 固定的 int64
+    返回可写入JSON的字典
+    """
+    columns = {}
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            columns[col] = {'dtype': 'category', 'categories': sorted(_present_values(df[col]))}
+
+    for col in COUNTER_COLUMNS:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            if len(df) == 0:
+                columns[col] = {'dtype': 'int8'}
+            else:
+                columns[col] = {'dtype': _smallest_int_dtype(int(df[col].min()), int(df[col].max()))}
+
+    for col, dtype in FIXED_INTEGER_COLUMNS.items():
+        if col in df.columns:
+            columns[col] = {'dtype': dtype}
+
+    return {'version': SCHEMA_VERSION, 'columns': columns}
+
+
+def merge_schemas(left, right):
+    """
+    合并两个schema（流式清洗时逐块累积）：类别取并集，整数取较宽的类型
+    """
+    if not left:
+        return right
+    if not right:
+        return left
+
+    columns = {col: dict(spec) for col, spec in left['columns'].items()}
+    for col, spec in right['columns'].items():
+        current = columns.get(col)
+        if current is None:
+            columns[col] = dict(spec)
+        elif spec['dtype'] == 'category' and current['dtype'] == 'category':
+            current['categories'] = sorted(set(current['categories']) | set(spec['categories']))
+        elif spec['dtype'] in INTEGER_WIDTHS and current['dtype'] in INTEGER_WIDTHS:
+            current['dtype'] = _wider_int_dtype(current['dtype'], spec['dtype'])
+    return {'version': SCHEMA_VERSION, 'columns': columns}
+
+
+def apply_schema(df, schema):
+    """
+    按schema转换列类型，返回新的数据框
+    schema 只是下限：数据中出现schema外的类别或超出整数范围时自动放宽，不会丢值
+    """
+    if not schema:
+        return df
+
+    converted = {}
+    for col, spec in schema.get('columns', {}).items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        dtype = spec['dtype']
+
+        if dtype == 'category':
+            categories = spec.get('categories', [])
+            if isinstance(series.dtype, pd.CategoricalDtype) and list(series.cat.categories) == categories:
+                continue
+            missing = set(_present_values(series)) - set(categories)
+            if missing:
+                categories = sorted(set(categories) | missing)
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                converted[col] = series.cat.set_categories(categories)
+            else:
+                if not pd.api.types.is_string_dtype(series):
+                    series = series.where(series.isna(), series.astype(str))
+                converted[col] = pd.Categorical(series, categories=categories)
+        elif dtype in INTEGER_WIDTHS:
+            if not pd.api.types.is_integer_dtype(series):
+                series = pd.to_numeric(series, errors='coerce').fillna(0).astype('int64')
+            if len(series) > 0 and col not in FIXED_INTEGER_COLUMNS:
+                dtype = _wider_int_dtype(dtype, _smallest_int_dtype(int(series.min()), int(series.max())))
+            if series.dtype != dtype:
+                converted[col] = series.astype(dtype)
+
+    if not converted:
+        return df
+
+    df = df.copy(deep=False)
+    for col, values in converted.items():
+        df[col] = pd.Series(values, index=df.index, name=col)
+    return df
+
+
+def compact_frame(df, schema=None):
+    """
+    转换为紧凑的内存表示，schema 为空时从数据推断
+    返回 (数据框, 实际使用的schema)
+    """
+    schema = merge_schemas(schema, infer_schema(df)) if schema else infer_schema(df)
+    return apply_schema(df, schema), schema
+
+
+def memory_footprint(df):
+    """数据框的实际内存占用（字节，含字符串内容）"""
+    return int(df.memory_usage(index=True, deep=True).sum())
@@ -0,0 +1,71 @@
+import numpy as np
+
+from config import WEIGHTS
+
+
+# 权重键 -> 聚合表中的指标列；未列出的键依次尝试 total_<键> 和 <键> 本身
+SCORE_METRICS = {
+    'plays': 'total_plays',
+    'coins': 'total_coins',
+    'likes': 'total_likes',
+    'danmu': 'total_danmu'
+}
+
+
+def metric_column(up_aggregated, key):
+    """权重键对应的聚合列，不存在时返回None"""
+    for col in (SCORE_METRICS.get(key), f'total_{key}', key):
+        if col and col in up_aggregated.columns:
+            return col
+    return None
+
+
+def normalized_metric_matrix(up_aggregated, keys):
+    """
+    一次性构建 (UP主数, 指标数) 的min-max归一化矩阵
+    返回 (矩阵, 实际可用的指标键)；所有值相同的指标归一化为0
+    """
+    keys = [key for key in keys if metric_column(up_aggregated, key) is not None]
+    if not keys:
+        return np.empty((len(up_aggregated), 0)), []
+
+    matrix = np.column_stack([
+        up_aggregated[metric_column(up_aggregated, key)].to_numpy(dtype='float64') for key in keys
+    ])
+    low = matrix.min(axis=0)
+    span = matrix.max(axis=0) - low
+    # 常数列的 span 为0，分子也为0，除以1得到0
+    return (matrix - low) / np.where(span > 0, span, 1), keys
+
+
+def score_matrix(matrix, keys, weights):
+    """矩阵与权重向量相乘，按权重之和归一化；权重之和不为正时返回None"""
+    vector = np.array([weights[key] for key in keys], dtype='float64')
+    total = vector.sum()
+    if not keys or total <= 0:
+        return None
+    return matrix @ vector / total
+
+
+def compute_comprehensive_score(up_aggregated, weights=None):
+    """
+    按 config.WEIGHTS 计算综合得分（保留4位小数），无法计算时返回None
+    只依赖聚合表，权重变化时不需要重新聚合
+    """
+    weights = weights or WEIGHTS
+    if up_aggregated.empty:
+        return None
+
+    matrix, keys = normalized_metric_matrix(up_aggregated, list(weights))
+    scores = score_matrix(matrix, keys, weights)
+    if scores is None:
+        return None
+    return np.round(scores, 4)
+
+
+def apply_comprehensive_score(up_aggregated, weights=None):
+    """在聚合表上写入/更新 comprehensive_score 列，返回同一个数据框"""
+    scores = compute_comprehensive_score(up_aggregated, weights)
+    if scores is not None:
+        up_aggregated['comprehensive_score'] = scores
+    return up_aggregated
@@ -0,0 +1,50 @@
+from config import DATA_CONFIG
+from utils.columnar_cache import is_cache_valid, read_meta, write_meta
+
+
+# 首页只需要这几个整体统计，清洗时随物化聚合表一起写入其元数据
+SUMMARY_KEYS = ['total_videos', 'total_up', 'domains', 'avg_videos_per_up']
+
+
+def summarize_dataset(df, up_aggregated):
+    """整体统计：总视频数（video_count 之和，没有该列时为行数）、UP主数、领域数、人均视频数"""
+    total_videos = int(df['video_count'].sum()) if 'video_count' in df.columns else len(df)
+    domains = int(df['domain'].nunique()) if 'domain' in df.columns else 0
+    return build_summary(total_videos, len(up_aggregated), domains)
+
+
+def build_summary(total_videos, total_up, domains):
+    """由已统计好的计数生成整体统计（流式清洗时逐块累积这些计数）"""
+    return {
+        'total_videos': total_videos,
+        'total_up': total_up,
+        'domains': domains,
+        'avg_videos_per_up': total_videos / total_up if total_up > 0 else 0
+    }
+
+
+def read_summary(aggregate_file=None):
+    """
+    读取物化聚合表元数据中的整体统计，聚合表缺失、过期或没有统计时返回None
+    只读取JSON元数据，不导入 pandas
+    """
+    aggregate_file = aggregate_file or DATA_CONFIG['aggregate_file']
+    if not is_cache_valid(aggregate_file):
+        return None
+    summary = (read_meta(aggregate_file) or {}).get('summary')
+    if not summary or any(key not in summary for key in SUMMARY_KEYS):
+        return None
+    return summary
+
+
+def store_summary(summary, aggregate_file=None):
+    """把整体统计补写到有效的物化聚合表元数据中（旧版本的缓存没有统计）"""
+    aggregate_file = aggregate_file or DATA_CONFIG['aggregate_file']
+    if not is_cache_valid(aggregate_file):
+        return False
+    try:
+        write_meta(aggregate_file, dict(read_meta(aggregate_file), summary=summary))
+        return True
+    except OSError as e:
+        print(f"Failed to write summary stats: {e}")
+        return False